@@ -3,6 +3,8 @@ from flask_cors import CORS
 from datetime import datetime, timedelta
 import sqlite3
 from database import init_database, generate_mock_data, get_db_connection
+import metrics
+import profiling
 import sys
 import os
 
@@ -10,7 +12,9 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'routes'))
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['Content-Disposition', 'X-Document-Id'])
+metrics.init_app(app)
+profiling.init_app(app)
 
 # 初始化数据库 | Initialize database
 init_database()
@@ -15,6 +15,9 @@ from flask_cors import CORS
 import os
 from dotenv import load_dotenv
 
+import metrics
+import profiling
+
 # Load environment variables
 load_dotenv()
 
@@ -34,8 +37,14 @@ CORS(app,
      ],
      supports_credentials=True,
      allow_headers=["Content-Type", "Authorization"],
+     expose_headers=["Content-Disposition", "X-Document-Id"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
+# Per-route latency and database round-trips at /metrics
+metrics.init_app(app)
+# Opt-in request profiler (only with PROFILING_TOKEN)
+profiling.init_app(app)
+
 # Import and register blueprints
 from routes.wms_routes import wms_bp
 from routes.ai_routes import ai_bp
@@ -101,7 +110,8 @@ def index():
         },
         'endpoints': {
             'health': '/health',
-            'status': '/status'
+            'status': '/status',
+            'metrics': '/metrics'
         }
     })
 
@@ -9,6 +9,7 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from datetime import datetime, timedelta
 from database_supabase import get_supabase_client
+from catalog_assets import attach_media
 import os
 from dotenv import load_dotenv
 
@@ -218,7 +219,10 @@ def get_low_stock_alert():
         # Sort by shortage (most critical first) | 按缺货量排序（最严重的在前）
         low_stock_items.sort(key=lambda x: x['shortage'], reverse=True)
         
-        return jsonify(low_stock_items[:20])  # Limit to 20 items | 限制为20项
+        low_stock_items = low_stock_items[:20]  # Limit to 20 items | 限制为20项
+        attach_media(low_stock_items)
+
+        return jsonify(low_stock_items)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -271,6 +275,8 @@ def get_all_materials():
                 'status_text': status_text
             })
         
+        attach_media(data)
+
         return jsonify(data)
         
     except Exception as e:
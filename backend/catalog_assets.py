@@ -4,17 +4,25 @@ Catalog asset helpers.
 Loads the Longdan image index that was uploaded to Supabase Storage so backend
 endpoints can attach thumbnail URLs, filenames, and original product links
 without duplicating the entire JSON payload on every request.
+
+The JSON index is compiled into a small SQLite file (CATALOG_IMAGE_DB) keyed by
+SKU with the storage URL precomputed. Every worker process opens it read-only,
+so lookups are a B-tree probe, memory is shared through the OS page cache, and
+a restart can serve images straight from disk before storage is reachable.
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import re
+import sqlite3
+import tempfile
 import threading
 import time
 import unicodedata
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from database_supabase import get_supabase_client
 
@@ -32,30 +40,216 @@ PUBLIC_IMAGE_BASE = (
     else ""
 )
 
-_cache_lock = threading.Lock()
-_image_cache: Dict[str, Dict[str, str]] = {}
-_last_fetch = 0.0
+CATALOG_IMAGE_RETRY_SECONDS = int(os.getenv("CATALOG_IMAGE_RETRY_SECONDS", "60"))
+CATALOG_IMAGE_DB = os.getenv(
+    "CATALOG_IMAGE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog_cache", "longdan_image_index.db"),
+)
+
+# Index fields stored as columns; anything else in an entry goes to `extra` as JSON
+MEDIA_COLUMNS = ("image_url", "image_filename", "source_url", "storage_image_url")
+# Stay below SQLite's default limit on bound parameters per statement
+MEDIA_BATCH_SIZE = 500
+# Bounding box (px) of list-view thumbnails; picks the nearest derivative size
+LIST_THUMBNAIL_SIZE = int(os.getenv("CATALOG_THUMBNAIL_SIZE", "64"))
+THUMBNAIL_FORMAT = os.getenv("CATALOG_THUMBNAIL_FORMAT", "webp")
+
+_state_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_refresh_scheduled = False
+_retry_after = 0.0
+_local = threading.local()
+
+
+def _connection() -> Optional[sqlite3.Connection]:
+    """Return this thread's read-only connection, reopening it after a rebuild."""
+    try:
+        stat = os.stat(CATALOG_IMAGE_DB)
+    except OSError:
+        return None
+
+    identity = (stat.st_dev, stat.st_ino)
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "identity", None) == identity:
+        return conn
+    if conn is not None:
+        conn.close()
+
+    # The file is only ever replaced, never written in place, so it is immutable
+    conn = sqlite3.connect(f"file:{CATALOG_IMAGE_DB}?mode=ro&immutable=1", uri=True)
+    _local.conn = conn
+    _local.identity = identity
+    return conn
+
+
+def _read_meta() -> Dict[str, str]:
+    conn = _connection()
+    if conn is None:
+        return {}
+    try:
+        return dict(conn.execute("SELECT key, value FROM meta"))
+    except sqlite3.Error:
+        return {}
+
 
+def _media_row(sku: str, media: Dict[str, str]) -> Tuple:
+    storage_url = media.get("storage_image_url")
+    if not storage_url and media.get("storage_path") and PUBLIC_IMAGE_BASE:
+        # Deduplicated sync: several SKUs may share one content-addressed object
+        storage_url = f"{PUBLIC_IMAGE_BASE}/{media['storage_path']}"
+    if not storage_url:
+        storage_url = build_storage_url(media.get("image_filename"))
+    extra = {key: value for key, value in media.items() if key not in MEDIA_COLUMNS}
+    return (
+        sku,
+        media.get("image_url"),
+        media.get("image_filename"),
+        media.get("source_url"),
+        storage_url,
+        json.dumps(extra, ensure_ascii=False) if extra else None,
+    )
 
-def _load_index(force: bool = False) -> Dict[str, Dict[str, str]]:
-    """Download the image index JSON from Supabase storage with basic caching."""
-    global _image_cache, _last_fetch
 
-    with _cache_lock:
-        now = time.time()
-        if _image_cache and not force and now - _last_fetch < CATALOG_IMAGE_CACHE_TTL:
-            return _image_cache
+def build_index_db(index: Dict[str, Dict[str, str]], path: str, meta: Optional[Dict[str, str]] = None) -> None:
+    """Compile a JSON image index into a SQLite file, atomically replacing `path`."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
 
+    try:
+        conn = sqlite3.connect(tmp_path)
         try:
-            supabase = get_supabase_client()
-            storage = supabase.storage
+            conn.executescript(
+                """
+                PRAGMA journal_mode = OFF;
+                PRAGMA synchronous = OFF;
+                CREATE TABLE media (
+                    sku TEXT PRIMARY KEY,
+                    image_url TEXT,
+                    image_filename TEXT,
+                    source_url TEXT,
+                    storage_image_url TEXT,
+                    extra TEXT
+                ) WITHOUT ROWID;
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+                """
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?)",
+                (_media_row(sku, media) for sku, media in sorted(index.items())),
+            )
+            meta = {**(meta or {}), "built_at": str(time.time()), "entries": str(len(index))}
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _remote_etag(storage) -> Optional[str]:
+    """Look up the index object's ETag via a listing call (no body download)."""
+    folder, name = os.path.split(CATALOG_IMAGE_INDEX_KEY)
+    entries = storage.from_(CATALOG_BUCKET).list(path=folder, options={"search": name, "limit": 100})
+    for entry in entries or []:
+        if entry.get("name") == name:
+            metadata = entry.get("metadata") or {}
+            return metadata.get("eTag") or metadata.get("etag") or entry.get("updated_at")
+    return None
+
+
+def _mark_checked() -> None:
+    # The file's mtime records the last successful check, shared by all workers
+    try:
+        os.utime(CATALOG_IMAGE_DB)
+    except OSError:
+        pass
+
+
+def _fetch_index() -> None:
+    """Fetch the index from storage and rebuild the local database if it changed.
+
+    An unchanged ETag skips the download; an unchanged content hash skips the
+    JSON parse and rebuild. Readers keep using the current file throughout.
+    """
+    global _retry_after
+
+    with _refresh_lock:
+        try:
+            storage = get_supabase_client().storage
+            meta = _read_meta()
+
+            etag = None
+            try:
+                etag = _remote_etag(storage)
+            except Exception:  # noqa: BLE001
+                etag = None
+
+            if etag and etag == meta.get("etag"):
+                _mark_checked()
+                return
+
             data = storage.from_(CATALOG_BUCKET).download(CATALOG_IMAGE_INDEX_KEY)
-            _image_cache = json.loads(data.decode("utf-8"))
-            _last_fetch = now
+            digest = hashlib.sha256(data).hexdigest()
+            if digest == meta.get("sha256"):
+                _mark_checked()
+                return
+
+            index = json.loads(data.decode("utf-8"))
+            build_index_db(index, CATALOG_IMAGE_DB, {"sha256": digest, "etag": etag or ""})
         except Exception as exc:  # noqa: BLE001
-            # Keep old cache if download fails
+            # Keep the existing file if download fails and retry after a short back-off
             print(f"⚠️ Failed to load catalog image index: {exc}")
-        return _image_cache
+            with _state_lock:
+                _retry_after = time.time() + CATALOG_IMAGE_RETRY_SECONDS
+
+
+def _background_refresh() -> None:
+    global _refresh_scheduled
+    try:
+        _fetch_index()
+    finally:
+        with _state_lock:
+            _refresh_scheduled = False
+
+
+def _schedule_refresh() -> None:
+    """Start a background refresh unless one is running or we are backing off."""
+    global _refresh_scheduled
+    with _state_lock:
+        if _refresh_scheduled or time.time() < _retry_after:
+            return
+        _refresh_scheduled = True
+    threading.Thread(target=_background_refresh, name="catalog-index-refresh", daemon=True).start()
+
+
+def _ensure_index(force: bool = False) -> bool:
+    """Make sure a local index exists, with stale-while-revalidate refreshes.
+
+    Only a forced refresh blocks on storage. Without a database file requests
+    get no media while a background thread fetches it; once the file exists,
+    an expired TTL serves it as-is and refreshes it in the background.
+    """
+    try:
+        age = time.time() - os.stat(CATALOG_IMAGE_DB).st_mtime
+    except OSError:
+        age = None
+
+    if force:
+        _fetch_index()
+        return os.path.exists(CATALOG_IMAGE_DB)
+
+    if age is None:
+        _schedule_refresh()
+        return False
+
+    if age >= CATALOG_IMAGE_CACHE_TTL:
+        _schedule_refresh()
+    return True
 
 
 def _sanitize_component(value: str, allow_dot: bool = False) -> str:
@@ -89,20 +283,77 @@ def build_storage_url(filename: str) -> Optional[str]:
     return f"{PUBLIC_IMAGE_BASE}/{key}"
 
 
-def get_material_media(sku: str) -> Optional[Dict[str, str]]:
-    """Return image metadata plus storage URL for a SKU."""
-    if not sku:
+def _row_to_media(row: Tuple) -> Dict[str, str]:
+    media = {key: value for key, value in zip(MEDIA_COLUMNS, row[1:5]) if value is not None}
+    if row[5]:
+        media.update(json.loads(row[5]))
+    return media
+
+
+def variant_url(media: Dict, size: int, fmt: str = THUMBNAIL_FORMAT) -> Optional[str]:
+    """Return the URL of the smallest derivative covering `size` px (else the largest one)."""
+    variants = media.get("variants")
+    if not variants or not PUBLIC_IMAGE_BASE:
+        return None
+    sizes = sorted(int(key) for key in variants)
+    chosen = next((candidate for candidate in sizes if candidate >= size), sizes[-1])
+    formats = variants[str(chosen)]
+    variant = formats.get(fmt) or next(iter(formats.values()))
+    return f"{PUBLIC_IMAGE_BASE}/{variant['path']}"
+
+
+def get_material_media(sku: str, size: Optional[int] = None) -> Optional[Dict[str, str]]:
+    """Return image metadata plus storage URL for a SKU.
+
+    With `size`, also returns `thumbnail_url` pointing at the best-fitting
+    derivative built by scripts/build_catalog_derivatives.py.
+    """
+    if not sku or not _ensure_index():
         return None
-    index = _load_index()
-    media = index.get(sku)
-    if not media:
+    conn = _connection()
+    if conn is None:
         return None
-    storage_url = build_storage_url(media.get("image_filename"))
-    if storage_url:
-        media = {**media, "storage_image_url": storage_url}
+    row = conn.execute("SELECT * FROM media WHERE sku = ?", (sku,)).fetchone()
+    if not row:
+        return None
+    media = _row_to_media(row)
+    if size:
+        media["thumbnail_url"] = variant_url(media, size)
     return media
 
 
+def get_materials_media(skus: Iterable[str]) -> Dict[str, Dict[str, str]]:
+    """Resolve media for many SKUs at once; SKUs without images are omitted."""
+    wanted = list(dict.fromkeys(sku for sku in skus if sku))
+    if not wanted or not _ensure_index():
+        return {}
+    conn = _connection()
+    if conn is None:
+        return {}
+
+    result: Dict[str, Dict[str, str]] = {}
+    for start in range(0, len(wanted), MEDIA_BATCH_SIZE):
+        chunk = wanted[start:start + MEDIA_BATCH_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        for row in conn.execute(f"SELECT * FROM media WHERE sku IN ({placeholders})", chunk):
+            result[row[0]] = _row_to_media(row)
+    return result
+
+
+def attach_media(items: List[Dict], sku_key: str = "sku",
+                 thumbnail_size: int = LIST_THUMBNAIL_SIZE) -> List[Dict]:
+    """Add the image fields list endpoints expose to each row, in place."""
+    media_by_sku = get_materials_media(item.get(sku_key) for item in items)
+    for item in items:
+        media = media_by_sku.get(item.get(sku_key)) or {}
+        item["image_url"] = media.get("image_url")
+        item["image_filename"] = media.get("image_filename")
+        item["image_source_url"] = media.get("source_url")
+        item["storage_image_url"] = media.get("storage_image_url")
+        item["thumbnail_url"] = variant_url(media, thumbnail_size) if media else None
+    return items
+
+
 def refresh_catalog_media_cache() -> None:
     """Force refresh cache (e.g., after importer runs)."""
-    _load_index(force=True)
+    _ensure_index(force=True)
@@ -1,12 +1,20 @@
+import os
 import sqlite3
 from datetime import datetime, timedelta
 import random
 
-DATABASE_PATH = 'warehouse.db'
+import query_log
+from metrics import ENABLED as METRICS_ENABLED, InstrumentedConnection
+
+# 数据库文件路径，可用环境变量覆盖 | Database file path, overridable via environment
+DATABASE_PATH = os.getenv('WAREHOUSE_DB_PATH', 'warehouse.db')
 
 def get_db_connection():
     """获取数据库连接 | Get database connection"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    # 计时与慢查询日志 | Timing and slow-query log
+    # METRICS_ENABLED=0 只保留语句计时, 再加 SLOW_QUERY_MS=off 使用原生连接 | METRICS_ENABLED=0 keeps only statement timing; add SLOW_QUERY_MS=off for plain connections
+    factory = InstrumentedConnection if METRICS_ENABLED or query_log.ENABLED else sqlite3.Connection
+    conn = sqlite3.connect(DATABASE_PATH, factory=factory)
     conn.row_factory = sqlite3.Row
     return conn
 
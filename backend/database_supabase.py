@@ -18,10 +18,26 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")  # Use service key for backend
 
-if not SUPABASE_URL or not SUPABASE_KEY:
+if os.getenv("SUPABASE_FAKE_DB"):
+    # Offline stand-in backed by SQLite (tests/benchmarks) | 基于 SQLite 的离线替身（测试/基准）
+    try:
+        from fake_supabase import create_fake_client
+    except ImportError:
+        from backend.fake_supabase import create_fake_client
+
+    supabase = create_fake_client()
+elif not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("Missing Supabase credentials in .env file")
+else:
+    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+# Time every query, RPC and storage call for /metrics | 为 /metrics 记录每次查询耗时
+try:
+    from metrics import instrument_supabase
+except ImportError:
+    from backend.metrics import instrument_supabase
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase = instrument_supabase(supabase)
 
 
 def get_supabase_client():
@@ -0,0 +1,127 @@
+"""
+Document data-access helpers.
+
+Sample-data builders in the document routes only need a handful of material
+columns. This module keeps the per-document column lists in one place, fetches
+related lots with a single embedded select, and caches the results for a
+short TTL so repeated document requests do not re-query Supabase. The stock
+routes clear the cache after every movement so quantities are never stale
+within this process.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from database_supabase import get_supabase_client
+from metrics import record_cache
+
+DOCUMENT_DATA_CACHE_TTL = int(os.getenv("DOCUMENT_DATA_CACHE_TTL", "60"))
+
+# Columns each document actually renders; `lots` are embedded from inventory_lots
+DOCUMENT_QUERIES: Dict[str, Dict[str, Any]] = {
+    "po-receipt": {"columns": ("sku", "name"), "lots": ("lot_number", "expiration_date"), "limit": 5},
+    "receiving-report": {"columns": ("quantity",), "limit": 10},
+    "putaway-report": {"columns": ("sku", "name", "quantity", "location"), "lots": ("lot_number", "expiration_date"), "limit": 8},
+    "inventory-report": {"columns": ("sku", "name", "category", "quantity", "unit", "location"), "order": "name"},
+    "stock-status": {"columns": ("sku", "name", "quantity", "safe_stock"), "order": "name"},
+    "cycle-count": {"columns": ("sku", "name", "location", "quantity"), "limit": 10},
+    "pick-list": {"columns": ("sku", "name", "quantity", "location"), "lots": ("lot_number", "expiration_date"), "limit": 6},
+    "packing-slip": {"columns": ("sku", "name", "quantity"), "lots": ("lot_number", "expiration_date"), "limit": 5},
+    "bill-of-lading": {"columns": ("name", "quantity"), "limit": 3},
+}
+
+_cache_lock = threading.Lock()
+_cache: Dict[Tuple, Tuple[float, List[Dict[str, Any]]]] = {}
+# Bumped on every clear so a query that started before a stock movement is not cached
+_generation = 0
+
+
+def _select_clause(columns: Tuple[str, ...], lots: Optional[Tuple[str, ...]]) -> str:
+    clause = ", ".join(columns)
+    if lots:
+        clause += f", inventory_lots({', '.join(lots + ('status', 'quantity'))})"
+    return clause
+
+
+def _query_materials(columns: Tuple[str, ...], lots: Optional[Tuple[str, ...]],
+                     limit: Optional[int], order: Optional[str]) -> List[Dict[str, Any]]:
+    query = get_supabase_client().table("materials").select(_select_clause(columns, lots))
+    if order:
+        query = query.order(order)
+    if limit:
+        query = query.limit(limit)
+    return query.execute().data
+
+
+def fetch_materials(columns: Tuple[str, ...], lots: Optional[Tuple[str, ...]] = None,
+                    limit: Optional[int] = None, order: Optional[str] = None,
+                    force: bool = False) -> List[Dict[str, Any]]:
+    """
+    Fetch projected material rows, optionally with their lots embedded.
+
+    Each row with `lots` requested gets an `inventory_lots` list containing
+    only active lots with stock left, earliest expiry first (FEFO order).
+    Results are cached for DOCUMENT_DATA_CACHE_TTL seconds.
+    """
+    key = (columns, lots, limit, order)
+    now = time.time()
+    generation = _generation
+
+    if not force and DOCUMENT_DATA_CACHE_TTL > 0:
+        with _cache_lock:
+            cached = _cache.get(key)
+        if cached and now - cached[0] < DOCUMENT_DATA_CACHE_TTL:
+            record_cache("document_data", True)
+            return cached[1]
+        record_cache("document_data", False)
+
+    try:
+        rows = _query_materials(columns, lots, limit, order)
+    except Exception as exc:  # noqa: BLE001
+        if not lots:
+            raise
+        # Fall back to a flat query if the lots relation is unavailable
+        print(f"⚠️ Embedded lot select failed, continuing without lots: {exc}")
+        rows = _query_materials(columns, None, limit, order)
+
+    for row in rows:
+        if lots:
+            active = [
+                lot for lot in row.get("inventory_lots") or []
+                if lot.get("status", "active") == "active" and (lot.get("quantity") or 0) > 0
+            ]
+            row["inventory_lots"] = sorted(active, key=lambda lot: lot.get("expiration_date") or "")
+
+    with _cache_lock:
+        if generation == _generation:
+            _cache[key] = (now, rows)
+    return rows
+
+
+def get_document_materials(doc_type: str) -> List[Dict[str, Any]]:
+    """Fetch the material rows a document's sample builder needs."""
+    spec = DOCUMENT_QUERIES[doc_type]
+    return fetch_materials(
+        tuple(spec["columns"]),
+        lots=tuple(spec["lots"]) if spec.get("lots") else None,
+        limit=spec.get("limit"),
+        order=spec.get("order"),
+    )
+
+
+def first_lot(material: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the first (earliest-expiring) active lot of a fetched material."""
+    lots = material.get("inventory_lots") or []
+    return lots[0] if lots else None
+
+
+def clear_document_data_cache() -> None:
+    """Drop cached reference data (e.g. after stock movements or imports)."""
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        _cache.clear()
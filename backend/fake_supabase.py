@@ -0,0 +1,651 @@
+"""
+Offline Supabase stand-in | 离线 Supabase 替身
+
+A SQLite-backed fake of the subset of the supabase-py client this backend uses,
+so `wms_routes.py`, `app_supabase.py`, `catalog_assets.py` and the import
+scripts run without a Supabase project:
+
+- table(): select (with `count='exact'` and embedded `relation(columns)`),
+  eq/neq/gt/gte/lt/lte/like/ilike/is_/in_/or_, order, limit, range, single,
+  insert, update, upsert and delete (writes to unknown columns raise
+  APIError PGRST204, as PostgREST does)
+- rpc(): `count_low_stock`, `sum_quantity_by_date`, plus `register_rpc()`
+- storage: buckets as directories with upload/download/list/remove
+
+Every round-trip (execute, rpc, storage call) sleeps for the configured latency
+and is counted per thread, which makes the N+1 query patterns of the Supabase
+routes measurable. Enabled by `SUPABASE_FAKE_DB` in database_supabase.py.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from postgrest.exceptions import APIError
+from storage3.exceptions import StorageApiError
+
+# Supabase tables in SQLite types; existing databases (app.py, generate_synthetic_data.py) are kept as-is
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS materials (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        sku TEXT UNIQUE NOT NULL,
+        category TEXT NOT NULL,
+        quantity INTEGER DEFAULT 0,
+        unit TEXT DEFAULT '个',
+        safe_stock INTEGER DEFAULT 20,
+        location TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS inventory_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        material_id INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        quantity INTEGER NOT NULL,
+        operator TEXT DEFAULT 'System',
+        reason TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS inventory_lots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        material_id INTEGER NOT NULL,
+        lot_number TEXT NOT NULL,
+        expiration_date DATE,
+        quantity INTEGER DEFAULT 0,
+        catch_weight REAL,
+        status TEXT DEFAULT 'active',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# Columns the Supabase project has beyond app.py's SQLite schema (catalog
+# import fields); added to existing databases when they are opened. Writes to
+# any other unknown column fail like PostgREST does (PGRST204).
+SUPABASE_COLUMNS: Dict[str, Dict[str, str]] = {
+    "materials": {
+        "unit_of_measure": "TEXT",
+        "temperature_zone": "TEXT",
+        "is_active": "BOOLEAN DEFAULT 1",
+    },
+}
+# SQLite stores booleans as 0/1; these are returned as Python bools
+BOOLEAN_COLUMNS: Dict[str, Tuple[str, ...]] = {"materials": ("is_active",)}
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# PostgREST accepts ISO timestamps; SQLite's CURRENT_TIMESTAMP stores "YYYY-MM-DD HH:MM:SS"
+ISO_TIMESTAMP = re.compile(r"^(\d{4}-\d{2}-\d{2})T(\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)$")
+OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+@dataclass
+class FakeResponse:
+    data: Any
+    count: Optional[int] = None
+
+
+def _identifier(name: str) -> str:
+    name = name.strip()
+    if not IDENTIFIER.match(name):
+        raise APIError({"message": f"invalid identifier '{name}'", "code": "PGRST100"})
+    return name
+
+
+def _value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, str):
+        match = ISO_TIMESTAMP.match(value)
+        if match:
+            return f"{match.group(1)} {match.group(2)}"
+    return value
+
+
+def _decode_booleans(table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for name in BOOLEAN_COLUMNS.get(table, ()):
+        for row in rows:
+            if row.get(name) is not None:
+                row[name] = bool(row[name])
+    return rows
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas outside parentheses."""
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        depth += (char == "(") - (char == ")")
+        current.append(char)
+    if current:
+        parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+def _parse_select(columns: str) -> Tuple[List[str], Dict[str, str]]:
+    """Return (plain columns, {embedded table: its column list})."""
+    plain, embedded = [], {}
+    for item in _split_top_level(columns or "*"):
+        if "(" in item:
+            table, _, inner = item.partition("(")
+            embedded[_identifier(table)] = inner.rstrip(")")
+        elif item == "*":
+            plain.append("*")
+        else:
+            plain.append(_identifier(item))
+    return plain, embedded
+
+
+class FakeDatabase:
+    """Thread-local SQLite connections plus latency and round-trip accounting."""
+
+    def __init__(self, path: str, latency: float = 0.0):
+        if path == ":memory:":
+            # One shared in-memory database for every thread, kept alive by self._keeper
+            path = f"file:fake-supabase-{uuid.uuid4().hex}?mode=memory&cache=shared"
+        self.path = path
+        self.latency = latency
+        self.rpcs: Dict[str, Callable[..., Any]] = {
+            "count_low_stock": _count_low_stock,
+            "sum_quantity_by_date": _sum_quantity_by_date,
+        }
+        self._local = threading.local()
+        self._columns: Dict[str, List[str]] = {}
+        self._schema_lock = threading.Lock()
+        self._keeper = self.connection()
+        self._keeper.executescript(SCHEMA)
+        self._add_supabase_columns()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, uri=self.path.startswith("file:"), timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def round_trip(self) -> None:
+        """Account for one client/server round-trip on this thread."""
+        self._local.round_trips = getattr(self._local, "round_trips", 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def round_trips(self) -> int:
+        return getattr(self._local, "round_trips", 0)
+
+    def reset_round_trips(self) -> None:
+        self._local.round_trips = 0
+
+    def columns(self, table: str) -> List[str]:
+        if table not in self._columns:
+            rows = self.connection().execute(f"PRAGMA table_info({table})").fetchall()
+            if not rows:
+                raise APIError({"message": f'relation "public.{table}" does not exist', "code": "42P01"})
+            self._columns[table] = [row["name"] for row in rows]
+        return self._columns[table]
+
+    def _add_supabase_columns(self) -> None:
+        with self._schema_lock:
+            for table, columns in SUPABASE_COLUMNS.items():
+                existing = self.columns(table)
+                for name, definition in columns.items():
+                    if name not in existing:
+                        self._keeper.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                        existing.append(name)
+            self._keeper.commit()
+
+    def check_columns(self, table: str, names) -> None:
+        """Reject writes to columns the table does not have, like PostgREST's schema cache."""
+        for name in names:
+            if name not in self.columns(table):
+                raise APIError({
+                    "message": f"Could not find the '{name}' column of '{table}' in the schema cache",
+                    "code": "PGRST204",
+                })
+
+
+def _count_low_stock(db: FakeDatabase) -> int:
+    return db.connection().execute("SELECT COUNT(*) FROM materials WHERE quantity < safe_stock").fetchone()[0]
+
+
+def _sum_quantity_by_date(db: FakeDatabase, p_material_id, p_type, p_date) -> int:
+    row = db.connection().execute(
+        "SELECT COALESCE(SUM(quantity), 0) FROM inventory_records "
+        "WHERE material_id = ? AND type = ? AND date(created_at) = ?",
+        (p_material_id, p_type, p_date),
+    ).fetchone()
+    return row[0]
+
+
+class FakeQuery:
+    """Chainable stand-in for postgrest's request builders."""
+
+    def __init__(self, db: FakeDatabase, table: str):
+        self.db = db
+        self.table = _identifier(table)
+        self.action = "select"
+        self.columns = "*"
+        self.payload: Any = None
+        self.on_conflict = ""
+        self.ignore_duplicates = False
+        self.count_mode: Optional[str] = None
+        self.filters: List[Tuple[str, List[Any]]] = []
+        self.orders: List[str] = []
+        self.limit_count: Optional[int] = None
+        self.offset = 0
+        self.single_mode: Optional[str] = None
+
+    # Actions -----------------------------------------------------------
+    def select(self, *columns: str, count: Optional[str] = None, **_: Any) -> "FakeQuery":
+        self.columns = ", ".join(columns) or "*"
+        self.count_mode = count
+        return self
+
+    def insert(self, json: Any, **_: Any) -> "FakeQuery":
+        self.action, self.payload = "insert", json
+        return self
+
+    def upsert(self, json: Any, on_conflict: str = "", ignore_duplicates: bool = False, **_: Any) -> "FakeQuery":
+        self.action, self.payload = "upsert", json
+        self.on_conflict, self.ignore_duplicates = on_conflict, ignore_duplicates
+        return self
+
+    def update(self, json: Dict[str, Any], **_: Any) -> "FakeQuery":
+        self.action, self.payload = "update", json
+        return self
+
+    def delete(self, **_: Any) -> "FakeQuery":
+        self.action = "delete"
+        return self
+
+    # Filters -----------------------------------------------------------
+    def _compare(self, column: str, operator: str, value: Any) -> "FakeQuery":
+        self.filters.append((f"{_identifier(column)} {operator} ?", [_value(value)]))
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self._compare(column, "=", value)
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self._compare(column, "!=", value)
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._compare(column, ">", value)
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self._compare(column, ">=", value)
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._compare(column, "<", value)
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self._compare(column, "<=", value)
+
+    def like(self, column: str, pattern: str) -> "FakeQuery":
+        self.filters.append((f"{_identifier(column)} LIKE ?", [pattern.replace("*", "%")]))
+        return self
+
+    def ilike(self, column: str, pattern: str) -> "FakeQuery":
+        self.filters.append((f"lower({_identifier(column)}) LIKE lower(?)", [pattern.replace("*", "%")]))
+        return self
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        keyword = {None: "NULL", "null": "NULL", True: "1", "true": "1", False: "0", "false": "0"}[value]
+        self.filters.append((f"{_identifier(column)} IS {keyword}", []))
+        return self
+
+    def in_(self, column: str, values) -> "FakeQuery":
+        values = [_value(value) for value in values]
+        if not values:
+            self.filters.append(("0", []))
+        else:
+            self.filters.append((f"{_identifier(column)} IN ({', '.join('?' * len(values))})", values))
+        return self
+
+    def or_(self, filters: str, **_: Any) -> "FakeQuery":
+        """PostgREST `col.op.value,col.op.value` syntax for the simple operators."""
+        clauses, params = [], []
+        for part in _split_top_level(filters):
+            column, operator, value = part.split(".", 2)
+            column = _identifier(column)
+            if operator in OPERATORS:
+                clauses.append(f"{column} {OPERATORS[operator]} ?")
+            elif operator == "like":
+                clauses.append(f"{column} LIKE ?")
+            elif operator == "ilike":
+                clauses.append(f"lower({column}) LIKE lower(?)")
+            else:
+                raise APIError({"message": f"unsupported or_ operator '{operator}'", "code": "PGRST100"})
+            params.append(_value(value.replace("*", "%") if "like" in operator else value))
+        self.filters.append((f"({' OR '.join(clauses)})", params))
+        return self
+
+    # Modifiers ---------------------------------------------------------
+    def order(self, column: str, desc: bool = False, nullsfirst: Optional[bool] = None, **_: Any) -> "FakeQuery":
+        clause = f"{_identifier(column)} {'DESC' if desc else 'ASC'}"
+        if nullsfirst is not None:
+            clause += " NULLS FIRST" if nullsfirst else " NULLS LAST"
+        self.orders.append(clause)
+        return self
+
+    def limit(self, size: int, **_: Any) -> "FakeQuery":
+        self.limit_count = size
+        return self
+
+    def range(self, start: int, end: int, **_: Any) -> "FakeQuery":
+        self.offset, self.limit_count = start, end - start + 1
+        return self
+
+    def single(self) -> "FakeQuery":
+        self.single_mode = "single"
+        return self
+
+    def maybe_single(self) -> "FakeQuery":
+        self.single_mode = "maybe"
+        return self
+
+    # Execution ---------------------------------------------------------
+    def _where(self) -> Tuple[str, List[Any]]:
+        if not self.filters:
+            return "", []
+        params = [param for _, values in self.filters for param in values]
+        return " WHERE " + " AND ".join(clause for clause, _ in self.filters), params
+
+    def execute(self) -> FakeResponse:
+        self.db.round_trip()
+        self.db.columns(self.table)
+        conn = self.db.connection()
+        try:
+            if self.action == "select":
+                response = self._select(conn)
+            else:
+                response = self._write(conn)
+                _decode_booleans(self.table, response.data)
+        except sqlite3.IntegrityError as exc:
+            conn.rollback()
+            raise APIError({"message": str(exc), "code": "23505" if "UNIQUE" in str(exc) else "23502"}) from exc
+        except sqlite3.OperationalError as exc:
+            conn.rollback()
+            raise APIError({"message": str(exc), "code": "42703"}) from exc
+
+        if self.single_mode:
+            rows = response.data
+            if len(rows) == 1:
+                response.data = rows[0]
+            elif self.single_mode == "maybe" and not rows:
+                response.data = None
+            else:
+                raise APIError({
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "code": "PGRST116",
+                    "details": f"The result contains {len(rows)} rows",
+                })
+        return response
+
+    def _select(self, conn: sqlite3.Connection, key: Optional[str] = None) -> FakeResponse:
+        """Run the select; with `key`, each row also carries that column as `__key`."""
+        plain, embedded = _parse_select(self.columns)
+        where, params = self._where()
+
+        count = None
+        if self.count_mode:
+            count = conn.execute(f"SELECT COUNT(*) FROM {self.table}{where}", params).fetchone()[0]
+        if plain == ["count"] and not embedded:
+            # select('count') is PostgREST's aggregate shorthand
+            total = count if count is not None else conn.execute(
+                f"SELECT COUNT(*) FROM {self.table}{where}", params
+            ).fetchone()[0]
+            return FakeResponse([{"count": total}], count)
+
+        joins = {table: self._relation(table) for table in embedded}
+        extra = {local for local, _ in joins.values()} | ({key} if key else set())
+        selected = "*" if "*" in plain else ", ".join(dict.fromkeys(plain + sorted(extra)))
+        sql = f"SELECT {selected} FROM {self.table}{where}"
+        if self.orders:
+            sql += " ORDER BY " + ", ".join(self.orders)
+        if self.limit_count is not None or self.offset:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [self.limit_count if self.limit_count is not None else -1, self.offset]
+        rows = [dict(row) for row in conn.execute(sql, params)]
+
+        for table, inner in embedded.items():
+            self._embed(conn, rows, table, inner, joins[table])
+        if key:
+            for row in rows:
+                row["__key"] = row[key]
+        if "*" not in plain:
+            wanted = set(plain) | set(embedded) | {"__key"}
+            rows = [{name: value for name, value in row.items() if name in wanted} for row in rows]
+        return FakeResponse(_decode_booleans(self.table, rows), count)
+
+    def _relation(self, table: str) -> Tuple[str, str]:
+        """(local key, kind) for an embedded table, inferred from `<singular>_id` foreign keys."""
+        foreign_key = f"{table.rstrip('s')}_id"
+        if foreign_key in self.db.columns(self.table):
+            return foreign_key, "one"
+        if f"{self.table.rstrip('s')}_id" in self.db.columns(table):
+            return "id", "many"
+        raise APIError({
+            "message": f"Could not find a relationship between '{self.table}' and '{table}'",
+            "code": "PGRST200",
+        })
+
+    def _embed(self, conn, rows: List[Dict], table: str, inner: str, relation: Tuple[str, str]) -> None:
+        """Attach related rows with one batched IN query per 500 keys (PostgREST joins server-side)."""
+        local, kind = relation
+        remote = "id" if kind == "one" else f"{self.table.rstrip('s')}_id"
+        ids = sorted({row[local] for row in rows if row.get(local) is not None})
+        related: Dict[Any, List[Dict]] = {}
+        for start in range(0, len(ids), 500):
+            sub = FakeQuery(self.db, table).select(inner).in_(remote, ids[start:start + 500])
+            for item in sub._select(conn, key=remote).data:
+                related.setdefault(item.pop("__key"), []).append(item)
+        for row in rows:
+            matches = related.get(row.get(local), [])
+            row[table] = (matches[0] if matches else None) if kind == "one" else matches
+
+    def _write(self, conn: sqlite3.Connection) -> FakeResponse:
+        if self.action == "delete":
+            where, params = self._where()
+            rows = [dict(row) for row in conn.execute(f"DELETE FROM {self.table}{where} RETURNING *", params)]
+            conn.commit()
+            return FakeResponse(rows)
+
+        if self.action == "update":
+            payload = {_identifier(key): value for key, value in self.payload.items()}
+            self.db.check_columns(self.table, payload)
+            assignments = [f"{key} = ?" for key in payload]
+            if "updated_at" in self.db.columns(self.table) and "updated_at" not in payload:
+                assignments.append("updated_at = CURRENT_TIMESTAMP")
+            where, params = self._where()
+            rows = [
+                dict(row)
+                for row in conn.execute(
+                    f"UPDATE {self.table} SET {', '.join(assignments)}{where} RETURNING *",
+                    [_value(value) for value in payload.values()] + params,
+                )
+            ]
+            conn.commit()
+            return FakeResponse(rows)
+
+        records = self.payload if isinstance(self.payload, list) else [self.payload]
+        conflict = ", ".join(_identifier(column) for column in (self.on_conflict or "id").split(","))
+        rows = []
+        for record in records:
+            record = {_identifier(key): value for key, value in record.items()}
+            self.db.check_columns(self.table, record)
+            columns = ", ".join(record)
+            sql = f"INSERT INTO {self.table} ({columns}) VALUES ({', '.join('?' * len(record))})"
+            if self.action == "upsert":
+                updates = [f"{key} = excluded.{key}" for key in record if key not in conflict.split(", ")]
+                if self.ignore_duplicates or not updates:
+                    sql += f" ON CONFLICT ({conflict}) DO NOTHING"
+                else:
+                    sql += f" ON CONFLICT ({conflict}) DO UPDATE SET {', '.join(updates)}"
+            rows.extend(dict(row) for row in conn.execute(sql + " RETURNING *", [_value(v) for v in record.values()]))
+        conn.commit()
+        return FakeResponse(rows)
+
+
+class FakeRpc:
+    def __init__(self, db: FakeDatabase, name: str, params: Optional[Dict[str, Any]]):
+        self.db, self.name, self.params = db, name, params or {}
+
+    def execute(self) -> FakeResponse:
+        self.db.round_trip()
+        function = self.db.rpcs.get(self.name)
+        if function is None:
+            raise APIError({"message": f"Could not find the function public.{self.name}", "code": "PGRST202"})
+        return FakeResponse(function(self.db, **self.params))
+
+
+class FakeBucket:
+    """Objects stored as files under <root>/<bucket>/<path>."""
+
+    def __init__(self, db: FakeDatabase, root: Path, bucket: str):
+        self.db = db
+        self.root = root / bucket
+        self.bucket = bucket
+
+    def _path(self, path: str) -> Path:
+        target = (self.root / path.lstrip("/")).resolve()
+        if self.root.resolve() not in target.parents:
+            raise StorageApiError(f"Invalid key: {path}", "InvalidKey", 400)
+        return target
+
+    def _check_bucket(self) -> None:
+        if not self.root.is_dir():
+            raise StorageApiError("Bucket not found", "NoSuchBucket", 404)
+
+    def upload(self, path: str, file, file_options: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        self.db.round_trip()
+        self._check_bucket()
+        target = self._path(path)
+        upsert = str((file_options or {}).get("upsert", "false")).lower() == "true"
+        if target.exists() and not upsert:
+            raise StorageApiError("The resource already exists", "Duplicate", 409)
+        data = file if isinstance(file, bytes) else Path(file).read_bytes()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        return {"path": path, "Key": f"{self.bucket}/{path}"}
+
+    def download(self, path: str, *_: Any, **__: Any) -> bytes:
+        self.db.round_trip()
+        target = self._path(path)
+        if not target.is_file():
+            raise StorageApiError("Object not found", "NoSuchKey", 404)
+        return target.read_bytes()
+
+    def list(self, path: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        self.db.round_trip()
+        self._check_bucket()
+        options = options or {}
+        folder = self._path(path) if path else self.root
+        if not folder.is_dir():
+            return []
+        search = options.get("search", "")
+        entries = []
+        for entry in sorted(folder.iterdir(), key=lambda item: item.name):
+            if search and search not in entry.name:
+                continue
+            if entry.is_dir():
+                entries.append({"name": entry.name, "id": None, "metadata": None})
+                continue
+            stat = entry.stat()
+            entries.append({
+                "name": entry.name,
+                "id": entry.name,
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(stat.st_mtime)),
+                "metadata": {"eTag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"', "size": stat.st_size},
+            })
+        offset = int(options.get("offset", 0))
+        return entries[offset:offset + int(options.get("limit", 100))]
+
+    def remove(self, paths: List[str]) -> List[Dict[str, str]]:
+        self.db.round_trip()
+        removed = []
+        for path in paths:
+            target = self._path(path)
+            if target.is_file():
+                target.unlink()
+                removed.append({"name": path})
+        return removed
+
+    def get_public_url(self, path: str, *_: Any, **__: Any) -> str:
+        return (self.root / path).resolve().as_uri()
+
+
+class FakeStorage:
+    def __init__(self, db: FakeDatabase, root: Path):
+        self.db = db
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self.db, self.root, bucket)
+
+    def create_bucket(self, id: str, name: Optional[str] = None, options: Optional[Dict[str, Any]] = None):
+        self.db.round_trip()
+        bucket = self.root / id
+        if bucket.exists():
+            raise StorageApiError("The resource already exists", "Duplicate", 409)
+        bucket.mkdir(parents=True)
+        return {"name": id}
+
+    def list_buckets(self) -> List[Dict[str, str]]:
+        self.db.round_trip()
+        return [{"id": path.name, "name": path.name} for path in sorted(self.root.iterdir()) if path.is_dir()]
+
+
+class FakeSupabaseClient:
+    """Drop-in for `supabase.Client` backed by a SQLite file and a storage directory."""
+
+    def __init__(self, db_path: str, storage_dir: Optional[str] = None, latency: float = 0.0):
+        self.db = FakeDatabase(db_path, latency)
+        if storage_dir is None:
+            storage_dir = (
+                tempfile.mkdtemp(prefix="fake-supabase-storage-") if db_path == ":memory:" else f"{db_path}.storage"
+            )
+        self.storage = FakeStorage(self.db, Path(storage_dir))
+
+    def table(self, table_name: str) -> FakeQuery:
+        return FakeQuery(self.db, table_name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None, **_: Any) -> FakeRpc:
+        return FakeRpc(self.db, fn, params)
+
+    def register_rpc(self, name: str, function: Callable[..., Any]) -> None:
+        """Add a Postgres function stand-in, called as function(db, **params)."""
+        self.db.rpcs[name] = function
+
+    @property
+    def round_trips(self) -> int:
+        """Round-trips made by the current thread since the last reset."""
+        return self.db.round_trips
+
+    def reset_round_trips(self) -> None:
+        self.db.reset_round_trips()
+
+
+def create_fake_client() -> FakeSupabaseClient:
+    """Build the fake from SUPABASE_FAKE_DB, SUPABASE_FAKE_STORAGE and SUPABASE_FAKE_LATENCY_MS."""
+    return FakeSupabaseClient(
+        os.environ["SUPABASE_FAKE_DB"],
+        storage_dir=os.getenv("SUPABASE_FAKE_STORAGE"),
+        latency=float(os.getenv("SUPABASE_FAKE_LATENCY_MS", "0")) / 1000,
+    )
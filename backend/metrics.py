@@ -0,0 +1,428 @@
+"""
+Request and database metrics | 请求与数据库指标
+
+Timing middleware for the Flask apps plus thin wrappers around the SQLite
+connection (`database.get_db_connection`) and the Supabase client
+(`database_supabase`), exported in Prometheus text format at `/metrics`:
+
+- http_requests_total / http_request_duration_seconds per method and route
+- db_queries_per_request and request_db_queries_total / request_db_rows_total
+  per route, so N+1 patterns show up without reading the code
+- db_query_duration_seconds / db_rows_total per backend and table
+- cache_requests_total per cache and result (hit/miss)
+
+Everything is kept in process memory; with several workers each one reports
+its own counters. During a request, observations are buffered on the request
+thread and merged into the registry once, at teardown. Set METRICS_ENABLED=0
+to skip the wrappers entirely; SQLite statements are then only timed while the
+query_log slow-query log is on (SLOW_QUERY_MS=off removes that too).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    import query_log
+except ImportError:
+    from backend import query_log
+
+ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 7, 10, 15, 20, 30, 50, 100)
+
+TABLE_PATTERN = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+(?:IF\s+NOT\s+EXISTS\s+)?[\"`]?(\w+)", re.IGNORECASE)
+
+_lock = threading.Lock()
+_local = threading.local()
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label tuple."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series: Dict[Tuple, list] = {}
+
+    def observe(self, key: Tuple, value: float) -> None:
+        series = self.series.get(key)
+        if series is None:
+            # [per-bucket counts..., +Inf count, sum]
+            series = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for key, series in sorted(self.series.items()):
+            labels = _labels(self.labels, key)
+            for bound, count in zip(self.buckets, series):
+                yield f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{bound:g}"}} {count}'
+            yield f'{self.name}_bucket{{{labels}{"," if labels else ""}le="+Inf"}} {series[-2]}'
+            yield f"{self.name}_sum{{{labels}}} {series[-1]:.6f}"
+            yield f"{self.name}_count{{{labels}}} {series[-2]}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.series: Dict[Tuple, float] = {}
+
+    def inc(self, key: Tuple, amount: float = 1) -> None:
+        self.series[key] = self.series.get(key, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in sorted(self.series.items()):
+            yield f"{self.name}{{{_labels(self.labels, key)}}} {value:g}"
+
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by method, route and status.", ("method", "route", "status"))
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route"), LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    "db_queries_per_request", "Database round-trips made while serving one request.", ("route",), QUERY_COUNT_BUCKETS
+)
+ROUTE_QUERIES = Counter("request_db_queries_total", "Database round-trips made by requests to a route.", ("route",))
+ROUTE_ROWS = Counter("request_db_rows_total", "Rows transferred from the database for requests to a route.", ("route",))
+QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Database query latency by backend and table.", ("backend", "table"), QUERY_BUCKETS
+)
+QUERY_ROWS = Counter("db_rows_total", "Rows transferred by backend and table.", ("backend", "table"))
+CACHE = Counter("cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+
+METRICS = (REQUESTS, REQUEST_LATENCY, REQUEST_QUERIES, ROUTE_QUERIES, ROUTE_ROWS, QUERY_LATENCY, QUERY_ROWS, CACHE)
+
+
+class _RequestStats:
+    __slots__ = ("start", "queries", "rows", "status", "latencies", "table_rows")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.rows = 0
+        self.status = 500
+        # Buffered per request so the registry lock is taken once, at teardown
+        self.latencies: list = []
+        self.table_rows: Dict[Tuple[str, str], int] = {}
+
+
+def record_query(backend: str, table: str, seconds: float, rows: int = 0) -> None:
+    """Record one database round-trip (and the rows it returned) for the current request."""
+    stats = getattr(_local, "request", None)
+    if stats is None:
+        with _lock:
+            QUERY_LATENCY.observe((backend, table), seconds)
+            if rows:
+                QUERY_ROWS.inc((backend, table), rows)
+        return
+    stats.queries += 1
+    stats.latencies.append(((backend, table), seconds))
+    if rows:
+        stats.rows += rows
+        stats.table_rows[(backend, table)] = stats.table_rows.get((backend, table), 0) + rows
+
+
+def record_rows(backend: str, table: str, rows: int) -> None:
+    """Record rows fetched after the query itself (SQLite cursors stream results)."""
+    if not rows:
+        return
+    stats = getattr(_local, "request", None)
+    if stats is None:
+        with _lock:
+            QUERY_ROWS.inc((backend, table), rows)
+        return
+    stats.rows += rows
+    stats.table_rows[(backend, table)] = stats.table_rows.get((backend, table), 0) + rows
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    with _lock:
+        CACHE.inc((cache, "hit" if hit else "miss"))
+
+
+def render() -> str:
+    with _lock:
+        lines = [line for metric in METRICS for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+def init_app(app) -> None:
+    """Time every request of a Flask app and serve the registry at /metrics."""
+    from flask import Response, request
+
+    if not ENABLED:
+        return
+
+    @app.before_request
+    def _start_request_metrics():
+        _local.request = _RequestStats()
+
+    @app.after_request
+    def _capture_status(response):
+        stats = getattr(_local, "request", None)
+        if stats is not None:
+            stats.status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc=None):
+        stats = getattr(_local, "request", None)
+        if stats is None:
+            return
+        _local.request = None
+        elapsed = time.perf_counter() - stats.start
+        # Label by URL rule, not path, so query strings and 404s cannot explode cardinality
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        with _lock:
+            REQUESTS.inc((request.method, route, str(stats.status)))
+            REQUEST_LATENCY.observe((request.method, route), elapsed)
+            REQUEST_QUERIES.observe((route,), stats.queries)
+            ROUTE_QUERIES.inc((route,), stats.queries)
+            ROUTE_ROWS.inc((route,), stats.rows)
+            for key, seconds in stats.latencies:
+                QUERY_LATENCY.observe(key, seconds)
+            for key, rows in stats.table_rows.items():
+                QUERY_ROWS.inc(key, rows)
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        """Prometheus metrics | Prometheus 指标"""
+        return Response(render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+# SQLite ---------------------------------------------------------------------
+
+@lru_cache(maxsize=1024)
+def _sql_table(sql: str) -> str:
+    match = TABLE_PATTERN.search(sql)
+    return match.group(1) if match else "other"
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that times statements for the registry (when enabled) and the slow-query log."""
+
+    _table = "other"
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._observe(sql, parameters, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin(sql)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._observe(sql, None, time.perf_counter() - start)
+
+    def _begin(self, sql) -> None:
+        if ENABLED:
+            self._table = _sql_table(sql)
+
+    def _observe(self, sql, parameters, elapsed: float) -> None:
+        if ENABLED:
+            record_query("sqlite", self._table, elapsed)
+        if query_log.ENABLED:
+            query_log.observe(self.connection, sql, parameters, elapsed)
+
+
+class InstrumentedCursor(TimedCursor):
+    """TimedCursor that also counts fetched rows.
+
+    Rows are tallied on the cursor and recorded once per statement (on the
+    next execute, close, or when the cursor is collected), so iterating a
+    large result costs one attribute increment per row.
+    """
+
+    _fetched = 0
+
+    def _begin(self, sql) -> None:
+        self._flush_rows()
+        self._table = _sql_table(sql)
+
+    def _flush_rows(self) -> None:
+        if self._fetched:
+            rows, self._fetched = self._fetched, 0
+            record_rows("sqlite", self._table, rows)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self._fetched += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._fetched += len(rows)
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        self._fetched += 1
+        return row
+
+    def close(self):
+        self._flush_rows()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._flush_rows()
+        except Exception:  # noqa: BLE001 - never raise from a finalizer
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """`sqlite3.connect(..., factory=InstrumentedConnection)` for instrumented cursors.
+
+    Cursors count rows only while metrics are enabled; otherwise they just
+    time statements for the slow-query log.
+    """
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = InstrumentedCursor if ENABLED else TimedCursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# Supabase -------------------------------------------------------------------
+
+def _row_count(data: Any) -> int:
+    if isinstance(data, list):
+        return len(data)
+    return 0 if data is None else 1
+
+
+class _InstrumentedQuery:
+    """Wraps a postgrest request builder; every chained builder stays wrapped."""
+
+    __slots__ = ("_builder", "_table")
+
+    def __init__(self, builder, table: str):
+        self._builder = builder
+        self._table = table
+
+    def execute(self):
+        start = time.perf_counter()
+        rows = 0
+        try:
+            response = self._builder.execute()
+            rows = _row_count(getattr(response, "data", None))
+            return response
+        finally:
+            record_query("supabase", self._table, time.perf_counter() - start, rows)
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return _InstrumentedQuery(result, self._table) if hasattr(result, "execute") else result
+
+        return chained
+
+
+class _InstrumentedBucket:
+    __slots__ = ("_bucket", "_name")
+
+    def __init__(self, bucket, name: str):
+        self._bucket = bucket
+        self._name = name
+
+    def __getattr__(self, name):
+        attr = getattr(self._bucket, name)
+        if name not in ("upload", "download", "list", "remove", "update"):
+            return attr
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = None
+            try:
+                result = attr(*args, **kwargs)
+                return result
+            finally:
+                rows = len(result) if isinstance(result, list) else (1 if result is not None else 0)
+                record_query("storage", self._name, time.perf_counter() - start, rows)
+
+        return timed
+
+
+class _InstrumentedStorage:
+    __slots__ = ("_storage",)
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    def from_(self, bucket: str):
+        return _InstrumentedBucket(self._storage.from_(bucket), bucket)
+
+    def __getattr__(self, name):
+        return getattr(self._storage, name)
+
+
+class InstrumentedSupabase:
+    """Proxy for a Supabase client that records every query, RPC and storage call."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, table_name: str) -> _InstrumentedQuery:
+        return _InstrumentedQuery(self._client.table(table_name), table_name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> _InstrumentedQuery:
+        return _InstrumentedQuery(self._client.rpc(fn, params, **kwargs), f"rpc:{fn}")
+
+    @property
+    def storage(self) -> _InstrumentedStorage:
+        return _InstrumentedStorage(self._client.storage)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def instrument_supabase(client):
+    return InstrumentedSupabase(client) if ENABLED else client
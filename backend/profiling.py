@@ -0,0 +1,304 @@
+"""
+On-demand request profiler | 按需请求性能剖析
+
+Opt-in profiling for live requests, off unless PROFILING_TOKEN is set (no
+hooks are registered at all without it). With the token, either:
+
+- send one request with `X-Profile: <token>` (and optionally
+  `X-Profile-Mode: cprofile`) to profile just that request, or
+- arm the next N requests of a route:
+  `POST /admin/profiling {"route": "/api/wms/materials/product-stats", "count": 5}`
+  with `Authorization: Bearer <token>`.
+
+Two modes: `sample` (the default; a side thread samples the request thread's
+stack every PROFILING_INTERVAL_MS and saves collapsed stacks for
+flamegraph.pl / speedscope) and `cprofile` (deterministic, saved as `.pstats`
+for `python -m pstats` / snakeviz). On Python 3.12+ cProfile hooks
+sys.monitoring, which is interpreter-wide, so a `cprofile` profile records
+every thread for the duration of the request, including concurrent requests;
+it is stored with `"scope": "process"`. Profiles are listed at `GET /admin/profiling`
+and downloaded from `GET /admin/profiling/<id>/<pstats|collapsed|json>`;
+`GET /admin/profiling/queries` returns the SQLite statement summary from
+query_log.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import hmac
+import json
+import marshal
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import query_log
+
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+)
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+SAMPLE_INTERVAL = float(os.getenv("PROFILING_INTERVAL_MS", "5")) / 1000
+MAX_ARMED_REQUESTS = 100
+MODES = ("sample", "cprofile")
+DEFAULT_MODE = "sample"
+FORMATS = {"pstats": ".pstats", "collapsed": ".collapsed", "json": ".json"}
+
+_PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+
+_lock = threading.Lock()
+# Only one cProfile can be active per interpreter
+_cprofile_lock = threading.Lock()
+_armed: Dict[str, Dict] = {}
+_local = threading.local()
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> str:
+        self._stop_event.set()
+        self.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _authorized(request, bearer: bool = False) -> bool:
+    """Check the token in `X-Profile`, or in `Authorization: Bearer` if `bearer`.
+
+    Only the admin endpoints accept the bearer form: profiled API requests
+    carry their own user `Authorization` header.
+    """
+    supplied = request.headers.get("X-Profile") or ""
+    auth = request.headers.get("Authorization", "")
+    if bearer and auth.startswith("Bearer "):
+        supplied = auth[len("Bearer "):]
+    return bool(PROFILING_TOKEN) and hmac.compare_digest(supplied, PROFILING_TOKEN)
+
+
+def _armed_mode(route: str) -> Optional[str]:
+    """Mode armed for this route, without consuming a request."""
+    with _lock:
+        entry = _armed.get(route)
+        return entry["mode"] if entry is not None else None
+
+
+def _take_armed(route: str) -> Optional[str]:
+    """Consume one armed request for this route; returns its mode."""
+    with _lock:
+        entry = _armed.get(route)
+        if entry is None:
+            return None
+        entry["remaining"] -= 1
+        if entry["remaining"] <= 0:
+            del _armed[route]
+        return entry["mode"]
+
+
+def _start_profiler(mode: str):
+    """Start a profiler for the current thread, or return None if it cannot run now."""
+    if mode == "cprofile":
+        if not _cprofile_lock.acquire(blocking=False):
+            return None  # another request is being profiled; skip this one
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiling tool (debugger, coverage) owns the hook
+            _cprofile_lock.release()
+            return None
+        return profiler
+    profiler = StackSampler(threading.get_ident(), SAMPLE_INTERVAL)
+    profiler.start()
+    return profiler
+
+
+def _stop_profiler(mode: str, profiler) -> None:
+    if mode == "cprofile":
+        profiler.disable()
+        _cprofile_lock.release()
+    else:
+        profiler.stop()
+
+
+def _save(meta: Dict, payloads: Dict[str, bytes]) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    for extension, data in payloads.items():
+        with open(os.path.join(PROFILE_DIR, meta["id"] + extension), "wb") as handle:
+            handle.write(data)
+    with open(os.path.join(PROFILE_DIR, meta["id"] + ".json"), "w", encoding="utf-8") as handle:
+        json.dump(meta, handle, ensure_ascii=False)
+    _prune()
+
+
+def _prune() -> None:
+    metas = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith(".json"))
+    for name in metas[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else []:
+        profile_id = name[:-len(".json")]
+        for extension in FORMATS.values():
+            try:
+                os.remove(os.path.join(PROFILE_DIR, profile_id + extension))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> List[Dict]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if name.endswith(".json"):
+            with open(os.path.join(PROFILE_DIR, name), encoding="utf-8") as handle:
+                profiles.append(json.load(handle))
+    return profiles
+
+
+def init_app(app) -> None:
+    """Register profiling hooks and admin endpoints when PROFILING_TOKEN is set."""
+    from flask import abort, jsonify, request, send_file
+
+    if not PROFILING_TOKEN:
+        return
+
+    @app.before_request
+    def _start_profile():
+        # Fast path: nothing armed and no per-request header
+        if not _armed and "X-Profile" not in request.headers:
+            return None
+        if request.path.startswith("/admin/profiling"):
+            return None
+
+        route = request.url_rule.rule if request.url_rule is not None else request.path
+        armed = "X-Profile" not in request.headers
+        if armed:
+            mode = _armed_mode(route)
+        else:
+            if not _authorized(request):
+                return None
+            mode = request.headers.get("X-Profile-Mode", DEFAULT_MODE)
+        if mode not in MODES:
+            return None
+
+        profiler = _start_profiler(mode)
+        if profiler is None:
+            return None
+        # An armed request is only used up once its profiler is actually running
+        if armed and _take_armed(route) is None:
+            _stop_profiler(mode, profiler)  # another request took the last one
+            return None
+        _local.profile = (mode, profiler, route, time.perf_counter())
+        return None
+
+    @app.after_request
+    def _finish_profile(response):
+        active = getattr(_local, "profile", None)
+        if active is None:
+            return response
+        _local.profile = None
+        mode, profiler, route, start = active
+        elapsed = time.perf_counter() - start
+
+        if mode == "cprofile":
+            profiler.disable()
+            _cprofile_lock.release()
+            profiler.create_stats()
+            # Same marshal format as Profile.dump_stats, loadable with pstats.Stats(path)
+            payloads = {".pstats": marshal.dumps(profiler.stats)}
+        else:
+            payloads = {".collapsed": profiler.stop().encode("utf-8")}
+
+        profile_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        _save({
+            "id": profile_id,
+            "mode": mode,
+            "route": route,
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "status": response.status_code,
+            "duration_ms": round(elapsed * 1000, 2),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "format": "pstats" if mode == "cprofile" else "collapsed",
+            # cProfile sees every thread on 3.12+ (sys.monitoring); the sampler only this one
+            "scope": "process" if mode == "cprofile" else "request",
+        }, payloads)
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    @app.teardown_request
+    def _abandon_profile(exc=None):
+        # after_request is skipped on unhandled errors; never leave a profiler running
+        active = getattr(_local, "profile", None)
+        if active is None:
+            return
+        _local.profile = None
+        _stop_profiler(active[0], active[1])
+
+    @app.route("/admin/profiling", methods=["GET", "POST"])
+    def profiling_admin():
+        """列出/启用性能剖析 | List profiles or arm the next N requests of a route"""
+        if not _authorized(request, bearer=True):
+            abort(401)
+        if request.method == "GET":
+            with _lock:
+                armed = [{"route": route, **entry} for route, entry in _armed.items()]
+            return jsonify({"armed": armed, "profiles": list_profiles()})
+
+        data = request.get_json(silent=True) or {}
+        route = data.get("route")
+        mode = data.get("mode", DEFAULT_MODE)
+        try:
+            count = int(data.get("count", 1))
+        except (TypeError, ValueError):
+            return jsonify({"error": "count must be an integer"}), 400
+        if not route or mode not in MODES:
+            return jsonify({"error": f"route and mode ({', '.join(MODES)}) are required"}), 400
+        count = max(0, min(count, MAX_ARMED_REQUESTS))
+        with _lock:
+            if count:
+                _armed[route] = {"mode": mode, "remaining": count}
+            else:
+                _armed.pop(route, None)
+        return jsonify({"route": route, "mode": mode, "remaining": count})
+
+    @app.route("/admin/profiling/queries", methods=["GET"])
+    def profiling_queries():
+        """SQLite 语句汇总 | SQLite statements aggregated by normalized text"""
+        if not _authorized(request, bearer=True):
+            abort(401)
+        return jsonify(query_log.summary(request.args.get("limit", type=int)))
+
+    @app.route("/admin/profiling/<profile_id>/<fmt>", methods=["GET"])
+    def profiling_download(profile_id, fmt):
+        """下载剖析结果 | Download a stored profile"""
+        if not _authorized(request, bearer=True):
+            abort(401)
+        if fmt not in FORMATS or not _PROFILE_ID_PATTERN.match(profile_id):
+            abort(404)
+        path = os.path.join(PROFILE_DIR, profile_id + FORMATS[fmt])
+        if not os.path.exists(path):
+            abort(404)
+        return send_file(path, as_attachment=fmt != "json", download_name=profile_id + FORMATS[fmt])
@@ -0,0 +1,140 @@
+"""
+SQLite slow-query log | SQLite 慢查询日志
+
+Fed by the instrumented cursor in metrics.py, so it covers every connection
+from `database.get_db_connection` (app.py and mcp/warehouse_mcp.py):
+
+- every statement is aggregated by its normalized text (literals replaced by
+  `?`, IN lists collapsed) with count, total, mean and max time
+- statements slower than SLOW_QUERY_MS are logged to the `slow_query` logger
+  with their parameters, duration and `EXPLAIN QUERY PLAN`; plans containing
+  a `SCAN` (full table scan) are flagged
+- SLOW_QUERY_LOG_FILE additionally appends each slow statement as JSON lines
+
+Timing covers `execute()`, which is where SQLite does the work for
+aggregates, sorts and the first row; rows streamed afterwards are not timed.
+SLOW_QUERY_MS=0 logs every statement, SLOW_QUERY_MS=off disables the log.
+Logging goes to stderr, never stdout, because the MCP server speaks on stdout.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+_threshold = os.getenv("SLOW_QUERY_MS", "100").strip().lower()
+ENABLED = _threshold not in ("off", "false", "no", "")
+SLOW_QUERY_SECONDS = float(_threshold) / 1000 if ENABLED else 0.0
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE")
+MAX_PARAMS_LENGTH = 200
+
+logger = logging.getLogger("slow_query")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+_lock = threading.Lock()
+_statements: Dict[str, Dict[str, Any]] = {}
+
+
+@lru_cache(maxsize=1024)
+def normalize(sql: str) -> str:
+    """Collapse whitespace and replace literals so equivalent statements aggregate together."""
+    text = _STRING_LITERAL.sub("?", sql)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _IN_LIST.sub("IN (...)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _explain(conn: sqlite3.Connection, sql: str, parameters) -> List[str]:
+    # A plain cursor, so the EXPLAIN itself is neither timed nor logged
+    try:
+        cursor = sqlite3.Connection.cursor(conn)
+        rows = cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        cursor.close()
+    except sqlite3.Error as exc:
+        return [f"(plan unavailable: {exc})"]
+    return [row[3] for row in rows]
+
+
+def observe(conn: sqlite3.Connection, sql: str, parameters, seconds: float) -> None:
+    """Aggregate one executed statement and log it if it crossed the threshold."""
+    statement = normalize(sql)
+    slow = seconds >= SLOW_QUERY_SECONDS
+    with _lock:
+        entry = _statements.get(statement)
+        if entry is None:
+            entry = _statements[statement] = {"count": 0, "total": 0.0, "max": 0.0, "slow": 0, "plan": None}
+        entry["count"] += 1
+        entry["total"] += seconds
+        entry["max"] = max(entry["max"], seconds)
+        if slow:
+            entry["slow"] += 1
+        plan = entry["plan"]
+    if not slow:
+        return
+
+    if plan is None and parameters is not None:
+        # Plans rarely change for the same statement; capture once
+        plan = _explain(conn, sql, parameters)
+        with _lock:
+            entry["plan"] = plan
+    full_scan = any(step.startswith("SCAN") for step in plan or [])
+    params = repr(parameters)
+    if len(params) > MAX_PARAMS_LENGTH:
+        params = params[:MAX_PARAMS_LENGTH] + "..."
+
+    logger.warning(
+        "slow query %.1f ms%s: %s | params=%s | plan=%s",
+        seconds * 1000,
+        " (⚠️ full scan)" if full_scan else "",
+        statement,
+        params,
+        "; ".join(plan or []),
+    )
+    if SLOW_QUERY_LOG_FILE:
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+            "statement": statement,
+            "sql": sql,
+            "params": params,
+            "duration_ms": round(seconds * 1000, 3),
+            "plan": plan,
+            "full_scan": full_scan,
+        }
+        with _lock, open(SLOW_QUERY_LOG_FILE, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def summary(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Aggregated statements, most total time first."""
+    with _lock:
+        items = [(statement, dict(entry)) for statement, entry in _statements.items()]
+    items.sort(key=lambda item: item[1]["total"], reverse=True)
+    return [
+        {
+            "statement": statement,
+            "count": entry["count"],
+            "total_ms": round(entry["total"] * 1000, 3),
+            "mean_ms": round(entry["total"] / entry["count"] * 1000, 3),
+            "max_ms": round(entry["max"] * 1000, 3),
+            "slow_count": entry["slow"],
+            "plan": entry["plan"],
+            "full_scan": any(step.startswith("SCAN") for step in entry["plan"] or []),
+        }
+        for statement, entry in items[:limit]
+    ]
+
+
+def reset() -> None:
+    with _lock:
+        _statements.clear()
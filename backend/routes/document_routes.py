@@ -3,7 +3,7 @@ WMS Document Generation Routes
 Generate and download various warehouse documents
 """
 
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, Response, jsonify, request, send_file
 from datetime import datetime, timedelta
 from io import BytesIO
 import sys
@@ -28,10 +28,17 @@ from services.fulfillment_documents import (
     ShippingLabelDocument,
     BillOfLadingDocument
 )
-from database_supabase import get_supabase_client
+from services.label_printing import (
+    LABEL_FORMATS,
+    ShippingLabelRenderer,
+    LotLabelRenderer,
+    PickTicketRenderer
+)
+from services.document_store import save_document, load_document, get_document_metadata
+from services.signature_service import stamp_signature, sign_pdfs
+from document_data import get_document_materials, first_lot
 
 document_bp = Blueprint('documents', __name__, url_prefix='/api/documents')
-supabase = get_supabase_client()
 
 
 # Handle OPTIONS requests for CORS preflight
@@ -41,6 +48,36 @@ def handle_options(path):
     return '', 204
 
 
+def _pdf_response(pdf_bytes, doc_type, download_name, parent_id=None):
+    """Store a rendered PDF and send it with its document id in X-Document-Id"""
+    document_id = save_document(pdf_bytes, doc_type, parent_id=parent_id)
+    response = send_file(
+        BytesIO(pdf_bytes),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=download_name
+    )
+    response.headers['X-Document-Id'] = document_id
+    return response
+
+
+def _label_format(default, allowed=LABEL_FORMATS):
+    """Read and validate ?format= for label routes; returns (format, error response)"""
+    label_format = request.args.get('format', default).lower()
+    if label_format not in allowed:
+        return None, (jsonify({'error': f'Unsupported label format: {label_format} (use {", ".join(allowed)})'}), 400)
+    return label_format, None
+
+
+def _label_response(payload, fmt, download_name):
+    """Send raw ZPL/EPL printer commands as a downloadable text file"""
+    return Response(
+        payload,
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename={download_name}.{fmt}'}
+    )
+
+
 # ============= RECEIVING DOCUMENTS =============
 
 @document_bp.route('/receiving/po-receipt', methods=['POST', 'GET'])
@@ -49,16 +86,16 @@ def generate_po_receipt():
     try:
         if request.method == 'GET':
             # Generate sample data from Supabase
-            response = supabase.table('materials').select('*').limit(5).execute()
             items = []
-            for material in response.data:
+            for material in get_document_materials('po-receipt'):
+                lot = first_lot(material) or {}
                 items.append({
                     'sku': material['sku'],
                     'name': material['name'],
                     'ordered_qty': 100,
                     'received_qty': 100,
-                    'lot_number': f'LOT-{datetime.now().strftime("%Y%m%d")}',
-                    'expiration_date': (datetime.now().replace(day=1) + timedelta(days=90)).strftime('%Y-%m-%d'),
+                    'lot_number': lot.get('lot_number') or f'LOT-{datetime.now().strftime("%Y%m%d")}',
+                    'expiration_date': lot.get('expiration_date') or (datetime.now().replace(day=1) + timedelta(days=90)).strftime('%Y-%m-%d'),
                     'condition': 'Good'
                 })
             
@@ -89,12 +126,7 @@ def generate_po_receipt():
         pdf_bytes = doc_generator.generate_pdf(data)
 
         # Return PDF file
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"PO_Receipt_{data['po_number']}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        )
+        return _pdf_response(pdf_bytes, 'po-receipt', f"PO_Receipt_{data['po_number']}_{datetime.now().strftime('%Y%m%d')}.pdf")
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -106,9 +138,8 @@ def generate_receiving_report():
     try:
         if request.method == 'GET':
             # Generate sample data
-            response = supabase.table('materials').select('*').limit(10).execute()
             receipts = []
-            for i, material in enumerate(response.data):
+            for i, material in enumerate(get_document_materials('receiving-report')):
                 receipts.append({
                     'po_number': f'PO-{i+1:04d}',
                     'vendor': f'Vendor {i+1}',
@@ -139,12 +170,7 @@ def generate_receiving_report():
         )
         pdf_bytes = doc_generator.generate_pdf(data)
 
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"Receiving_Report_{datetime.now().strftime('%Y%m%d')}.pdf"
-        )
+        return _pdf_response(pdf_bytes, 'receiving-report', f"Receiving_Report_{datetime.now().strftime('%Y%m%d')}.pdf")
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -156,13 +182,13 @@ def generate_putaway_report():
     try:
         if request.method == 'GET':
             # Generate sample data
-            response = supabase.table('materials').select('*').limit(8).execute()
             items = []
-            for material in response.data:
+            for material in get_document_materials('putaway-report'):
+                lot = first_lot(material) or {}
                 items.append({
                     'sku': material['sku'],
                     'name': material['name'],
-                    'lot_number': f'LOT-{datetime.now().strftime("%Y%m%d")}',
+                    'lot_number': lot.get('lot_number') or f'LOT-{datetime.now().strftime("%Y%m%d")}',
                     'quantity': material['quantity'],
                     'from_location': 'Receiving',
                     'to_location': material['location'],
@@ -184,12 +210,7 @@ def generate_putaway_report():
         )
         pdf_bytes = doc_generator.generate_pdf(data)
 
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"Putaway_Report_{data['report_id']}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        )
+        return _pdf_response(pdf_bytes, 'putaway-report', f"Putaway_Report_{data['report_id']}_{datetime.now().strftime('%Y%m%d')}.pdf")
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -203,13 +224,8 @@ def generate_inventory_report():
     try:
         if request.method == 'GET':
             # Fetch all materials from database
-            response = supabase.table('materials')\
-                .select('id, name, sku, category, quantity, unit, location')\
-                .order('name')\
-                .execute()
-
             items = []
-            for material in response.data:
+            for material in get_document_materials('inventory-report'):
                 items.append({
                     'sku': material['sku'],
                     'name': material['name'],
@@ -236,12 +252,7 @@ def generate_inventory_report():
         )
         pdf_bytes = doc_generator.generate_pdf(data)
 
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"Inventory_Report_{datetime.now().strftime('%Y%m%d')}.pdf"
-        )
+        return _pdf_response(pdf_bytes, 'inventory-report', f"Inventory_Report_{datetime.now().strftime('%Y%m%d')}.pdf")
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -253,13 +264,8 @@ def generate_stock_status():
     try:
         if request.method == 'GET':
             # Fetch materials with stock levels
-            response = supabase.table('materials')\
-                .select('id, name, sku, quantity, safe_stock')\
-                .order('name')\
-                .execute()
-
             items = []
-            for material in response.data:
+            for material in get_document_materials('stock-status'):
                 qty = material['quantity']
                 safe = material['safe_stock']
 
@@ -292,12 +298,7 @@ def generate_stock_status():
         )
         pdf_bytes = doc_generator.generate_pdf(data)
 
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"Stock_Status_{datetime.now().strftime('%Y%m%d')}.pdf"
-        )
+        return _pdf_response(pdf_bytes, 'stock-status', f"Stock_Status_{datetime.now().strftime('%Y%m%d')}.pdf")
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -309,10 +310,9 @@ def generate_cycle_count():
     try:
         if request.method == 'GET':
             # Generate sample data
-            response = supabase.table('materials').select('*').limit(10).execute()
             items = []
             variances = 0
-            for material in response.data:
+            for material in get_document_materials('cycle-count'):
                 system_qty = material['quantity']
                 # Simulate some variances
                 counted_qty = system_qty + (1 if len(items) % 3 == 0 else 0)
@@ -363,12 +363,7 @@ def generate_cycle_count():
         )
         pdf_bytes = doc_generator.generate_pdf(data)
 
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"Cycle_Count_{data['count_id']}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        )
+        return _pdf_response(pdf_bytes, 'cycle-count', f"Cycle_Count_{data['count_id']}_{datetime.now().strftime('%Y%m%d')}.pdf")
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -382,15 +377,18 @@ def generate_pick_list():
     try:
         if request.method == 'GET':
             # Generate sample data
-            response = supabase.table('materials').select('*').limit(6).execute()
             items = []
-            for material in response.data:
-                items.append({
+            for material in get_document_materials('pick-list'):
+                item = {
                     'sku': material['sku'],
                     'name': material['name'],
                     'quantity': min(material['quantity'], 10),
                     'location': material['location']
-                })
+                }
+                lot = first_lot(material)
+                if lot:
+                    item['lot_number'] = lot['lot_number']
+                items.append(item)
             
             data = {
                 'order_number': f'ORD-{datetime.now().strftime("%Y%m%d-%H%M")}',
@@ -408,12 +406,7 @@ def generate_pick_list():
         )
         pdf_bytes = doc_generator.generate_pdf(data)
 
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"Pick_List_{data['order_number']}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        )
+        return _pdf_response(pdf_bytes, 'pick-list', f"Pick_List_{data['order_number']}_{datetime.now().strftime('%Y%m%d')}.pdf")
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -425,14 +418,17 @@ def generate_packing_slip():
     try:
         if request.method == 'GET':
             # Generate sample data
-            response = supabase.table('materials').select('*').limit(5).execute()
             items = []
-            for material in response.data:
-                items.append({
+            for material in get_document_materials('packing-slip'):
+                item = {
                     'sku': material['sku'],
                     'name': material['name'],
                     'quantity': min(material['quantity'], 5)
-                })
+                }
+                lot = first_lot(material)
+                if lot:
+                    item['lot_number'] = lot['lot_number']
+                items.append(item)
             
             data = {
                 'order_number': f'ORD-{datetime.now().strftime("%Y%m%d-%H%M")}',
@@ -458,12 +454,7 @@ def generate_packing_slip():
         )
         pdf_bytes = doc_generator.generate_pdf(data)
 
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"Packing_Slip_{data['order_number']}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        )
+        return _pdf_response(pdf_bytes, 'packing-slip', f"Packing_Slip_{data['order_number']}_{datetime.now().strftime('%Y%m%d')}.pdf")
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -473,6 +464,11 @@ def generate_packing_slip():
 def generate_shipping_label():
     """Generate Shipping Label"""
     try:
+        # Raw thermal printer output (?format=zpl|epl) skips PDF layout entirely
+        label_format, error = _label_format('pdf', ('pdf',) + LABEL_FORMATS)
+        if error:
+            return error
+
         if request.method == 'GET':
             # Generate sample data
             data = {
@@ -502,17 +498,16 @@ def generate_shipping_label():
         else:
             data = request.json
 
+        if label_format in LABEL_FORMATS:
+            payload = ShippingLabelRenderer().render(data, label_format)
+            return _label_response(payload, label_format, f"Shipping_Label_{data.get('tracking_number', 'LABEL')}")
+
         doc_generator = ShippingLabelDocument(
             company_name=data.get('company_name', 'Xin Yi WMS')
         )
         pdf_bytes = doc_generator.generate_pdf(data)
 
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"Shipping_Label_{data.get('tracking_number', 'LABEL')}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        )
+        return _pdf_response(pdf_bytes, 'shipping-label', f"Shipping_Label_{data.get('tracking_number', 'LABEL')}_{datetime.now().strftime('%Y%m%d')}.pdf")
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -524,9 +519,8 @@ def generate_bill_of_lading():
     try:
         if request.method == 'GET':
             # Generate sample data
-            response = supabase.table('materials').select('*').limit(3).execute()
             items = []
-            for material in response.data:
+            for material in get_document_materials('bill-of-lading'):
                 items.append({
                     'description': material['name'],
                     'quantity': min(material['quantity'], 20),
@@ -562,12 +556,50 @@ def generate_bill_of_lading():
         )
         pdf_bytes = doc_generator.generate_pdf(data)
 
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"BOL_{data['bol_number']}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        )
+        return _pdf_response(pdf_bytes, 'bill-of-lading', f"BOL_{data['bol_number']}_{datetime.now().strftime('%Y%m%d')}.pdf")
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# ============= THERMAL LABELS (ZPL / EPL) =============
+
+@document_bp.route('/labels/lot', methods=['POST'])
+def generate_lot_labels():
+    """Generate raw ZPL/EPL lot labels"""
+    try:
+        label_format, error = _label_format('zpl')
+        if error:
+            return error
+
+        data = request.json or {}
+
+        labels = data.get('labels') or []
+        if not labels:
+            return jsonify({'error': 'Missing labels'}), 400
+
+        payload = LotLabelRenderer().render_batch(labels, label_format)
+        return _label_response(payload, label_format, f"Lot_Labels_{datetime.now().strftime('%Y%m%d%H%M%S')}")
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@document_bp.route('/fulfillment/pick-tickets', methods=['POST'])
+def generate_pick_tickets():
+    """Generate raw ZPL/EPL pick tickets (one label per pick list line)"""
+    try:
+        label_format, error = _label_format('zpl')
+        if error:
+            return error
+
+        data = request.json or {}
+
+        if not data.get('order_number') or not data.get('items'):
+            return jsonify({'error': 'Missing required fields'}), 400
+
+        payload = PickTicketRenderer().render_pick_list(data, label_format)
+        return _label_response(payload, label_format, f"Pick_Tickets_{data['order_number']}")
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -635,9 +667,21 @@ def get_available_documents():
             {
                 'type': 'shipping_label',
                 'name': 'Shipping Label',
-                'description': 'Address label for shipment',
+                'description': 'Address label for shipment (add ?format=zpl or ?format=epl for thermal printers)',
                 'endpoint': '/api/documents/fulfillment/shipping-label'
             },
+            {
+                'type': 'pick_tickets',
+                'name': 'Pick Tickets',
+                'description': 'ZPL/EPL label per pick list line (?format=zpl or ?format=epl)',
+                'endpoint': '/api/documents/fulfillment/pick-tickets'
+            },
+            {
+                'type': 'lot_labels',
+                'name': 'Lot Labels',
+                'description': 'ZPL/EPL labels for received lots (?format=zpl or ?format=epl)',
+                'endpoint': '/api/documents/labels/lot'
+            },
             {
                 'type': 'bill_of_lading',
                 'name': 'Bill of Lading',
@@ -652,8 +696,6 @@ def get_available_documents():
 
 # ============= SIGNATURE ENDPOINTS =============
 
-from services.signature_service import add_signature_to_pdf
-
 def get_sample_document_data(doc_type):
     """Get sample data for document generation"""
     now = datetime.now()
@@ -679,250 +721,174 @@ def get_sample_document_data(doc_type):
         }
     return {}
 
+
+def _sign_document(doc_type, generator_class, download_prefix):
+    """
+    Sign a document and return the signed PDF
+
+    When the request carries a `document_id` (from the X-Document-Id header
+    of a generate call) the stored bytes are stamped directly, so the signed
+    PDF is exactly what the user viewed. Without one, a sample document is
+    generated as before.
+    """
+    data = request.json or {}
+    signature_data = data.get('signature')
+    signer_name = data.get('signer_name')
+
+    if not signature_data or not signer_name:
+        return jsonify({'error': 'Signature and signer name required'}), 400
+
+    document_id = data.get('document_id')
+    if document_id is not None and not isinstance(document_id, str):
+        return jsonify({'error': 'document_id must be a string'}), 400
+    if document_id:
+        pdf_bytes = load_document(document_id, doc_type)
+        if pdf_bytes is None:
+            return jsonify({'error': f'Document {document_id} not found for {doc_type}'}), 404
+    else:
+        pdf_bytes = generator_class().generate_pdf(get_sample_document_data(doc_type))
+
+    signed_pdf = stamp_signature(pdf_bytes, signature_data, signer_name)
+
+    return _pdf_response(
+        signed_pdf,
+        doc_type,
+        f'{download_prefix}_signed_{datetime.now().strftime("%Y%m%d")}.pdf',
+        parent_id=document_id
+    )
+
+
 @document_bp.route('/receiving/po-receipt/sign', methods=['POST'])
 def sign_po_receipt():
-    """Generate and sign PO Receipt"""
+    """Sign PO Receipt (stored document or freshly generated)"""
     try:
-        data = request.json
-        print(f"Received sign request: {data.keys() if data else 'No data'}")
-        
-        signature_data = data.get('signature')
-        signer_name = data.get('signer_name')
-        
-        print(f"Signature data length: {len(signature_data) if signature_data else 0}")
-        print(f"Signer name: {signer_name}")
-        
-        if not signature_data or not signer_name:
-            return jsonify({'error': 'Signature and signer name required'}), 400
-        
-        # Generate original PDF with sample data
-        print("Generating original PDF...")
-        doc = POReceiptDocument()
-        sample_data = get_sample_document_data('po-receipt')
-        pdf_bytes = doc.generate_pdf(sample_data)
-        print(f"PDF generated, size: {len(pdf_bytes)} bytes")
-        
-        # Add signature
-        print("Adding signature to PDF...")
-        signed_pdf = add_signature_to_pdf(pdf_bytes, signature_data, signer_name)
-        print(f"Signed PDF created, size: {len(signed_pdf)} bytes")
-        
-        return send_file(
-            BytesIO(signed_pdf),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'po_receipt_signed_{datetime.now().strftime("%Y%m%d")}.pdf'
-        )
+        return _sign_document('po-receipt', POReceiptDocument, 'po_receipt')
     except Exception as e:
-        import traceback
-        print(f"Error in sign_po_receipt: {e}")
-        print(f"Traceback: {traceback.format_exc()}")
         return jsonify({'error': str(e)}), 500
 
 
 @document_bp.route('/receiving/receiving-report/sign', methods=['POST'])
 def sign_receiving_report():
-    """Generate and sign Receiving Report"""
+    """Sign Receiving Report (stored document or freshly generated)"""
     try:
-        data = request.json
-        signature_data = data.get('signature')
-        signer_name = data.get('signer_name')
-        
-        if not signature_data or not signer_name:
-            return jsonify({'error': 'Signature and signer name required'}), 400
-        
-        doc = ReceivingReportDocument()
-        sample_data = get_sample_document_data('receiving-report')
-        pdf_bytes = doc.generate_pdf(sample_data)
-        signed_pdf = add_signature_to_pdf(pdf_bytes, signature_data, signer_name)
-        
-        return send_file(
-            BytesIO(signed_pdf),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'receiving_report_signed_{datetime.now().strftime("%Y%m%d")}.pdf'
-        )
+        return _sign_document('receiving-report', ReceivingReportDocument, 'receiving_report')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @document_bp.route('/receiving/putaway-report/sign', methods=['POST'])
 def sign_putaway_report():
-    """Generate and sign Putaway Report"""
+    """Sign Putaway Report (stored document or freshly generated)"""
     try:
-        data = request.json
-        signature_data = data.get('signature')
-        signer_name = data.get('signer_name')
-        
-        if not signature_data or not signer_name:
-            return jsonify({'error': 'Signature and signer name required'}), 400
-        
-        doc = PutawayReportDocument()
-        sample_data = get_sample_document_data('putaway-report')
-        pdf_bytes = doc.generate_pdf(sample_data)
-        signed_pdf = add_signature_to_pdf(pdf_bytes, signature_data, signer_name)
-        
-        return send_file(
-            BytesIO(signed_pdf),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'putaway_report_signed_{datetime.now().strftime("%Y%m%d")}.pdf'
-        )
+        return _sign_document('putaway-report', PutawayReportDocument, 'putaway_report')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @document_bp.route('/inventory/inventory-report/sign', methods=['POST'])
 def sign_inventory_report():
-    """Generate and sign Inventory Report"""
+    """Sign Inventory Report (stored document or freshly generated)"""
     try:
-        data = request.json
-        signature_data = data.get('signature')
-        signer_name = data.get('signer_name')
-        
-        if not signature_data or not signer_name:
-            return jsonify({'error': 'Signature and signer name required'}), 400
-        
-        doc = InventoryReportDocument()
-        sample_data = get_sample_document_data('inventory-report')
-        pdf_bytes = doc.generate_pdf(sample_data)
-        signed_pdf = add_signature_to_pdf(pdf_bytes, signature_data, signer_name)
-        
-        return send_file(
-            BytesIO(signed_pdf),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'inventory_report_signed_{datetime.now().strftime("%Y%m%d")}.pdf'
-        )
+        return _sign_document('inventory-report', InventoryReportDocument, 'inventory_report')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @document_bp.route('/inventory/stock-status/sign', methods=['POST'])
 def sign_stock_status():
-    """Generate and sign Stock Status Report"""
+    """Sign Stock Status Report (stored document or freshly generated)"""
     try:
-        data = request.json
-        signature_data = data.get('signature')
-        signer_name = data.get('signer_name')
-        
-        if not signature_data or not signer_name:
-            return jsonify({'error': 'Signature and signer name required'}), 400
-        
-        doc = StockStatusReportDocument()
-        sample_data = get_sample_document_data('stock-status')
-        pdf_bytes = doc.generate_pdf(sample_data)
-        signed_pdf = add_signature_to_pdf(pdf_bytes, signature_data, signer_name)
-        
-        return send_file(
-            BytesIO(signed_pdf),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'stock_status_signed_{datetime.now().strftime("%Y%m%d")}.pdf'
-        )
+        return _sign_document('stock-status', StockStatusReportDocument, 'stock_status')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @document_bp.route('/inventory/cycle-count/sign', methods=['POST'])
 def sign_cycle_count():
-    """Generate and sign Cycle Count Report"""
+    """Sign Cycle Count Report (stored document or freshly generated)"""
     try:
-        data = request.json
-        signature_data = data.get('signature')
-        signer_name = data.get('signer_name')
-        
-        if not signature_data or not signer_name:
-            return jsonify({'error': 'Signature and signer name required'}), 400
-        
-        doc = CycleCountReportDocument()
-        sample_data = get_sample_document_data('cycle-count')
-        pdf_bytes = doc.generate_pdf(sample_data)
-        signed_pdf = add_signature_to_pdf(pdf_bytes, signature_data, signer_name)
-        
-        return send_file(
-            BytesIO(signed_pdf),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'cycle_count_signed_{datetime.now().strftime("%Y%m%d")}.pdf'
-        )
+        return _sign_document('cycle-count', CycleCountReportDocument, 'cycle_count')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @document_bp.route('/fulfillment/pick-list/sign', methods=['POST'])
 def sign_pick_list():
-    """Generate and sign Pick List"""
+    """Sign Pick List (stored document or freshly generated)"""
     try:
-        data = request.json
-        signature_data = data.get('signature')
-        signer_name = data.get('signer_name')
-        
-        if not signature_data or not signer_name:
-            return jsonify({'error': 'Signature and signer name required'}), 400
-        
-        doc = PickListDocument()
-        sample_data = get_sample_document_data('pick-list')
-        pdf_bytes = doc.generate_pdf(sample_data)
-        signed_pdf = add_signature_to_pdf(pdf_bytes, signature_data, signer_name)
-        
-        return send_file(
-            BytesIO(signed_pdf),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'pick_list_signed_{datetime.now().strftime("%Y%m%d")}.pdf'
-        )
+        return _sign_document('pick-list', PickListDocument, 'pick_list')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @document_bp.route('/fulfillment/packing-slip/sign', methods=['POST'])
 def sign_packing_slip():
-    """Generate and sign Packing Slip"""
+    """Sign Packing Slip (stored document or freshly generated)"""
     try:
-        data = request.json
-        signature_data = data.get('signature')
-        signer_name = data.get('signer_name')
-        
-        if not signature_data or not signer_name:
-            return jsonify({'error': 'Signature and signer name required'}), 400
-        
-        doc = PackingSlipDocument()
-        sample_data = get_sample_document_data('packing-slip')
-        pdf_bytes = doc.generate_pdf(sample_data)
-        signed_pdf = add_signature_to_pdf(pdf_bytes, signature_data, signer_name)
-        
-        return send_file(
-            BytesIO(signed_pdf),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'packing_slip_signed_{datetime.now().strftime("%Y%m%d")}.pdf'
-        )
+        return _sign_document('packing-slip', PackingSlipDocument, 'packing_slip')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @document_bp.route('/fulfillment/shipping-label/sign', methods=['POST'])
 def sign_shipping_label():
-    """Generate and sign Shipping Label"""
+    """Sign Shipping Label (stored document or freshly generated)"""
     try:
-        data = request.json
+        return _sign_document('shipping-label', ShippingLabelDocument, 'shipping_label')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@document_bp.route('/sign/batch', methods=['POST'])
+def sign_documents_batch():
+    """Sign many stored documents with one signature"""
+    try:
+        data = request.json or {}
         signature_data = data.get('signature')
         signer_name = data.get('signer_name')
-        
+        document_ids = data.get('document_ids') or []
+
         if not signature_data or not signer_name:
             return jsonify({'error': 'Signature and signer name required'}), 400
-        
-        doc = ShippingLabelDocument()
-        sample_data = get_sample_document_data('shipping-label')
-        pdf_bytes = doc.generate_pdf(sample_data)
-        signed_pdf = add_signature_to_pdf(pdf_bytes, signature_data, signer_name)
-        
-        return send_file(
-            BytesIO(signed_pdf),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'shipping_label_signed_{datetime.now().strftime("%Y%m%d")}.pdf'
-        )
+        if not document_ids:
+            return jsonify({'error': 'document_ids required'}), 400
+
+        documents = []
+        for document_id in document_ids:
+            metadata = get_document_metadata(document_id)
+            pdf_bytes = load_document(document_id)
+            if metadata is None or pdf_bytes is None:
+                return jsonify({'error': f'Document {document_id} not found'}), 404
+            documents.append((document_id, metadata['doc_type'], pdf_bytes))
+
+        signed_pdfs = sign_pdfs((pdf for _, _, pdf in documents), signature_data, signer_name)
+
+        results = []
+        for (document_id, doc_type, _), signed_pdf in zip(documents, signed_pdfs):
+            results.append({
+                'document_id': document_id,
+                'doc_type': doc_type,
+                'signed_document_id': save_document(signed_pdf, doc_type, parent_id=document_id)
+            })
+
+        return jsonify({'signed': results})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+@document_bp.route('/stored/<document_id>', methods=['GET'])
+def get_stored_document(document_id):
+    """Download a stored (rendered or signed) document by id"""
+    metadata = get_document_metadata(document_id)
+    pdf_bytes = load_document(document_id)
+    if metadata is None or pdf_bytes is None:
+        return jsonify({'error': 'Document not found'}), 404
+
+    response = send_file(
+        BytesIO(pdf_bytes),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f"{metadata['doc_type']}_{document_id[:12]}.pdf"
+    )
+    response.headers['X-Document-Id'] = document_id
+    return response
@@ -6,7 +6,8 @@ Food inventory, FEFO logic, lot tracking
 from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
 from database_supabase import get_supabase_client
-from catalog_assets import get_material_media
+from catalog_assets import attach_media, get_material_media
+from document_data import clear_document_data_cache
 
 wms_bp = Blueprint('wms', __name__, url_prefix='/api/wms')
 supabase = get_supabase_client()
@@ -114,7 +115,7 @@ def get_material_info():
             return jsonify({'error': 'Material not found'}), 404
 
         item = response.data[0]
-        media = get_material_media(item['sku']) or {}
+        media = get_material_media(item['sku'], size=request.args.get('image_size', type=int)) or {}
 
         return jsonify({
             **item,
@@ -122,6 +123,7 @@ def get_material_info():
             'image_filename': media.get('image_filename'),
             'image_source_url': media.get('source_url'),
             'storage_image_url': media.get('storage_image_url'),
+            'thumbnail_url': media.get('thumbnail_url'),
         })
 
     except Exception as e:
@@ -242,18 +244,14 @@ def get_all_materials():
                 status = 'danger'
                 status_text = 'Critical | 严重'
 
-            media = get_material_media(item['sku']) or {}
-
             result.append({
                 **item,
                 'status': status,
                 'status_text': status_text,
-                'image_url': media.get('image_url'),
-                'image_filename': media.get('image_filename'),
-                'image_source_url': media.get('source_url'),
-                'storage_image_url': media.get('storage_image_url'),
             })
 
+        attach_media(result)
+
         return jsonify(result)
 
     except Exception as e:
@@ -288,6 +286,8 @@ def get_fefo_alerts():
                 'urgency': 'critical' if hours_until_expiry < 24 else 'warning'
             })
 
+        attach_media(alerts)
+
         return jsonify(alerts)
 
     except Exception as e:
@@ -370,6 +370,7 @@ def stock_in():
         material = supabase.table('materials').select('quantity').eq('id', data['material_id']).single().execute()
         new_quantity = material.data['quantity'] + data['quantity']
         supabase.table('materials').update({'quantity': new_quantity}).eq('id', data['material_id']).execute()
+        clear_document_data_cache()
         
         # Create inventory record
         record_data = {
@@ -439,6 +440,9 @@ def stock_out():
             
             remaining -= take_qty
         
+        # Lot quantities changed even if the allocation falls short below
+        clear_document_data_cache()
+        
         if remaining > 0:
             return jsonify({'error': f'Insufficient stock. Short by {remaining} units'}), 400
         
@@ -446,6 +450,7 @@ def stock_out():
         material = supabase.table('materials').select('quantity').eq('id', material_id).single().execute()
         new_quantity = material.data['quantity'] - quantity_needed
         supabase.table('materials').update({'quantity': new_quantity}).eq('id', material_id).execute()
+        clear_document_data_cache()
         
         # Create inventory record
         record_data = {
@@ -0,0 +1,160 @@
+"""
+Rendered Document Store
+Content-addressed local storage for generated PDFs
+
+Every rendered document is saved under the SHA-256 of its bytes so signing
+can stamp exactly what the user viewed instead of regenerating it. Only the
+DOCUMENT_STORE_KEEP most recently rendered documents are kept; the store is
+pruned once it has grown DOCUMENT_STORE_KEEP / 10 documents past that.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+DOCUMENT_STORE_DIR = os.getenv(
+    'DOCUMENT_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'document_store')
+)
+DOCUMENT_STORE_KEEP = int(os.getenv('DOCUMENT_STORE_KEEP', '500'))
+
+_DOCUMENT_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+_count_lock = threading.Lock()
+# Documents on disk as of the last scan plus those saved since; None until first save
+_document_count: Optional[int] = None
+
+
+def document_id_for(pdf_bytes: bytes) -> str:
+    """Return the content hash used as a document id"""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def _paths(document_id: str):
+    base = os.path.join(DOCUMENT_STORE_DIR, document_id[:2], document_id)
+    return f"{base}.pdf", f"{base}.json"
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_document(pdf_bytes: bytes, doc_type: str, parent_id: Optional[str] = None) -> str:
+    """
+    Persist a rendered PDF and return its document id
+
+    Args:
+        pdf_bytes: Rendered PDF
+        doc_type: Document type slug (e.g. 'po-receipt')
+        parent_id: Id of the document this one was derived from (e.g. the unsigned original)
+    """
+    document_id = document_id_for(pdf_bytes)
+    pdf_path, meta_path = _paths(document_id)
+
+    # The metadata is written last, so a PDF without it (a crash mid-save) is rewritten
+    if not os.path.exists(meta_path):
+        _write_atomic(pdf_path, pdf_bytes)
+        metadata = {
+            'document_id': document_id,
+            'doc_type': doc_type,
+            'size': len(pdf_bytes),
+            'created_at': datetime.now().isoformat(),
+        }
+        if parent_id:
+            metadata['parent_id'] = parent_id
+        _write_atomic(meta_path, json.dumps(metadata).encode('utf-8'))
+        _count_saved()
+    else:
+        # Re-rendering identical bytes counts as recent use
+        try:
+            os.utime(meta_path, None)
+        except OSError:
+            pass
+
+    return document_id
+
+
+def _count_saved() -> None:
+    """Count a newly stored document and prune once the store is well past the cap"""
+    global _document_count
+    if DOCUMENT_STORE_KEEP <= 0:
+        return
+    with _count_lock:
+        if _document_count is not None:
+            _document_count += 1
+            if _document_count <= DOCUMENT_STORE_KEEP + max(1, DOCUMENT_STORE_KEEP // 10):
+                return
+        _document_count = _prune()
+
+
+def _prune() -> int:
+    """Delete the oldest documents beyond DOCUMENT_STORE_KEEP; returns how many remain"""
+    metas = []
+    for shard in os.scandir(DOCUMENT_STORE_DIR):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.name.endswith('.json'):
+                try:
+                    metas.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+    if len(metas) <= DOCUMENT_STORE_KEEP:
+        return len(metas)
+    metas.sort()
+    for _, meta_path in metas[:-DOCUMENT_STORE_KEEP]:
+        # Metadata first: a leftover PDF without it is rewritten on the next save
+        for path in (meta_path, meta_path[:-len('.json')] + '.pdf'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    return DOCUMENT_STORE_KEEP
+
+
+def get_document_metadata(document_id: str) -> Optional[Dict]:
+    """Return stored metadata for a document id, or None if unknown"""
+    if not isinstance(document_id, str) or not _DOCUMENT_ID_PATTERN.match(document_id):
+        return None
+    _, meta_path = _paths(document_id)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def load_document(document_id: str, doc_type: Optional[str] = None) -> Optional[bytes]:
+    """
+    Load a stored PDF by id
+
+    Returns None if the id is malformed, unknown, or (when doc_type is given)
+    belongs to a different document type.
+    """
+    metadata = get_document_metadata(document_id)
+    if metadata is None:
+        return None
+    if doc_type and metadata.get('doc_type') != doc_type:
+        return None
+
+    pdf_path, _ = _paths(document_id)
+    try:
+        with open(pdf_path, 'rb') as handle:
+            return handle.read()
+    except OSError:
+        return None
@@ -0,0 +1,257 @@
+"""
+Thermal Label Printing
+- Shipping Label (ZPL / EPL)
+- Lot Label (ZPL / EPL)
+- Pick Ticket (ZPL / EPL)
+
+Raw printer-language output for 4x6in (203 dpi) thermal printers. Labels
+take the same input as their PDF counterparts, and rendering is plain template
+substitution, so the dock can print thousands of labels per second without
+a ReportLab layout pass.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+from .document_service import format_date
+
+LABEL_FORMATS = ('zpl', 'epl')
+
+
+def _zpl_escape(value: Any) -> str:
+    """Strip ZPL control prefixes from field data"""
+    return str(value if value is not None else '').replace('^', ' ').replace('~', ' ')
+
+
+def _epl_escape(value: Any) -> str:
+    """Escape backslashes and quotes inside EPL quoted field data"""
+    return str(value if value is not None else '').replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _city_line(address: Dict[str, Any]) -> str:
+    return f"{address.get('city', '')}, {address.get('state', '')} {address.get('postal_code', '')}".strip(' ,')
+
+
+class LabelRenderer:
+    """Base class for ZPL/EPL label renderers"""
+
+    templates: Dict[str, str] = {}
+
+    def fields(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Override in subclasses: map the input schema to template fields"""
+        raise NotImplementedError("Subclasses must implement fields()")
+
+    def render(self, data: Dict[str, Any], fmt: str = 'zpl') -> str:
+        """Render one label in the requested printer language"""
+        template = self.templates.get(fmt)
+        if template is None:
+            raise ValueError(f"Unsupported label format: {fmt}")
+        escape = _zpl_escape if fmt == 'zpl' else _epl_escape
+        values = {key: escape(value) for key, value in self.fields(data).items()}
+        return template.format_map(values)
+
+    def render_batch(self, records: Iterable[Dict[str, Any]], fmt: str = 'zpl') -> str:
+        """Render many labels into one print job"""
+        return ''.join(self.render(record, fmt) for record in records)
+
+
+class ShippingLabelRenderer(LabelRenderer):
+    """Shipping Label - same input as ShippingLabelDocument"""
+
+    templates = {
+        'zpl': (
+            "^XA\n"
+            "^CI28\n"
+            "^PW812\n"
+            "^LL1218\n"
+            "^FO40,40^A0N,60,60^FD{carrier}^FS\n"
+            "^FO40,110^A0N,36,36^FD{service_level}^FS\n"
+            "^FO520,50^A0N,28,28^FDShip: {ship_date}^FS\n"
+            "^FO40,170^GB732,3,3^FS\n"
+            "^FO40,190^A0N,26,26^FDFROM:^FS\n"
+            "^FO40,225^A0N,28,28^FD{from_name}^FS\n"
+            "^FO40,260^A0N,26,26^FD{from_line1}^FS\n"
+            "^FO40,292^A0N,26,26^FD{from_city_line}^FS\n"
+            "^FO40,340^GB732,3,3^FS\n"
+            "^FO40,360^A0N,30,30^FDTO:^FS\n"
+            "^FO40,400^A0N,44,44^FD{to_name}^FS\n"
+            "^FO40,455^A0N,40,40^FD{to_line1}^FS\n"
+            "^FO40,505^A0N,40,40^FD{to_line2}^FS\n"
+            "^FO40,555^A0N,44,44^FD{to_city_line}^FS\n"
+            "^FO40,610^A0N,40,40^FD{to_country}^FS\n"
+            "^FO40,680^GB732,3,3^FS\n"
+            "^FO60,720^BY3^BCN,200,Y,N,N^FD{tracking_number}^FS\n"
+            "^FO40,1000^A0N,28,28^FD{package_info}^FS\n"
+            "^XZ\n"
+        ),
+        'epl': (
+            "\nN\n"
+            "q812\n"
+            "Q1218,24\n"
+            "A40,40,0,5,1,1,N,\"{carrier}\"\n"
+            "A40,110,0,4,1,1,N,\"{service_level}\"\n"
+            "A520,50,0,3,1,1,N,\"Ship: {ship_date}\"\n"
+            "LO40,170,732,3\n"
+            "A40,190,0,2,1,1,N,\"FROM:\"\n"
+            "A40,225,0,3,1,1,N,\"{from_name}\"\n"
+            "A40,260,0,2,1,1,N,\"{from_line1}\"\n"
+            "A40,292,0,2,1,1,N,\"{from_city_line}\"\n"
+            "LO40,340,732,3\n"
+            "A40,360,0,3,1,1,N,\"TO:\"\n"
+            "A40,400,0,4,1,1,N,\"{to_name}\"\n"
+            "A40,455,0,4,1,1,N,\"{to_line1}\"\n"
+            "A40,505,0,4,1,1,N,\"{to_line2}\"\n"
+            "A40,555,0,4,1,1,N,\"{to_city_line}\"\n"
+            "A40,610,0,4,1,1,N,\"{to_country}\"\n"
+            "LO40,680,732,3\n"
+            "B60,720,0,1,3,7,200,B,\"{tracking_number}\"\n"
+            "A40,1000,0,3,1,1,N,\"{package_info}\"\n"
+            "P1\n"
+        ),
+    }
+
+    def fields(self, label_data: Dict[str, Any]) -> Dict[str, Any]:
+        from_addr = label_data.get('from_address', {})
+        to_addr = label_data.get('to_address', {})
+
+        package_info = []
+        if label_data.get('weight'):
+            package_info.append(f"Weight: {label_data['weight']} lbs")
+        if label_data.get('dimensions'):
+            package_info.append(f"Dim: {label_data['dimensions']}")
+
+        return {
+            'carrier': label_data.get('carrier', ''),
+            'service_level': label_data.get('service_level', ''),
+            'ship_date': format_date(label_data.get('ship_date') or datetime.now()),
+            'from_name': from_addr.get('name', ''),
+            'from_line1': from_addr.get('address_line1', ''),
+            'from_city_line': _city_line(from_addr),
+            'to_name': to_addr.get('name', ''),
+            'to_line1': to_addr.get('address_line1', ''),
+            'to_line2': to_addr.get('address_line2', ''),
+            'to_city_line': _city_line(to_addr),
+            'to_country': to_addr.get('country', ''),
+            'tracking_number': label_data.get('tracking_number', ''),
+            'package_info': ' | '.join(package_info),
+        }
+
+
+class LotLabelRenderer(LabelRenderer):
+    """Lot Label for received inventory"""
+
+    templates = {
+        'zpl': (
+            "^XA\n"
+            "^CI28\n"
+            "^PW812\n"
+            "^LL1218\n"
+            "^FO40,40^A0N,50,50^FD{name}^FS\n"
+            "^FO40,110^A0N,36,36^FDSKU: {sku}^FS\n"
+            "^FO40,170^GB732,3,3^FS\n"
+            "^FO40,200^A0N,40,40^FDLOT: {lot_number}^FS\n"
+            "^FO60,260^BY3^BCN,160,Y,N,N^FD{lot_number}^FS\n"
+            "^FO40,500^A0N,44,44^FDEXP: {expiration_date}^FS\n"
+            "^FO40,570^A0N,36,36^FDQTY: {quantity}^FS\n"
+            "^FO40,630^A0N,30,30^FDReceived: {received_date}^FS\n"
+            "^FO40,700^BQN,2,8^FDQA,{sku}|{lot_number}|{expiration_date}^FS\n"
+            "^XZ\n"
+        ),
+        'epl': (
+            "\nN\n"
+            "q812\n"
+            "Q1218,24\n"
+            "A40,40,0,4,1,1,N,\"{name}\"\n"
+            "A40,110,0,3,1,1,N,\"SKU: {sku}\"\n"
+            "LO40,170,732,3\n"
+            "A40,200,0,4,1,1,N,\"LOT: {lot_number}\"\n"
+            "B60,260,0,1,3,7,160,B,\"{lot_number}\"\n"
+            "A40,500,0,4,1,1,N,\"EXP: {expiration_date}\"\n"
+            "A40,570,0,3,1,1,N,\"QTY: {quantity}\"\n"
+            "A40,630,0,3,1,1,N,\"Received: {received_date}\"\n"
+            "P1\n"
+        ),
+    }
+
+    def fields(self, lot_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Args:
+            lot_data: {
+                'sku': str,
+                'name': str,
+                'lot_number': str,
+                'expiration_date': datetime or str,
+                'quantity': int,
+                'unit': str (optional),
+                'received_date': datetime (optional)
+            }
+        """
+        quantity = f"{lot_data.get('quantity', '')} {lot_data.get('unit', '')}".strip()
+        return {
+            'sku': lot_data.get('sku', ''),
+            'name': lot_data.get('name', ''),
+            'lot_number': lot_data.get('lot_number', ''),
+            'expiration_date': format_date(lot_data['expiration_date']) if lot_data.get('expiration_date') else '-',
+            'quantity': quantity,
+            'received_date': format_date(lot_data.get('received_date') or datetime.now()),
+        }
+
+
+class PickTicketRenderer(LabelRenderer):
+    """Pick Tickets - one label per line of a PickListDocument order"""
+
+    templates = {
+        'zpl': (
+            "^XA\n"
+            "^CI28\n"
+            "^PW812\n"
+            "^LL1218\n"
+            "^FO40,40^A0N,36,36^FDORDER {order_number}^FS\n"
+            "^FO560,40^A0N,30,30^FD{line} / {lines}^FS\n"
+            "^FO40,100^GB732,3,3^FS\n"
+            "^FO40,130^A0N,90,90^FD{location}^FS\n"
+            "^FO40,260^A0N,40,40^FD{name}^FS\n"
+            "^FO40,320^A0N,36,36^FDSKU: {sku}^FS\n"
+            "^FO40,380^A0N,36,36^FDLOT: {lot_number}^FS\n"
+            "^FO40,450^A0N,80,80^FDQTY {quantity}^FS\n"
+            "^FO60,580^BY3^BCN,160,Y,N,N^FD{sku}^FS\n"
+            "^XZ\n"
+        ),
+        'epl': (
+            "\nN\n"
+            "q812\n"
+            "Q1218,24\n"
+            "A40,40,0,3,1,1,N,\"ORDER {order_number}\"\n"
+            "A560,40,0,3,1,1,N,\"{line} / {lines}\"\n"
+            "LO40,100,732,3\n"
+            "A40,130,0,5,2,2,N,\"{location}\"\n"
+            "A40,260,0,4,1,1,N,\"{name}\"\n"
+            "A40,320,0,3,1,1,N,\"SKU: {sku}\"\n"
+            "A40,380,0,3,1,1,N,\"LOT: {lot_number}\"\n"
+            "A40,450,0,5,1,1,N,\"QTY {quantity}\"\n"
+            "B60,580,0,1,3,7,160,B,\"{sku}\"\n"
+            "P1\n"
+        ),
+    }
+
+    def fields(self, ticket_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'order_number': ticket_data.get('order_number', ''),
+            'line': ticket_data.get('line', 1),
+            'lines': ticket_data.get('lines', 1),
+            'location': ticket_data.get('location', ''),
+            'name': ticket_data.get('name', ''),
+            'sku': ticket_data.get('sku', ''),
+            'lot_number': ticket_data.get('lot_number', 'ANY'),
+            'quantity': ticket_data.get('quantity', ''),
+        }
+
+    def tickets(self, pick_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Expand pick list data (same input as PickListDocument) into per-line tickets"""
+        items = pick_data.get('items', [])
+        return [
+            {**item, 'order_number': pick_data.get('order_number', ''), 'line': idx, 'lines': len(items)}
+            for idx, item in enumerate(items, start=1)
+        ]
+
+    def render_pick_list(self, pick_data: Dict[str, Any], fmt: str = 'zpl') -> str:
+        return self.render_batch(self.tickets(pick_data), fmt)
@@ -1,5 +1,9 @@
 """
 Signature Service for adding signatures to PDF documents
+
+Signatures are stamped in memory: the PNG is handed to ReportLab through an
+``ImageReader`` and the overlay is appended to the last page as an incremental
+PDF update, so the original document bytes are kept as-is.
 """
 
 try:
@@ -8,88 +12,179 @@ except ImportError:
     from pypdf import PdfReader, PdfWriter
 
 from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from PIL import Image
+from reportlab.lib.utils import ImageReader
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
 import io
 import base64
-import os
-import tempfile
+import hashlib
+import threading
 from datetime import datetime
 
+# Signature box size and offsets (points) from the bottom-right page corner
+SIGNATURE_WIDTH = 150
+SIGNATURE_HEIGHT = 50
+SIGNATURE_MARGIN_RIGHT = 50
+SIGNATURE_MARGIN_BOTTOM = 80
+
+OVERLAY_CACHE_SIZE = 64
+
+_cache_lock = threading.Lock()
+_image_cache: "OrderedDict[str, ImageReader]" = OrderedDict()
+_overlay_cache: "OrderedDict[Tuple, bytes]" = OrderedDict()
+
+
+def _cache_get(cache: OrderedDict, key):
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache: OrderedDict, key, value) -> None:
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > OVERLAY_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _decode_signature(signature_data: str) -> Tuple[str, ImageReader]:
+    """Decode a base64 signature (optionally a data URL) into a cached ImageReader."""
+    if ',' in signature_data:
+        signature_data = signature_data.split(',')[1]
+
+    signature_bytes = base64.b64decode(signature_data)
+    digest = hashlib.sha256(signature_bytes).hexdigest()
+
+    image = _cache_get(_image_cache, digest)
+    if image is None:
+        image = ImageReader(io.BytesIO(signature_bytes))
+        _cache_put(_image_cache, digest, image)
+    return digest, image
+
+
+def _signature_position(page_size: Tuple[float, float]) -> Tuple[float, float]:
+    """Bottom-left corner of the signature box on a page of this size."""
+    page_width, _ = page_size
+    return page_width - SIGNATURE_WIDTH - SIGNATURE_MARGIN_RIGHT, SIGNATURE_MARGIN_BOTTOM
+
+
+def _render_overlay(signature_data: str, signer_name: str, page_size: Tuple[float, float]) -> bytes:
+    """Render (or reuse) the signature image and signer name overlay for a page size."""
+    digest, image = _decode_signature(signature_data)
+    key = (digest, signer_name, page_size)
+
+    overlay = _cache_get(_overlay_cache, key)
+    if overlay is not None:
+        return overlay
+
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet, pagesize=page_size)
+
+    # Position signature at bottom right
+    sig_x, sig_y = _signature_position(page_size)
+
+    can.drawImage(image, sig_x, sig_y, width=SIGNATURE_WIDTH, height=SIGNATURE_HEIGHT,
+                  preserveAspectRatio=True, mask='auto')
+
+    # Add signer name below signature
+    can.setFont('Helvetica', 8)
+    can.drawString(sig_x, sig_y - 15, f"Signed by: {signer_name}")
+    can.save()
+
+    overlay = packet.getvalue()
+    _cache_put(_overlay_cache, key, overlay)
+    return overlay
+
+
+def _render_date(page_size: Tuple[float, float], signed_at: str) -> bytes:
+    """Render the timestamp line under the signature; changes per call, so never cached."""
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet, pagesize=page_size)
+    sig_x, sig_y = _signature_position(page_size)
+    can.setFont('Helvetica', 8)
+    can.drawString(sig_x, sig_y - 28, f"Date: {signed_at}")
+    can.save()
+    return packet.getvalue()
+
+
+def _page_size(page) -> Tuple[float, float]:
+    box = page.mediabox
+    return float(box.width), float(box.height)
+
+
+def stamp_signature(pdf_bytes: bytes, signature_data: str, signer_name: str,
+                    signed_at: Optional[str] = None) -> bytes:
+    """
+    Stamp a signature onto the last page of a PDF without temp files
+
+    The overlay is appended as an incremental update, so only the last page
+    and the overlay resources are written after the original bytes. Falls
+    back to a full rewrite when the installed PDF library has no incremental
+    writer (PyPDF2).
+
+    Args:
+        pdf_bytes: Original PDF as bytes
+        signature_data: Base64 encoded signature image (data:image/png;base64,...)
+        signer_name: Name of the person signing
+        signed_at: Timestamp printed under the signature (defaults to now)
+
+    Returns:
+        bytes: PDF with signature added
+    """
+    signed_at = signed_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    try:
+        writer = PdfWriter(io.BytesIO(pdf_bytes), incremental=True)
+        last_page = writer.pages[-1]
+    except TypeError:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        writer = PdfWriter()
+        for page in reader.pages:
+            writer.add_page(page)
+        last_page = writer.pages[-1]
+
+    page_size = _page_size(last_page)
+    overlay = _render_overlay(signature_data, signer_name, page_size)
+    last_page.merge_page(PdfReader(io.BytesIO(overlay)).pages[0])
+    last_page.merge_page(PdfReader(io.BytesIO(_render_date(page_size, signed_at))).pages[0])
+
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def sign_pdfs(pdf_documents: Iterable[bytes], signature_data: str, signer_name: str) -> List[bytes]:
+    """
+    Sign many documents with one signature
+
+    All documents share a single timestamp. The signature image is decoded
+    once and its overlay is rendered once per distinct page size; only the
+    date line is drawn per document.
+    """
+    signed_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return [
+        stamp_signature(pdf_bytes, signature_data, signer_name, signed_at=signed_at)
+        for pdf_bytes in pdf_documents
+    ]
+
 
 def add_signature_to_pdf(pdf_bytes, signature_data, signer_name):
     """
     Add a signature image to the bottom of a PDF document
-    
+
     Args:
         pdf_bytes: Original PDF as bytes
         signature_data: Base64 encoded signature image (data:image/png;base64,...)
         signer_name: Name of the person signing
-        
+
     Returns:
         bytes: PDF with signature added
     """
     try:
-        # Decode signature image from base64
-        if ',' in signature_data:
-            signature_data = signature_data.split(',')[1]
-        
-        signature_bytes = base64.b64decode(signature_data)
-        signature_img = Image.open(io.BytesIO(signature_bytes))
-        
-        # Save signature to temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-        temp_sig_path = temp_file.name
-        temp_file.close()
-        signature_img.save(temp_sig_path, 'PNG')
-        
-        # Read original PDF
-        pdf_reader = PdfReader(io.BytesIO(pdf_bytes))
-        pdf_writer = PdfWriter()
-        
-        # Create signature overlay
-        packet = io.BytesIO()
-        can = canvas.Canvas(packet, pagesize=letter)
-        
-        # Position signature at bottom right
-        page_width, page_height = letter
-        sig_width = 150
-        sig_height = 50
-        sig_x = page_width - sig_width - 50  # 50 points from right edge
-        sig_y = 80  # 80 points from bottom
-        
-        # Draw signature image
-        can.drawImage(temp_sig_path, sig_x, sig_y, width=sig_width, height=sig_height, 
-                     preserveAspectRatio=True, mask='auto')
-        
-        # Add signer name and timestamp below signature
-        can.setFont('Helvetica', 8)
-        can.drawString(sig_x, sig_y - 15, f"Signed by: {signer_name}")
-        can.drawString(sig_x, sig_y - 28, f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        can.save()
-        
-        # Move to the beginning of the StringIO buffer
-        packet.seek(0)
-        overlay_pdf = PdfReader(packet)
-        
-        # Add signature overlay to last page
-        for i, page in enumerate(pdf_reader.pages):
-            if i == len(pdf_reader.pages) - 1:  # Last page
-                page.merge_page(overlay_pdf.pages[0])
-            pdf_writer.add_page(page)
-        
-        # Write to output
-        output = io.BytesIO()
-        pdf_writer.write(output)
-        output.seek(0)
-        
-        # Clean up temp file
-        if os.path.exists(temp_sig_path):
-            os.remove(temp_sig_path)
-        
-        return output.getvalue()
-        
+        return stamp_signature(pdf_bytes, signature_data, signer_name)
     except Exception as e:
         import traceback
         print(f"Error adding signature to PDF: {e}")
@@ -110,8 +110,9 @@ export default function ApprovalsPage() {
         throw new Error('Failed to generate document');
       }
 
-      const pdfBlob = await generateResponse.blob();
-      
+      // The backend stores every rendered PDF; signing by id stamps exactly this document
+      const documentId = generateResponse.headers.get('X-Document-Id');
+
       // Step 2: Send to sign endpoint
       const signResponse = await fetch(`${API_BASE_URL}/documents/${selectedDoc.category}/${selectedDoc.type}/sign`, {
         method: 'POST',
@@ -121,6 +122,7 @@ export default function ApprovalsPage() {
         body: JSON.stringify({
           signature: signatureData,
           signer_name: signerName,
+          ...(documentId ? { document_id: documentId } : {}),
         }),
       });
 
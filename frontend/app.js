@@ -482,7 +482,7 @@ function renderInventoryTable(data) {
         const thumbWrapper = document.createElement('div');
         thumbWrapper.className = 'material-thumb';
 
-        const imageUrl = item.storage_image_url || item.image_url;
+        const imageUrl = item.thumbnail_url || item.storage_image_url || item.image_url;
 
         if (imageUrl) {
             const img = document.createElement('img');
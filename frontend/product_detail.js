@@ -108,7 +108,7 @@ async function loadProductStats() {
 
 async function loadProductMedia() {
     try {
-        const response = await fetch(`${WMS_API_BASE}/materials/info?name=${encodeURIComponent(productName)}`);
+        const response = await fetch(`${WMS_API_BASE}/materials/info?name=${encodeURIComponent(productName)}&image_size=256`);
         if (!response.ok) {
             return;
         }
@@ -116,7 +116,7 @@ async function loadProductMedia() {
         const heroImage = document.getElementById('product-hero-image');
         const placeholder = document.getElementById('product-hero-placeholder');
 
-        const imageUrl = data.storage_image_url || data.image_url || sessionStorage.getItem('material_image_url');
+        const imageUrl = data.thumbnail_url || data.storage_image_url || data.image_url || sessionStorage.getItem('material_image_url');
 
         if (imageUrl) {
             heroImage.src = imageUrl;
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Load-test the backend APIs in-process and report per-route latency.
+
+Boots `backend/app.py` (SQLite) or `backend/app_platform.py` (Supabase) inside
+this process behind a threaded werkzeug server on a free local port, then
+drives it with concurrent clients replaying weighted scenario mixes:
+
+- dashboard: the dashboard's polling burst (stats, distribution, trend, ...)
+- product:   a product page (stats, trend, records for one SKU)
+- materials: the full materials list
+- stock:     a stock-in followed by a FEFO stock-out (platform only; writes
+             lots and inventory records, so it only runs against
+             --fake-supabase or with --allow-writes)
+
+Throughput and p50/p95/p99 latencies per route are printed and can be saved
+as JSON and compared against a previous run.
+
+For the SQLite app, point --db-path at a dataset from
+generate_synthetic_data.py; without it a temporary database seeded with the
+app's own mock data is used. The platform app needs Supabase credentials in
+the environment, or pass --fake-supabase to serve it from the SQLite-backed
+fake client (with --fake-latency-ms per round-trip), which also reports
+Supabase round-trips per request.
+
+Usage:
+    uv run python scripts/bench_api.py --db-path /tmp/bench.db --concurrency 8 --duration 30 \
+        --out bench/api_$(git rev-parse --short HEAD).json
+    uv run python scripts/bench_api.py --db-path /tmp/bench.db --mix dashboard=1 --compare bench/api_baseline.json
+    uv run python scripts/bench_api.py --app platform --fake-supabase /tmp/bench.db --fake-latency-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = ROOT / "backend"
+for path in (ROOT, BACKEND_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+DEFAULT_MIXES = {
+    "sqlite": "dashboard=6,product=3,materials=1",
+    "platform": "dashboard=6,product=3,materials=1",
+}
+# Added to the platform default only when the writes land in the fake client
+FAKE_SUPABASE_MIX = ",stock=2"
+WRITE_SCENARIOS = {"stock"}
+PRODUCT_SAMPLE = 500
+
+# (route label, method, path, json body); the label groups latencies per route
+Request = Tuple[str, str, str, Optional[Dict[str, Any]]]
+Scenario = Callable[[Dict[str, Any], random.Random], List[Request]]
+
+
+def _get(path: str, query: str = "") -> Request:
+    return f"GET {path}", "GET", path + query, None
+
+
+def _name_query(product: Dict[str, Any]) -> str:
+    return f"?name={quote(product['name'])}"
+
+
+SQLITE_SCENARIOS: Dict[str, Scenario] = {
+    "dashboard": lambda product, rng: [
+        _get("/api/dashboard/stats"),
+        _get("/api/dashboard/category-distribution"),
+        _get("/api/dashboard/weekly-trend"),
+        _get("/api/dashboard/top-stock"),
+        _get("/api/dashboard/low-stock-alert"),
+    ],
+    "product": lambda product, rng: [
+        _get("/api/materials/product-stats", _name_query(product)),
+        _get("/api/materials/product-trend", _name_query(product)),
+        _get("/api/materials/product-records", _name_query(product)),
+    ],
+    "materials": lambda product, rng: [_get("/api/materials/all")],
+}
+
+
+def _stock_movement(product: Dict[str, Any], rng: random.Random) -> List[Request]:
+    quantity = rng.randint(1, 20)
+    expires = (date.today() + timedelta(days=rng.randint(2, 120))).isoformat()
+    return [
+        ("POST /api/wms/stock/in", "POST", "/api/wms/stock/in", {
+            "material_id": product["id"],
+            "quantity": quantity,
+            "lot_number": f"BENCH-{rng.getrandbits(32):08x}",
+            "expiration_date": expires,
+            "operator": "bench",
+        }),
+        ("POST /api/wms/stock/out", "POST", "/api/wms/stock/out", {
+            "material_id": product["id"],
+            "quantity": quantity,
+            "operator": "bench",
+        }),
+    ]
+
+
+PLATFORM_SCENARIOS: Dict[str, Scenario] = {
+    "dashboard": lambda product, rng: [
+        _get("/api/wms/dashboard/stats"),
+        _get("/api/wms/dashboard/category-distribution"),
+        _get("/api/wms/dashboard/weekly-trend"),
+        _get("/api/wms/dashboard/top-stock"),
+        _get("/api/wms/fefo-alerts"),
+    ],
+    "product": lambda product, rng: [
+        _get("/api/wms/materials/info", f"?sku={quote(product['sku'])}"),
+        _get("/api/wms/materials/product-stats", _name_query(product)),
+        _get("/api/wms/materials/product-trend", _name_query(product)),
+        _get("/api/wms/materials/product-records", _name_query(product)),
+    ],
+    "materials": lambda product, rng: [_get("/api/wms/materials/all")],
+    "stock": _stock_movement,
+}
+
+SCENARIOS = {"sqlite": SQLITE_SCENARIOS, "platform": PLATFORM_SCENARIOS}
+
+
+def load_app(kind: str, db_path: Optional[Path]):
+    """Import the Flask app; for SQLite the DB path must be set before import."""
+    if kind == "sqlite":
+        os.environ["WAREHOUSE_DB_PATH"] = str(db_path)
+        import app as module
+    else:
+        import app_platform as module
+    return module.app
+
+
+def count_round_trips(app) -> bool:
+    """With the fake Supabase client, report each request's round-trips in a response header."""
+    from database_supabase import get_supabase_client
+
+    client = get_supabase_client()
+    if not hasattr(client, "reset_round_trips"):
+        return False
+
+    @app.before_request
+    def reset_round_trips():
+        client.reset_round_trips()
+
+    @app.after_request
+    def add_round_trips(response):
+        response.headers["X-Supabase-Round-Trips"] = str(client.round_trips)
+        return response
+
+    return True
+
+
+def sample_products(kind: str, db_path: Optional[Path]) -> List[Dict[str, Any]]:
+    if kind == "sqlite":
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute("SELECT id, sku, name FROM materials ORDER BY id LIMIT ?", (PRODUCT_SAMPLE,)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    from database_supabase import get_supabase_client
+
+    response = get_supabase_client().table("materials").select("id, sku, name").limit(PRODUCT_SAMPLE).execute()
+    return response.data
+
+
+def start_server(app) -> Tuple[Any, str]:
+    from werkzeug.serving import make_server
+
+    # Per-request access logging would dominate the measurements
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def parse_mix(spec: str, scenarios: Dict[str, Scenario]) -> List[Tuple[str, int]]:
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in scenarios:
+            raise SystemExit(f"Unknown scenario '{name}' (available: {', '.join(scenarios)})")
+        mix.append((name, int(weight or 1)))
+    return mix
+
+
+class Recorder:
+    """Thread-safe per-route latency samples, only kept after the warm-up."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.round_trips: Dict[str, int] = defaultdict(int)
+
+    def add(self, route: str, seconds: float, ok: bool, round_trips: Optional[str] = None) -> None:
+        with self.lock:
+            self.samples[route].append(seconds)
+            if not ok:
+                self.errors[route] += 1
+            if round_trips is not None:
+                self.round_trips[route] += int(round_trips)
+
+
+def client_loop(
+    base_url: str,
+    scenarios: Dict[str, Scenario],
+    mix: List[Tuple[str, int]],
+    products: List[Dict[str, Any]],
+    recorder: Recorder,
+    measure_from: float,
+    stop_at: float,
+    seed: int,
+) -> None:
+    rng = random.Random(seed)
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    session = requests.Session()
+    while time.perf_counter() < stop_at:
+        scenario = scenarios[rng.choices(names, weights)[0]]
+        for route, method, path, body in scenario(rng.choice(products), rng):
+            start = time.perf_counter()
+            round_trips = None
+            try:
+                response = session.request(method, base_url + path, json=body, timeout=60)
+                response.content
+                ok = response.status_code < 400
+                round_trips = response.headers.get("X-Supabase-Round-Trips")
+            except requests.RequestException:
+                ok = False
+            end = time.perf_counter()
+            if start >= measure_from:
+                recorder.add(route, end - start, ok, round_trips)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: List[float], errors: int, seconds: float, round_trips: int = 0) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    result = {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / seconds, 1),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+    if round_trips:
+        result["round_trips_per_request"] = round(round_trips / len(ordered), 2)
+    return result
+
+
+def run_benchmark(args, app, products: List[Dict[str, Any]]) -> Dict[str, Any]:
+    scenarios = SCENARIOS[args.app]
+    mix = parse_mix(args.mix, scenarios)
+    server, base_url = start_server(app)
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    stop_at = measure_from + args.duration
+    threads = [
+        threading.Thread(
+            target=client_loop,
+            args=(base_url, scenarios, mix, products, recorder, measure_from, stop_at, args.seed + index),
+        )
+        for index in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+
+    routes = {
+        route: summarize(samples, recorder.errors[route], args.duration, recorder.round_trips[route])
+        for route, samples in sorted(recorder.samples.items())
+    }
+    everything = [value for samples in recorder.samples.values() for value in samples]
+    overall = (
+        summarize(everything, sum(recorder.errors.values()), args.duration, sum(recorder.round_trips.values()))
+        if everything
+        else {}
+    )
+    return {"mix": dict(mix), "routes": routes, "overall": overall}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: Dict[str, Any], baseline_path: Path, threshold: float) -> int:
+    """Print per-route p50/p95 deltas against a previous run; return number of regressions."""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = baseline.get("routes", {})
+    regressions = 0
+
+    print(f"\nComparison with {baseline_path} ({baseline.get('meta', {}).get('git_revision')})")
+    print(f"{'route':<48}{'p50 Δ%':>10}{'p95 Δ%':>10}{'rps Δ%':>10}")
+    for route, result in report["routes"].items():
+        old = previous.get(route)
+        if not old:
+            continue
+        deltas = [
+            (result[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            for key in ("p50_ms", "p95_ms", "throughput_rps")
+        ]
+        flag = ""
+        if deltas[1] > threshold:
+            regressions += 1
+            flag = "  ⚠️ slower"
+        print(f"{route:<48}{deltas[0]:>+10.1f}{deltas[1]:>+10.1f}{deltas[2]:>+10.1f}{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark backend API latency under concurrent load.")
+    parser.add_argument("--app", choices=sorted(SCENARIOS), default="sqlite", help="app.py (sqlite) or app_platform.py (platform)")
+    parser.add_argument("--db-path", type=Path, help="SQLite database to serve (default: temporary DB with the app's mock data)")
+    parser.add_argument("--fake-supabase", type=Path, help="Serve the platform app from this SQLite DB via the fake Supabase client")
+    parser.add_argument("--fake-latency-ms", type=float, default=0.0, help="Simulated latency per fake Supabase round-trip")
+    parser.add_argument("--mix", help="Scenario weights, e.g. dashboard=6,product=3,materials=1")
+    parser.add_argument("--allow-writes", action="store_true", help="Allow write scenarios (stock) against a real Supabase project")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of load before measuring")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for scenario and product choice")
+    parser.add_argument("--out", type=Path, help="Write JSON results to this path")
+    parser.add_argument("--compare", type=Path, help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="p95 regression threshold in percent")
+    args = parser.parse_args()
+
+    db_path = args.db_path
+    if args.app == "sqlite" and db_path is None:
+        db_path = Path(tempfile.mkdtemp(prefix="bench_api_")) / "warehouse.db"
+    elif db_path is not None and not db_path.exists():
+        raise SystemExit(f"Database not found: {db_path}")
+
+    if args.fake_supabase:
+        if args.app != "platform":
+            raise SystemExit("--fake-supabase only applies to --app platform")
+        os.environ["SUPABASE_FAKE_DB"] = str(args.fake_supabase)
+        os.environ["SUPABASE_FAKE_LATENCY_MS"] = str(args.fake_latency_ms)
+
+    if args.mix is None:
+        args.mix = DEFAULT_MIXES[args.app] + (FAKE_SUPABASE_MIX if args.fake_supabase else "")
+    writes = sorted(WRITE_SCENARIOS & {part.partition("=")[0].strip() for part in args.mix.split(",")})
+    if writes and not args.fake_supabase and not args.allow_writes:
+        raise SystemExit(
+            f"Scenario(s) {', '.join(writes)} write to Supabase; use --fake-supabase or pass --allow-writes"
+        )
+
+    app = load_app(args.app, db_path)
+    counting = args.app == "platform" and count_round_trips(app)
+    products = sample_products(args.app, db_path)
+    if not products:
+        raise SystemExit("No materials to benchmark against")
+
+    print(f"Benchmarking {args.app} app with {args.concurrency} clients for {args.duration:.0f}s...", flush=True)
+    results = run_benchmark(args, app, products)
+
+    print(
+        f"\n{'route':<48}{'req':>8}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        + (f"{'trips':>7}" if counting else "")
+    )
+    for route, result in list(results["routes"].items()) + [("overall", results["overall"])]:
+        if not result:
+            continue
+        print(
+            f"{route:<48}{result['requests']:>8}{result['errors']:>6}{result['throughput_rps']:>9.1f}"
+            f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            + (f"{result.get('round_trips_per_request', 0):>7.1f}" if counting else "")
+        )
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "app": args.app,
+            "db_path": str(db_path) if db_path else None,
+            "fake_supabase": str(args.fake_supabase) if args.fake_supabase else None,
+            "fake_latency_ms": args.fake_latency_ms if args.fake_supabase else None,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "seed": args.seed,
+        },
+        **results,
+    }
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nResults saved to {args.out}")
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.threshold)
+        if regressions:
+            raise SystemExit(f"{regressions} route(s) regressed by more than {args.threshold}% at p95")
+
+
+if __name__ == "__main__":
+    main()
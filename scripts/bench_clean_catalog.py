@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark catalog cleaning on a synthetic Longdan-style feed.
+
+Generates a seeded CSV with the raw feed's columns (repeating product types
+and tag sets, unique names) and times `clean_catalog` over it, plus the
+category matcher on its own against the original per-rule substring scan.
+The compiled matcher's output is checked against the legacy implementation
+on every sampled row.
+
+Runs offline: no Supabase, DeepSeek or network access is needed.
+
+Usage:
+    uv run python scripts/bench_clean_catalog.py --rows 1000000
+    uv run python scripts/bench_clean_catalog.py --rows 200000 --csv /tmp/feed.csv --keep
+    uv run python scripts/bench_clean_catalog.py --workers 1 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.clean_longdan_dataset import (  # noqa: E402
+    CANONICAL_RULES,
+    FALLBACK_CATEGORY,
+    clean_catalog,
+    guess_row_category,
+)
+
+FIELDS = [
+    "sku", "product_title", "variant_title", "vendor", "product_type", "tags",
+    "price", "image_url", "product_handle",
+]
+
+PRODUCT_TYPES = [
+    "Instant Noodles", "Rice Vermicelli", "Soy Sauce", "Chilli Paste", "Cooking Oil",
+    "Snacks", "Biscuits", "Dried Mushrooms", "Frozen Dumplings", "Bubble Tea",
+    "Fresh Vegetables", "Frozen Seafood", "Bakery", "Household", "Wholesale",
+    "Kitchenware", "Gifts", "Incense", "", "Seasonal",
+]
+TAGS = [
+    "badge_wholesale", "vegan", "halal", "spicy", "chilled", "frozen", "gluten free",
+    "new", "sale", "korean", "japanese", "vietnamese", "thai", "chinese", "bestseller",
+]
+WORDS = [
+    "premium", "classic", "spicy", "original", "golden", "mini", "family", "sweet",
+    "crispy", "tofu", "mango", "lychee", "pork", "chicken", "prawn", "seaweed",
+    "kimchi", "miso", "jasmine", "black", "green", "garlic", "ginger", "sesame",
+]
+VENDORS = ["Nongshim", "Lee Kum Kee", "Mama", "Nissin", "Lotte", "Itoen", "Wai Wai", "Longdan"]
+SIZES = ["400g", "1kg", "250ml", "1.5l", "12 x 85g", "case of 24", "pack of 6", ""]
+
+
+def legacy_guess_category(name_blob: str) -> str:
+    """The original per-rule `any(keyword in lower)` scan, kept as the reference."""
+    lower = name_blob.lower()
+    for category, keywords in CANONICAL_RULES:
+        if any(keyword in lower for keyword in keywords):
+            return category
+    return FALLBACK_CATEGORY
+
+
+def generate_feed(path: Path, rows: int, seed: int) -> None:
+    rng = random.Random(seed)
+    # A few hundred distinct tag sets, like a real feed
+    tag_sets = [",".join(rng.sample(TAGS, rng.randint(0, 4))) for _ in range(300)]
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(FIELDS)
+        for i in range(rows):
+            words = " ".join(rng.sample(WORDS, 3)).title()
+            size = rng.choice(SIZES)
+            title = f"{rng.choice(VENDORS)} {words} {size}".strip()
+            handle_slug = title.lower().replace(" ", "-")
+            writer.writerow([
+                f"LD-{i:08d}",
+                title,
+                rng.choice(["Default Title", "Default Title", size or "Default Title"]),
+                rng.choice(VENDORS),
+                rng.choice(PRODUCT_TYPES),
+                rng.choice(tag_sets),
+                f"{rng.uniform(0.5, 40):.2f}",
+                "" if rng.random() < 0.02 else f"https://cdn.example.com/{i}.jpg",
+                handle_slug,
+            ])
+
+
+def bench_matcher(path: Path, sample: int) -> Dict:
+    rows: List[Dict[str, str]] = []
+    with path.open(newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            rows.append(row)
+            if len(rows) >= sample:
+                break
+    triples = [(row["product_type"], row["tags"], row["product_title"]) for row in rows]
+
+    start = time.perf_counter()
+    legacy = [legacy_guess_category(" ".join(triple)) for triple in triples]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [guess_row_category(*triple) for triple in triples]
+    compiled_s = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy, compiled) if a != b)
+    return {
+        "rows": len(triples),
+        "legacy_s": round(legacy_s, 3),
+        "compiled_s": round(compiled_s, 3),
+        "speedup": round(legacy_s / compiled_s, 2) if compiled_s else None,
+        "mismatches": mismatches,
+    }
+
+
+def bench_clean(path: Path, workers: int) -> Dict:
+    start = time.perf_counter()
+    rows, summary = clean_catalog(path, workers=workers)
+    elapsed = time.perf_counter() - start
+    return {
+        "workers": workers,
+        "rows": summary["total_rows"],
+        "unique_skus": len(rows),
+        "wall_s": round(elapsed, 3),
+        "rows_per_s": round(summary["total_rows"] / elapsed) if elapsed else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Longdan catalog cleaning.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic feed size")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the feed")
+    parser.add_argument("--csv", type=Path, help="Feed path (generated if missing)")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated feed")
+    parser.add_argument("--matcher-sample", type=int, default=200_000, help="Rows used for the matcher comparison")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="Process counts to time clean_catalog with")
+    parser.add_argument("--out", type=Path, help="Write results JSON here")
+    args = parser.parse_args()
+
+    path = args.csv or Path(tempfile.gettempdir()) / f"longdan_bench_{args.rows}_{args.seed}.csv"
+    generated = False
+    if not path.exists():
+        print(f"Generating {args.rows:,} rows into {path}...")
+        generate_feed(path, args.rows, args.seed)
+        generated = True
+
+    try:
+        results = {
+            "feed": {"path": str(path), "rows": args.rows, "seed": args.seed},
+            "matcher": bench_matcher(path, args.matcher_sample),
+            "clean_catalog": [bench_clean(path, workers) for workers in args.workers],
+        }
+    finally:
+        if generated and not args.keep:
+            path.unlink(missing_ok=True)
+
+    print(json.dumps(results, indent=2))
+    if results["matcher"]["mismatches"]:
+        print("❌ Compiled matcher disagrees with the legacy rules")
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if results["matcher"]["mismatches"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF rendering for every WMS document type.
+
+Each DocumentGenerator subclass is rendered with synthetic data at several
+line-item counts. Every case runs in a fresh process so peak RSS is per case.
+Results (wall time, peak RSS, output size, pages and pages/sec) are written as
+JSON and can be compared against a previous run to catch regressions.
+
+Runs offline: no Supabase or network access is needed.
+
+Usage:
+    uv run python scripts/bench_documents.py --out bench/documents_$(git rev-parse --short HEAD).json
+    uv run python scripts/bench_documents.py --sizes 10 1000 --compare bench/documents_baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_SIZES = [10, 1000, 10000]
+PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+def _items(count: int, build: Callable[[int], Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [build(i) for i in range(count)]
+
+
+def _address(name: str) -> Dict[str, str]:
+    return {
+        "name": name,
+        "address_line1": "123 Warehouse Road",
+        "city": "Sample City",
+        "state": "CA",
+        "postal_code": "12345",
+        "country": "USA",
+    }
+
+
+def _sku(i: int) -> str:
+    return f"SKU-{i:06d}"
+
+
+def _name(i: int) -> str:
+    return f"Synthetic Product {i} - 500g Pack"
+
+
+def _lot(i: int) -> str:
+    return f"LOT-{20260101 + i % 28}-{i % 97:02d}"
+
+
+def build_po_receipt(n: int) -> Dict[str, Any]:
+    now = datetime.now()
+    return {
+        "po_number": "PO-BENCH",
+        "vendor": "Bench Vendor",
+        "received_date": now,
+        "receiver": "Bench",
+        "items": _items(n, lambda i: {
+            "sku": _sku(i),
+            "name": _name(i),
+            "ordered_qty": 100,
+            "received_qty": 100 - i % 3,
+            "lot_number": _lot(i),
+            "expiration_date": (now + timedelta(days=30 + i % 60)).strftime("%Y-%m-%d"),
+            "condition": "Good",
+        }),
+        "notes": "Synthetic benchmark data",
+    }
+
+
+def build_receiving_report(n: int) -> Dict[str, Any]:
+    now = datetime.now()
+    receipts = _items(n, lambda i: {
+        "po_number": f"PO-{i:06d}",
+        "vendor": f"Vendor {i % 50}",
+        "items_count": 1 + i % 12,
+        "total_quantity": 10 + i % 200,
+        "received_time": now,
+    })
+    return {
+        "report_id": "RR-BENCH",
+        "report_date": now,
+        "period": "Daily",
+        "start_date": now - timedelta(days=1),
+        "end_date": now,
+        "receipts": receipts,
+        "summary": {
+            "total_receipts": len(receipts),
+            "total_items": sum(r["items_count"] for r in receipts),
+            "total_quantity": sum(r["total_quantity"] for r in receipts),
+        },
+    }
+
+
+def build_putaway_report(n: int) -> Dict[str, Any]:
+    return {
+        "report_id": "PR-BENCH",
+        "date": datetime.now(),
+        "operator": "Bench",
+        "items": _items(n, lambda i: {
+            "sku": _sku(i),
+            "name": _name(i),
+            "lot_number": _lot(i),
+            "quantity": 10 + i % 90,
+            "from_location": "Receiving",
+            "to_location": f"A-{i % 80:02d}",
+            "status": "Completed",
+        }),
+    }
+
+
+def build_inventory_report(n: int) -> Dict[str, Any]:
+    items = _items(n, lambda i: {
+        "sku": _sku(i),
+        "name": _name(i),
+        "category": f"Category {i % 12}",
+        "quantity": 10 + i % 190,
+        "unit": "pack",
+        "location": f"A-{i % 80:02d}",
+    })
+    return {
+        "report_date": datetime.now(),
+        "warehouse": "Bench Warehouse",
+        "items": items,
+        "summary": {"total_items": len(items), "total_quantity": sum(i["quantity"] for i in items)},
+    }
+
+
+def build_stock_status(n: int) -> Dict[str, Any]:
+    return {
+        "report_date": datetime.now(),
+        "items": _items(n, lambda i: {
+            "sku": _sku(i),
+            "name": _name(i),
+            "quantity": i % 120,
+            "safe_stock": 40,
+            "reorder_point": 40,
+            "status": ("normal", "low", "critical")[i % 3],
+        }),
+    }
+
+
+def build_cycle_count(n: int) -> Dict[str, Any]:
+    items = _items(n, lambda i: {
+        "sku": _sku(i),
+        "name": _name(i),
+        "location": f"A-{i % 80:02d}",
+        "system_qty": 50,
+        "counted_qty": 50 + (1 if i % 3 == 0 else 0),
+        "variance": 1 if i % 3 == 0 else 0,
+    })
+    variances = sum(1 for item in items if item["variance"])
+    return {
+        "count_id": "CC-BENCH",
+        "count_date": datetime.now(),
+        "counter": "Bench",
+        "items": items,
+        "summary": {
+            "items_counted": len(items),
+            "variances_found": variances,
+            "accuracy_rate": (len(items) - variances) / len(items) * 100 if items else 0,
+        },
+    }
+
+
+def build_pick_list(n: int) -> Dict[str, Any]:
+    return {
+        "order_number": "ORD-BENCH",
+        "pick_date": datetime.now(),
+        "picker": "Bench",
+        "priority": "Normal",
+        "items": _items(n, lambda i: {
+            "sku": _sku(i),
+            "name": _name(i),
+            "quantity": 1 + i % 10,
+            "location": f"A-{i % 80:02d}",
+            "lot_number": _lot(i),
+        }),
+    }
+
+
+def build_packing_slip(n: int) -> Dict[str, Any]:
+    return {
+        "order_number": "ORD-BENCH",
+        "packing_date": datetime.now(),
+        "ship_to": _address("Bench Customer"),
+        "items": _items(n, lambda i: {"sku": _sku(i), "name": _name(i), "quantity": 1 + i % 5}),
+        "tracking_number": "TRK-BENCH",
+        "carrier": "Express Delivery",
+    }
+
+
+def build_shipping_label(n: int) -> Dict[str, Any]:
+    return {
+        "tracking_number": "TRK0000000001",
+        "carrier": "Express Delivery",
+        "service_level": "Next Day",
+        "ship_date": datetime.now(),
+        "from_address": _address("HeySalad Warehouse"),
+        "to_address": _address("Bench Customer"),
+        "weight": 5.5,
+        "dimensions": "12x10x8 inches",
+    }
+
+
+def build_bill_of_lading(n: int) -> Dict[str, Any]:
+    return {
+        "bol_number": "BOL-BENCH",
+        "shipment_date": datetime.now(),
+        "carrier": "Express Freight",
+        "shipper": _address("HeySalad Warehouse"),
+        "consignee": _address("Bench Customer"),
+        "items": _items(n, lambda i: {"description": _name(i), "quantity": 1 + i % 20, "weight": 0.5 * (1 + i % 20)}),
+    }
+
+
+# document class name -> (module, data builder, scales with line items)
+DOCUMENTS = {
+    "POReceiptDocument": ("backend.services.receiving_documents", build_po_receipt, True),
+    "ReceivingReportDocument": ("backend.services.receiving_documents", build_receiving_report, True),
+    "PutawayReportDocument": ("backend.services.receiving_documents", build_putaway_report, True),
+    "InventoryReportDocument": ("backend.services.inventory_documents", build_inventory_report, True),
+    "StockStatusReportDocument": ("backend.services.inventory_documents", build_stock_status, True),
+    "CycleCountReportDocument": ("backend.services.inventory_documents", build_cycle_count, True),
+    "PickListDocument": ("backend.services.fulfillment_documents", build_pick_list, True),
+    "PackingSlipDocument": ("backend.services.fulfillment_documents", build_packing_slip, True),
+    "ShippingLabelDocument": ("backend.services.fulfillment_documents", build_shipping_label, False),
+    "BillOfLadingDocument": ("backend.services.fulfillment_documents", build_bill_of_lading, True),
+}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(document: str, items: int) -> Dict[str, Any]:
+    """Render one document in the current process and measure it."""
+    import importlib
+
+    module_name, build, _ = DOCUMENTS[document]
+    generator_class = getattr(importlib.import_module(module_name), document)
+    data = build(items)
+    baseline_rss = _peak_rss_mb()
+
+    start = time.perf_counter()
+    pdf_bytes = generator_class(company_name="Bench WMS").generate_pdf(data)
+    wall = time.perf_counter() - start
+
+    pages = len(PAGE_PATTERN.findall(pdf_bytes))
+    return {
+        "document": document,
+        "items": items,
+        "wall_s": round(wall, 4),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rss_growth_mb": round(_peak_rss_mb() - baseline_rss, 1),
+        "bytes": len(pdf_bytes),
+        "pages": pages,
+        "pages_per_s": round(pages / wall, 2) if wall > 0 else None,
+    }
+
+
+def run_isolated(document: str, items: int) -> Dict[str, Any]:
+    """Run a case in a fresh interpreter so peak RSS is not shared between cases."""
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_case, document, items).result()
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: Path, threshold: float) -> int:
+    """Print per-case deltas against a previous run; return number of regressions."""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = {(r["document"], r["items"]): r for r in baseline.get("results", [])}
+    regressions = 0
+
+    print(f"\nComparison with {baseline_path} ({baseline.get('meta', {}).get('git_revision')})")
+    print(f"{'document':<28}{'items':>7}{'wall Δ%':>10}{'rss Δ%':>10}{'bytes Δ%':>10}")
+    for result in results:
+        old = previous.get((result["document"], result["items"]))
+        if not old:
+            continue
+        deltas = []
+        for key in ("wall_s", "peak_rss_mb", "bytes"):
+            deltas.append((result[key] - old[key]) / old[key] * 100 if old[key] else 0.0)
+        flag = ""
+        if deltas[0] > threshold:
+            regressions += 1
+            flag = "  ⚠️ slower"
+        print(f"{result['document']:<28}{result['items']:>7}{deltas[0]:>+10.1f}{deltas[1]:>+10.1f}{deltas[2]:>+10.1f}{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark WMS document rendering.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Line-item counts to render")
+    parser.add_argument("--documents", nargs="+", choices=sorted(DOCUMENTS), help="Only benchmark these document classes")
+    parser.add_argument("--out", type=Path, help="Write JSON results to this path")
+    parser.add_argument("--compare", type=Path, help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Wall-time regression threshold in percent")
+    parser.add_argument("--in-process", action="store_true", help="Skip per-case subprocesses (faster, shared RSS)")
+
+    args = parser.parse_args()
+    runner = run_case if args.in_process else run_isolated
+
+    results = []
+    for document in args.documents or list(DOCUMENTS):
+        _, _, scales = DOCUMENTS[document]
+        for size in (args.sizes if scales else [1]):
+            result = runner(document, size)
+            results.append(result)
+            print(
+                f"{document:<28}{size:>7} items  {result['wall_s']:>8.3f}s  "
+                f"{result['pages']:>5} pages  {result['pages_per_s'] or 0:>8.1f} pages/s  "
+                f"{result['bytes'] / 1024:>9.1f} KiB  {result['peak_rss_mb']:>7.1f} MiB",
+                flush=True,
+            )
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "isolated": not args.in_process,
+        },
+        "results": results,
+    }
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nResults saved to {args.out}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            raise SystemExit(f"{regressions} case(s) regressed by more than {args.threshold}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Build resized WebP/JPEG derivatives of catalog images and record them in the
+image index so dashboards can load thumbnails instead of full-size originals.
+
+Derivatives are written to a local directory laid out exactly like the storage
+bucket (`<prefix>/<size>/<name>.<ext>`); pass --bucket to upload them to
+Supabase Storage afterwards. The updated index (with a `variants` entry per SKU)
+is what `backend/catalog_assets.py` reads to serve size-appropriate URLs.
+
+Usage:
+    uv run python scripts/build_catalog_derivatives.py \
+        --image-index ../heysalad-datasource/longdan_image_index.json \
+        --source-dir ../heysalad-datasource/images \
+        --out-dir ./catalog_derivatives
+"""
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import requests
+from PIL import Image, ImageOps
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_INDEX = Path("/home/admin/heysalad-datasource/longdan_image_index.json")
+DEFAULT_OUT_DIR = Path("catalog_derivatives")
+DEFAULT_BUCKET = os.getenv("CATALOG_IMAGE_BUCKET", "catalog-images")
+DEFAULT_PREFIX = "derivatives"
+DEFAULT_SIZES = (64, 256, 1024)
+DEFAULT_FORMATS = ("webp", "jpeg")
+
+FORMAT_EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+FORMAT_CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+Task = Tuple[str, Dict[str, str], Optional[str], str, str, Sequence[int], Sequence[str], int]
+
+
+def _sanitize_component(value: str) -> str:
+    normalized = unicodedata.normalize("NFKD", value or "")
+    ascii_value = normalized.encode("ascii", "ignore").decode("ascii")
+    ascii_value = re.sub(r"[^A-Za-z0-9_-]+", "-", ascii_value)
+    return re.sub(r"-{2,}", "-", ascii_value).strip("-")
+
+
+def derivative_path(prefix: str, size: int, sku: str, fmt: str) -> str:
+    # Sanitising is lossy (ABC.1 and ABC-1 both become ABC-1); the raw-SKU hash keeps paths distinct
+    digest = hashlib.sha1(sku.encode("utf-8")).hexdigest()[:8]
+    name = f"{_sanitize_component(sku) or 'product'}-{digest}"
+    return f"{prefix.strip('/')}/{size}/{name}.{FORMAT_EXTENSIONS[fmt]}".strip("/")
+
+
+def load_source(meta: Dict[str, str], source_dir: Optional[str]) -> bytes:
+    """Read the original from the local mirror, falling back to its source URL."""
+    filename = meta.get("image_filename")
+    if source_dir and filename:
+        candidate = Path(source_dir) / filename
+        if candidate.is_file():
+            return candidate.read_bytes()
+    resp = requests.get(meta["image_url"], timeout=30)
+    resp.raise_for_status()
+    return resp.content
+
+
+def _encode(image: Image.Image, fmt: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "jpeg":
+        if image.mode in ("RGBA", "LA", "P"):
+            rgba = image.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.split()[-1])
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        image.save(buffer, "WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def render_derivatives(task: Task) -> Tuple[str, Optional[Dict], Optional[str]]:
+    """Resize one image to every size/format; runs in a worker process."""
+    sku, meta, source_dir, out_dir, prefix, sizes, formats, quality = task
+    try:
+        original = Image.open(io.BytesIO(load_source(meta, source_dir)))
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+        variants: Dict[str, Dict[str, Dict]] = {}
+        for size in sorted(sizes):
+            resized = original.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            for fmt in formats:
+                data = _encode(resized, fmt, quality)
+                path = derivative_path(prefix, size, sku, fmt)
+                target = Path(out_dir) / path
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(data)
+                variants.setdefault(str(size), {})[fmt] = {
+                    "path": path,
+                    "width": resized.width,
+                    "height": resized.height,
+                    "bytes": len(data),
+                }
+        return sku, variants, None
+    except Exception as exc:  # noqa: BLE001
+        return sku, None, str(exc)
+
+
+def upload_derivatives(out_dir: Path, paths: List[str], bucket: str) -> None:
+    from backend.database_supabase import get_supabase_client
+
+    storage = get_supabase_client().storage
+    for path in paths:
+        ext = path.rsplit(".", 1)[-1]
+        fmt = "webp" if ext == "webp" else "jpeg"
+        storage.from_(bucket).upload(
+            path,
+            (out_dir / path).read_bytes(),
+            {"content-type": FORMAT_CONTENT_TYPES[fmt], "upsert": "true"},
+        )
+
+
+def build_derivatives(
+    index_path: Path,
+    out_dir: Path,
+    source_dir: Optional[Path],
+    prefix: str,
+    sizes: Sequence[int],
+    formats: Sequence[str],
+    quality: int,
+    workers: int,
+    limit: Optional[int],
+) -> Dict[str, Dict]:
+    index = json.loads(index_path.read_text(encoding="utf-8"))
+    tasks: List[Task] = []
+    for sku, meta in index.items():
+        if not meta.get("image_url"):
+            continue
+        tasks.append((
+            sku,
+            meta,
+            str(source_dir) if source_dir else None,
+            str(out_dir),
+            prefix,
+            tuple(sizes),
+            tuple(formats),
+            quality,
+        ))
+        if limit and len(tasks) >= limit:
+            break
+
+    total = len(tasks)
+    done = errors = 0
+    derivative_bytes = 0
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for sku, variants, error in executor.map(render_derivatives, tasks, chunksize=8):
+            done += 1
+            if error:
+                errors += 1
+                print(f"❌ {sku} failed: {error}")
+            else:
+                index[sku]["variants"] = variants
+                smallest = variants[str(min(sizes))]
+                derivative_bytes += min(v["bytes"] for v in smallest.values())
+            if done % 100 == 0:
+                print(f"Processed {done}/{total} (❌ {errors})")
+
+    print(f"\nDone! Total: {total}, Built: {total - errors}, Errors: {errors}")
+    if total - errors:
+        avg = derivative_bytes / (total - errors)
+        print(f"Average {min(sizes)}px thumbnail: {avg / 1024:.1f} KiB")
+    return index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build WebP/JPEG thumbnails for catalog images.")
+    parser.add_argument("--image-index", type=Path, default=DEFAULT_INDEX, help="Path to longdan_image_index.json")
+    parser.add_argument("--out-index", type=Path, help="Where to write the index with variants (default: overwrite --image-index)")
+    parser.add_argument("--source-dir", type=Path, help="Local directory of originals named by image_filename (else download image_url)")
+    parser.add_argument("--out-dir", type=Path, default=DEFAULT_OUT_DIR, help="Local directory standing in for the storage bucket")
+    parser.add_argument("--prefix", default=DEFAULT_PREFIX, help="Path prefix for derivatives inside the bucket")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="Comma-separated bounding-box sizes in px")
+    parser.add_argument("--formats", default=",".join(DEFAULT_FORMATS), help="Comma-separated output formats (webp,jpeg)")
+    parser.add_argument("--quality", type=int, default=80, help="Encoder quality (1-100)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Worker processes")
+    parser.add_argument("--limit", type=int, help="Only process the first N records (debugging)")
+    parser.add_argument("--bucket", help=f"Upload derivatives to this Supabase Storage bucket (e.g. {DEFAULT_BUCKET})")
+
+    args = parser.parse_args()
+    if not args.image_index.exists():
+        raise SystemExit(f"Image index not found: {args.image_index}")
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    formats = [fmt.strip().lower() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in FORMAT_EXTENSIONS]
+    if unknown:
+        raise SystemExit(f"Unsupported formats: {', '.join(unknown)}")
+
+    index = build_derivatives(
+        args.image_index,
+        args.out_dir,
+        args.source_dir,
+        args.prefix,
+        sizes,
+        formats,
+        args.quality,
+        args.workers,
+        args.limit,
+    )
+
+    out_index = args.out_index or args.image_index
+    out_index.write_text(json.dumps(index, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Index with variants saved to {out_index}")
+
+    if args.bucket:
+        paths = []
+        for sku, meta in index.items():
+            for formats_by_size in (meta.get("variants") or {}).values():
+                for variant in formats_by_size.values():
+                    if (args.out_dir / variant["path"]).is_file():
+                        paths.append(variant["path"])
+                    else:
+                        print(f"⚠️ {sku}: {variant['path']} not found in {args.out_dir}; skipping upload")
+        print(f"☁️ Uploading {len(paths)} derivatives to {args.bucket}...")
+        upload_derivatives(args.out_dir, paths, args.bucket)
+
+
+if __name__ == "__main__":
+    main()
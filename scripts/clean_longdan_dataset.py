@@ -6,22 +6,28 @@ Outputs:
 1. A normalized CSV with canonical categories, packaging data, and image references
 2. A JSON summary (category/vendor distributions, missing images, etc.)
 3. An image index JSON so other services can stage uploads
+4. Optionally, a columnar Parquet/Arrow copy of (1) for fast re-reads (needs pyarrow)
 
 Optional flags let you:
 - Limit the number of processed rows for quick tests
 - Call DeepSeek to refine category mappings for ambiguous source categories
+- Re-clean only new/changed rows (--incremental) and emit a changeset for the importer
 - Upload the cleaned artifacts to Supabase Storage (requires service key)
 """
 
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import csv
+import hashlib
+import io
 import json
 import os
 import re
 from collections import Counter, defaultdict
 from dataclasses import asdict, dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
@@ -31,13 +37,22 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from backend.database_supabase import get_supabase_client
-
 DEFAULT_SOURCE = Path("/home/admin/heysalad-datasource/longdan_inventory.csv")
 DEFAULT_OUT_DIR = Path("/home/admin/heysalad-datasource")
 DEFAULT_CLEAN_CSV = DEFAULT_OUT_DIR / "longdan_inventory_clean.csv"
 DEFAULT_SUMMARY = DEFAULT_OUT_DIR / "longdan_inventory_clean_summary.json"
 DEFAULT_IMAGE_INDEX = DEFAULT_OUT_DIR / "longdan_image_index.json"
+DEFAULT_STATE = DEFAULT_OUT_DIR / "longdan_clean_state.json"
+DEFAULT_CHANGESET = DEFAULT_OUT_DIR / "longdan_inventory_changeset.json"
+DEFAULT_CLEAN_PARQUET = DEFAULT_OUT_DIR / "longdan_inventory_clean.parquet"
+DEFAULT_DEEPSEEK_CACHE = DEFAULT_OUT_DIR / "longdan_deepseek_categories.json"
+
+# Upper bounds on one DeepSeek request (raw categories, prompt characters)
+DEEPSEEK_BATCH_SIZE = int(os.getenv("DEEPSEEK_BATCH_SIZE", "200"))
+DEEPSEEK_BATCH_CHARS = int(os.getenv("DEEPSEEK_BATCH_CHARS", "8000"))
+
+# Bump when clean_row() changes output for unchanged input; invalidates incremental state
+CLEANER_VERSION = 1
 
 CANONICAL_RULES: List[Tuple[str, Sequence[str]]] = [
     ("Noodles & Rice", ("nood", "ramen", "udon", "rice", "pho", "vermicelli", "bun ", "bun-", "bee hoon")),
@@ -73,6 +88,10 @@ UNIT_PATTERN = re.compile(r"(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>kg|g|ml|l|ltrs|l
 CASE_PATTERN = re.compile(r"(case|pack|box)\s*(of)?\s*(\d+)", re.IGNORECASE)
 SERVING_PATTERN = re.compile(r"(\d+)\s*x\s*(\d+)", re.IGNORECASE)
 
+# Low-cardinality text columns stored dictionary-encoded in columnar output
+DICTIONARY_COLUMNS = ("canonical_category", "subcategory", "department", "vendor")
+COLUMNAR_SUFFIXES = (".parquet", ".arrow", ".feather")
+
 
 @dataclass
 class CleanedRow:
@@ -121,12 +140,127 @@ def derive_temperature(tags: str, category_blob: str) -> str:
     return "Ambient"
 
 
+FALLBACK_CATEGORY = "Pantry & Misc"
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex for a set of literals with shared prefixes factored out (longest match wins)."""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class CategoryMatcher:
+    """
+    All CANONICAL_RULES keywords compiled into one prefix-trie regex.
+
+    The regex finds non-overlapping (longest) keyword hits in a single C-level
+    scan.
+    Keywords hidden by a hit (contained in it, or starting inside it and
+    running past its end) are resolved from tables built at compile time, so
+    the lowest rule priority over *all* occurrences is still found. That is
+    exactly the first-rule-with-any-keyword semantics of the rule list.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, Sequence[str]]]):
+        self.categories = [category for category, _ in rules]
+        self.priority: Dict[str, int] = {}
+        for index, (_, keywords) in enumerate(rules):
+            for keyword in keywords:
+                self.priority.setdefault(keyword, index)
+
+        keywords = sorted(self.priority, key=len, reverse=True)
+        self.max_keyword = len(keywords[0]) if keywords else 1
+        # patterns[n] only looks for keywords of the first n rules
+        self.patterns = [
+            re.compile(_trie_pattern(k for k in keywords if self.priority[k] < limit))
+            for limit in range(len(rules) + 1)
+        ]
+
+        # For each keyword: best priority among keywords inside it, and the
+        # keywords that start inside it but extend past its end
+        self.contained: Dict[str, int] = {}
+        self.straddling: Dict[str, List[Tuple[str, int, int]]] = {}
+        for hit in keywords:
+            best = self.priority[hit]
+            straddling = []
+            for other, priority in self.priority.items():
+                if other == hit:
+                    continue
+                for offset in range(len(hit)):
+                    tail = hit[offset:]
+                    if tail.startswith(other):
+                        best = min(best, priority)
+                    elif other.startswith(tail):
+                        straddling.append((other, offset, priority))
+            self.contained[hit] = best
+            self.straddling[hit] = [entry for entry in straddling if entry[2] < best]
+
+    def best(self, lower: str, below: Optional[int] = None) -> Optional[int]:
+        """Priority of the best rule matching already-lowercased text.
+
+        With `below`, only rules ranked above it are considered (the caller
+        already has a match of that priority), which is a smaller regex.
+        """
+        if below == 0:
+            return None
+        pattern = self.patterns[len(self.categories) if below is None else below]
+        best = None
+        for match in pattern.finditer(lower):
+            hit = match.group()
+            priority = self.contained[hit]
+            for other, offset, other_priority in self.straddling[hit]:
+                if other_priority < priority and lower.startswith(other, match.start() + offset):
+                    priority = other_priority
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return best
+
+    def category(self, priority: Optional[int]) -> str:
+        return self.categories[priority] if priority is not None else FALLBACK_CATEGORY
+
+
+CATEGORY_MATCHER = CategoryMatcher(CANONICAL_RULES)
+
+
 def guess_category(name_blob: str) -> str:
-    lower = name_blob.lower()
-    for category, keywords in CANONICAL_RULES:
-        if any(keyword in lower for keyword in keywords):
-            return category
-    return "Pantry & Misc"
+    return CATEGORY_MATCHER.category(CATEGORY_MATCHER.best(name_blob.lower()))
+
+
+@lru_cache(maxsize=65536)
+def _prefix_match(product_type: str, tags: str) -> Tuple[Optional[int], str]:
+    """Best priority within "<product_type> <tags> " plus its tail for boundary scans."""
+    prefix = f"{product_type} {tags} ".lower()
+    overlap = CATEGORY_MATCHER.max_keyword - 1
+    return CATEGORY_MATCHER.best(prefix), prefix[len(prefix) - overlap:]
+
+
+def guess_row_category(product_type: str, tags: str, name: str) -> str:
+    """
+    Same result as guess_category(" ".join([product_type, tags, name])).
+
+    product_type/tags repeat across many rows, so that prefix is matched once
+    and memoized; per row only the name (led by the prefix's last few
+    characters, for keywords straddling the join) is scanned, and only for
+    rules that would beat the prefix's match.
+    """
+    prefix_priority, tail = _prefix_match(product_type, tags)
+    priority = CATEGORY_MATCHER.best(tail + name.lower(), below=prefix_priority)
+    return CATEGORY_MATCHER.category(prefix_priority if priority is None else priority)
 
 
 def extract_unit_info(text: str) -> Tuple[Optional[str], Optional[str]]:
@@ -196,6 +330,77 @@ def call_deepseek(raw_categories: Sequence[str]) -> Dict[str, str]:
         raise RuntimeError(f"DeepSeek response was not valid JSON:\n{content}")
 
 
+def canonical_rules_hash() -> str:
+    """Short hash of CANONICAL_RULES; cached DeepSeek mappings are only valid for it."""
+    payload = json.dumps(CANONICAL_RULES, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def load_category_cache(path: Path) -> Dict[str, str]:
+    """Raw category → canonical mappings from earlier DeepSeek runs ({} if stale/missing)."""
+    if not path.exists():
+        return {}
+    try:
+        cache = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        print(f"⚠️ Ignoring unreadable DeepSeek cache {path}: {exc}")
+        return {}
+    if cache.get("rules") != canonical_rules_hash():
+        return {}
+    return cache.get("mappings") or {}
+
+
+def save_category_cache(path: Path, mappings: Dict[str, str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(
+        json.dumps({"rules": canonical_rules_hash(), "mappings": mappings}, indent=2, ensure_ascii=False, sort_keys=True),
+        encoding="utf-8",
+    )
+    os.replace(tmp, path)
+
+
+def _deepseek_batches(raw_categories: Sequence[str]) -> Iterable[List[str]]:
+    batch: List[str] = []
+    chars = 0
+    for raw in raw_categories:
+        if batch and (len(batch) >= DEEPSEEK_BATCH_SIZE or chars + len(raw) + 1 > DEEPSEEK_BATCH_CHARS):
+            yield batch
+            batch, chars = [], 0
+        batch.append(raw)
+        chars += len(raw) + 1
+    if batch:
+        yield batch
+
+
+def refine_categories(raw_categories: Iterable[str], cache_path: Path) -> Dict[str, str]:
+    """
+    Map raw categories to canonical ones, asking DeepSeek only about unseen ones.
+
+    Only answers from the canonical list are cached (persisted after each
+    batch); categories DeepSeek skipped or answered with an unknown name stay
+    unmapped, so a truncated reply is asked again on the next run.
+    """
+    mappings = load_category_cache(cache_path)
+    wanted = set(raw_categories)
+    unseen = sorted(wanted - mappings.keys())
+    if unseen:
+        allowed = {rule[0] for rule in CANONICAL_RULES} | {FALLBACK_CATEGORY}
+        for batch in _deepseek_batches(unseen):
+            answers = call_deepseek(batch)
+            for raw in batch:
+                answer = answers.get(raw)
+                if answer in allowed:
+                    mappings[raw] = answer
+            save_category_cache(cache_path, mappings)
+        unanswered = sum(1 for raw in unseen if raw not in mappings)
+        print(
+            f"🤖 DeepSeek mapped {len(unseen) - unanswered} new categories "
+            f"({len(wanted) - len(unseen)} cached, {unanswered} unanswered)"
+        )
+    return {raw: mappings[raw] for raw in wanted if raw in mappings}
+
+
 def ensure_bucket(storage, bucket_name: str) -> None:
     try:
         storage.create_bucket(bucket_name)
@@ -212,107 +417,330 @@ def upload_file(storage, bucket: str, path: str, data: bytes, content_type: str)
     )
 
 
+MISSING_IMAGE_SAMPLES = 200
+UNCATEGORIZED_SAMPLES = 3
+
+
+def clean_row(row: Dict[str, str]) -> Optional[CleanedRow]:
+    """Clean one raw feed row; returns None for rows without a SKU."""
+    sku = (row.get("sku") or "").strip()
+    if not sku:
+        return None
+
+    name = (row.get("product_title") or "").strip() or sku
+    variant = (row.get("variant_title") or "").strip()
+    if variant and variant.lower() != "default title" and variant.lower() not in name.lower():
+        name = f"{name} - {variant}"
+
+    product_type = row.get("product_type") or ""
+    tags = clean_tags(row.get("tags", ""))
+    canonical = guess_row_category(product_type, tags, name)
+    unit_size, unit = extract_unit_info(name)
+
+    price = 0.0
+    try:
+        price = float(row.get("price") or 0)
+    except ValueError:
+        price = 0.0
+
+    return CleanedRow(
+        sku=sku,
+        name=name,
+        canonical_category=canonical,
+        subcategory=product_type.strip() or canonical,
+        department=DEPARTMENT_MAP.get(canonical, "Pantry"),
+        vendor=normalize_vendor(row.get("vendor", "")),
+        price=round(price, 2),
+        currency="GBP",
+        is_wholesale="wholesale" in product_type.lower() or "badge_wholesale" in tags.lower(),
+        case_size=extract_case_size(name),
+        unit_size=unit_size,
+        unit=unit or "unit",
+        temperature_zone=derive_temperature(tags, product_type),
+        tags=tags,
+        image_url=(row.get("image_url") or "").strip(),
+        image_filename=build_image_filename(row.get("product_handle") or sku, sku),
+        source_url=f"https://longdan.co.uk/products/{row.get('product_handle')}",
+    )
+
+
+class CleanResult:
+    """Cleaned rows plus the per-row counters that feed the summary.
+
+    Rows are keyed by SKU with last-SKU-wins values in first-seen order, so
+    merging results of consecutive chunks in order gives exactly what a
+    single pass over the whole file would.
+    """
+
+    def __init__(self):
+        self.rows: Dict[str, CleanedRow] = {}
+        self.total_rows = 0
+        self.missing_images: List[str] = []
+        self.raw_uncategorized: Counter[str] = Counter()
+        self.uncategorized_samples: Dict[str, List[str]] = defaultdict(list)
+
+    def add(
+        self,
+        raw: Dict[str, str],
+        carried: Optional[CleanedRow] = None,
+        was_uncategorized: bool = False,
+    ) -> bool:
+        """Clean and record one raw row; returns whether it was uncategorized.
+
+        `carried` is the previous run's cleaned row for an unchanged input; it
+        is used as-is (including any DeepSeek refinement), and
+        `was_uncategorized` says whether the rules had left it uncategorized.
+        """
+        self.total_rows += 1
+        row = carried or clean_row(raw)
+        if row is None:
+            return False
+        if not row.image_url and len(self.missing_images) < MISSING_IMAGE_SAMPLES:
+            self.missing_images.append(row.sku)
+        uncategorized = was_uncategorized if carried else row.canonical_category == FALLBACK_CATEGORY
+        if uncategorized:
+            raw_cat = (raw.get("product_type") or "Unknown").strip() or "Unknown"
+            self.raw_uncategorized[raw_cat] += 1
+            samples = self.uncategorized_samples[raw_cat]
+            if len(samples) < UNCATEGORIZED_SAMPLES:
+                samples.append(row.name)
+        self.rows[row.sku] = row
+        return uncategorized
+
+    def merge(self, other: "CleanResult") -> None:
+        self.total_rows += other.total_rows
+        self.rows.update(other.rows)
+        room = MISSING_IMAGE_SAMPLES - len(self.missing_images)
+        self.missing_images.extend(other.missing_images[:max(room, 0)])
+        self.raw_uncategorized.update(other.raw_uncategorized)
+        for raw_cat, names in other.uncategorized_samples.items():
+            samples = self.uncategorized_samples[raw_cat]
+            samples.extend(names[:UNCATEGORIZED_SAMPLES - len(samples)])
+
+
+class MisalignedChunk(ValueError):
+    """A byte-range chunk did not start on a record boundary (e.g. quoted newlines)."""
+
+
+def _byte_ranges(source: Path, parts: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Split the data section of a CSV into line-aligned byte ranges."""
+    with source.open("rb") as handle:
+        header_line = handle.readline()
+        data_start = handle.tell()
+        size = os.fstat(handle.fileno()).st_size
+        step = max(1, (size - data_start) // parts)
+
+        bounds = [data_start]
+        for index in range(1, parts):
+            # Seek one byte back so a boundary that already sits on a line start is kept
+            handle.seek(data_start + index * step - 1)
+            handle.readline()
+            position = handle.tell()
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+        bounds.append(size)
+
+    header = next(csv.reader([header_line.decode("utf-8")]))
+    return header, list(zip(bounds[:-1], bounds[1:]))
+
+
+def _clean_byte_range(task: Tuple[str, List[str], int, int]) -> CleanResult:
+    path, header, start, end = task
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        text = handle.read(end - start).decode("utf-8")
+
+    result = CleanResult()
+    for raw in csv.DictReader(io.StringIO(text, newline=""), fieldnames=header):
+        if None in raw or None in raw.values():
+            raise MisalignedChunk(f"Malformed row in chunk at bytes {start}-{end}")
+        result.add(raw)
+    return result
+
+
+def _clean_parallel(source: Path, workers: int) -> CleanResult:
+    header, ranges = _byte_ranges(source, workers * 4)
+    tasks = [(str(source), header, start, end) for start, end in ranges]
+
+    merged = CleanResult()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() yields in submission order, keeping the merge deterministic
+        for result in executor.map(_clean_byte_range, tasks):
+            merged.merge(result)
+    return merged
+
+
 def clean_catalog(
     source: Path,
     limit: Optional[int] = None,
     use_deepseek: bool = False,
+    workers: int = 1,
+    deepseek_cache: Path = DEFAULT_DEEPSEEK_CACHE,
 ) -> Tuple[List[CleanedRow], Dict]:
-    cleaned: Dict[str, CleanedRow] = {}
-    summary = {
-        "total_rows": 0,
-        "unique_skus": 0,
-        "missing_images": [],
-        "category_counts": {},
-        "department_counts": {},
-        "vendor_counts": {},
-        "uncategorized_samples": defaultdict(list),
-    }
+    result = None
+    if workers > 1 and not limit:
+        try:
+            result = _clean_parallel(source, workers)
+        except MisalignedChunk as exc:
+            print(f"⚠️ {exc}; falling back to a single-process pass")
 
-    raw_uncategorized: Counter[str] = Counter()
+    if result is None:
+        result = CleanResult()
+        with source.open(newline="", encoding="utf-8") as handle:
+            for raw in csv.DictReader(handle):
+                result.add(raw)
+                if limit and len(result.rows) >= limit:
+                    break
+
+    return _finish(result, use_deepseek, deepseek_cache)
 
-    with source.open(newline="", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            summary["total_rows"] += 1
-            sku = (row.get("sku") or "").strip()
-            if not sku:
-                continue
-
-            name = (row.get("product_title") or "").strip() or sku
-            variant = (row.get("variant_title") or "").strip()
-            if variant and variant.lower() != "default title" and variant.lower() not in name.lower():
-                name = f"{name} - {variant}"
-
-            vendor = normalize_vendor(row.get("vendor", ""))
-            tags = clean_tags(row.get("tags", ""))
-            image_url = (row.get("image_url") or "").strip()
-            if not image_url:
-                summary["missing_images"].append(sku)
-
-            text_blob = " ".join([row.get("product_type") or "", tags, name])
-            canonical = guess_category(text_blob)
-            if canonical == "Pantry & Misc":
-                raw_cat = (row.get("product_type") or "Unknown").strip() or "Unknown"
-                raw_uncategorized[raw_cat] += 1
-                if len(summary["uncategorized_samples"][raw_cat]) < 3:
-                    summary["uncategorized_samples"][raw_cat].append(name)
-            department = DEPARTMENT_MAP.get(canonical, "Pantry")
-
-            unit_size, unit = extract_unit_info(name)
-            case_size = extract_case_size(name)
-
-            price = 0.0
-            try:
-                price = float(row.get("price") or 0)
-            except ValueError:
-                price = 0.0
-
-            cleaned_row = CleanedRow(
-                sku=sku,
-                name=name,
-                canonical_category=canonical,
-                subcategory=(row.get("product_type") or "").strip() or canonical,
-                department=department,
-                vendor=vendor,
-                price=round(price, 2),
-                currency="GBP",
-                is_wholesale="wholesale" in (row.get("product_type") or "").lower() or "badge_wholesale" in tags.lower(),
-                case_size=case_size,
-                unit_size=unit_size,
-                unit=unit or "unit",
-                temperature_zone=derive_temperature(tags, row.get("product_type") or ""),
-                tags=tags,
-                image_url=image_url,
-                image_filename=build_image_filename(row.get("product_handle") or sku, sku),
-                source_url=f"https://longdan.co.uk/products/{row.get('product_handle')}",
-            )
-
-            cleaned[sku] = cleaned_row
-
-            if limit and len(cleaned) >= limit:
-                break
 
-    # Optional DeepSeek refinement
-    if use_deepseek and raw_uncategorized:
-        overrides = call_deepseek(raw_uncategorized.keys())
+def _finish(result: CleanResult, use_deepseek: bool, deepseek_cache: Path) -> Tuple[List[CleanedRow], Dict]:
+    cleaned = result.rows
+
+    # Optional DeepSeek refinement (only rows the rules left uncategorized)
+    pending = any(row.canonical_category == FALLBACK_CATEGORY for row in cleaned.values())
+    if use_deepseek and result.raw_uncategorized and pending:
+        overrides = refine_categories(result.raw_uncategorized.keys(), deepseek_cache)
         for sku, row in cleaned.items():
-            if row.canonical_category == "Pantry & Misc":
+            if row.canonical_category == FALLBACK_CATEGORY:
                 new_cat = overrides.get(row.subcategory) or overrides.get(row.canonical_category)
-                if new_cat:
+                if new_cat and new_cat != FALLBACK_CATEGORY:
                     cleaned[sku] = CleanedRow(
                         **{**asdict(row), "canonical_category": new_cat, "department": DEPARTMENT_MAP.get(new_cat, row.department)}
                     )
 
-    summary["unique_skus"] = len(cleaned)
-    summary["category_counts"] = Counter(row.canonical_category for row in cleaned.values())
-    summary["department_counts"] = Counter(row.department for row in cleaned.values())
-    summary["vendor_counts"] = Counter(row.vendor for row in cleaned.values())
-    summary["missing_images"] = summary["missing_images"][:200]
-    summary["uncategorized_samples"] = dict(summary["uncategorized_samples"])
+    summary = {
+        "total_rows": result.total_rows,
+        "unique_skus": len(cleaned),
+        "missing_images": result.missing_images,
+        "category_counts": Counter(row.canonical_category for row in cleaned.values()),
+        "department_counts": Counter(row.department for row in cleaned.values()),
+        "vendor_counts": Counter(row.vendor for row in cleaned.values()),
+        "uncategorized_samples": dict(result.uncategorized_samples),
+    }
 
     return list(cleaned.values()), summary
 
 
+def rules_fingerprint() -> str:
+    """Hash of everything besides the row itself that shapes a cleaned row."""
+    payload = json.dumps(
+        {"version": CLEANER_VERSION, "rules": CANONICAL_RULES, "departments": DEPARTMENT_MAP},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def row_fingerprint(raw: Dict[str, str]) -> str:
+    blob = "\x1f".join(value or "" for value in raw.values())
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def load_clean_state(path: Path) -> Dict[str, List]:
+    """Per-SKU `[fingerprint, uncategorized]` from the last run, or {} if stale/missing."""
+    if not path.exists():
+        return {}
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        print(f"⚠️ Ignoring unreadable clean state {path}: {exc}")
+        return {}
+    if state.get("rules") != rules_fingerprint():
+        print("♻️ Cleaning rules changed since the last run; re-cleaning every row")
+        return {}
+    return state.get("rows") or {}
+
+
+def save_clean_state(path: Path, source: Path, rows: Dict[str, List]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(
+        json.dumps({"rules": rules_fingerprint(), "source": str(source), "rows": rows}, separators=(",", ":")),
+        encoding="utf-8",
+    )
+    os.replace(tmp, path)
+
+
+def _optional_int(value: str) -> Optional[int]:
+    return int(value) if value else None
+
+
+def read_clean_csv(path: Path) -> Dict[str, CleanedRow]:
+    """Load a cleaned CSV written by write_csv() back into CleanedRow objects."""
+    rows: Dict[str, CleanedRow] = {}
+    if not path.exists():
+        return rows
+    with path.open(newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        if next(reader, None) != list(CleanedRow.__annotations__):
+            print(f"⚠️ {path} does not match the current cleaned layout; re-cleaning every row")
+            return rows
+        for record in reader:
+            row = CleanedRow(*record)
+            row.price = float(row.price or 0)
+            row.is_wholesale = row.is_wholesale == "True"
+            row.case_size = _optional_int(row.case_size)
+            row.unit_size = row.unit_size or None
+            rows[row.sku] = row
+    return rows
+
+
+def clean_catalog_incremental(
+    source: Path,
+    state_path: Path,
+    previous_csv: Path,
+    use_deepseek: bool = False,
+    deepseek_cache: Path = DEFAULT_DEEPSEEK_CACHE,
+) -> Tuple[List[CleanedRow], Dict, Dict, Dict[str, List]]:
+    """
+    Re-clean only rows whose raw content changed since the last run.
+
+    Unchanged rows are carried forward from `previous_csv` (the last run's
+    cleaned output). Returns the full cleaned rows, the summary, a changeset
+    of added/changed rows and removed SKUs relative to that output, and the
+    fingerprints to pass to save_clean_state() once the outputs are written.
+    """
+    state = load_clean_state(state_path)
+    previous = read_clean_csv(previous_csv)
+
+    result = CleanResult()
+    fingerprints: Dict[str, List] = {}
+    reused = 0
+    with source.open(newline="", encoding="utf-8") as handle:
+        for raw in csv.DictReader(handle):
+            sku = (raw.get("sku") or "").strip()
+            fingerprint = row_fingerprint(raw)
+            seen = state.get(sku)
+            carried = previous.get(sku) if seen and seen[0] == fingerprint else None
+            uncategorized = result.add(raw, carried=carried, was_uncategorized=bool(carried and seen[1]))
+            if sku:
+                fingerprints[sku] = [fingerprint, int(uncategorized)]
+                reused += carried is not None
+
+    rows, summary = _finish(result, use_deepseek, deepseek_cache)
+
+    upserts = [asdict(row) for row in rows if previous.get(row.sku) != row]
+    removed = [sku for sku in previous if sku not in result.rows]
+    added = sum(1 for row in upserts if row["sku"] not in previous)
+    changeset = {
+        "source": str(source),
+        "rules": rules_fingerprint(),
+        "counts": {
+            "added": added,
+            "changed": len(upserts) - added,
+            "removed": len(removed),
+            "unchanged": len(rows) - len(upserts),
+            "reused_rows": reused,
+        },
+        "upserts": upserts,
+        "removed": removed,
+    }
+    return rows, summary, changeset, fingerprints
+
+
 def write_csv(rows: Iterable[CleanedRow], path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     fieldnames = list(CleanedRow.__annotations__.keys())
@@ -323,12 +751,173 @@ def write_csv(rows: Iterable[CleanedRow], path: Path) -> None:
             writer.writerow(asdict(row))
 
 
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise RuntimeError("pyarrow is required for Parquet/Arrow catalogs (uv sync --extra columnar)") from exc
+    return pyarrow
+
+
+def catalog_schema():
+    pa = _pyarrow()
+    types = {
+        "price": pa.float64(),
+        "is_wholesale": pa.bool_(),
+        "case_size": pa.int32(),
+    }
+    fields = []
+    for name in CleanedRow.__annotations__:
+        if name in DICTIONARY_COLUMNS:
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(name, types.get(name, pa.string())))
+    return pa.schema(fields)
+
+
+def write_columnar(rows: Sequence[CleanedRow], path: Path) -> None:
+    """Write cleaned rows as Parquet (`.parquet`) or an Arrow IPC file (`.arrow`/`.feather`)."""
+    pa = _pyarrow()
+    schema = catalog_schema()
+    columns = []
+    for field in schema:
+        values = [getattr(row, field.name) for row in rows]
+        if pa.types.is_dictionary(field.type):
+            columns.append(pa.array(values, pa.string()).dictionary_encode())
+        else:
+            columns.append(pa.array(values, field.type))
+    table = pa.Table.from_arrays(columns, schema=schema)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, path, compression="zstd", use_dictionary=list(DICTIONARY_COLUMNS))
+    else:
+        import pyarrow.feather as feather
+
+        # Uncompressed so read_catalog_table() can memory-map it without decoding
+        feather.write_feather(table, path, compression="uncompressed")
+
+
+def read_catalog_table(path: Path, columns: Optional[Sequence[str]] = None):
+    """Load a cleaned catalog (Parquet, Arrow IPC or CSV) as a pyarrow Table."""
+    _pyarrow()
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, columns=columns, read_dictionary=list(DICTIONARY_COLUMNS))
+    if path.suffix in (".arrow", ".feather"):
+        import pyarrow.feather as feather
+
+        return feather.read_table(path, columns=columns, memory_map=True)
+
+    import pyarrow.csv as pacsv
+
+    schema = catalog_schema()
+    table = pacsv.read_csv(
+        path,
+        convert_options=pacsv.ConvertOptions(
+            column_types={field.name: field.type for field in schema},
+            include_columns=columns,
+            strings_can_be_null=False,
+        ),
+    )
+    return table
+
+
+def summarize_catalog(table, previous: Optional[Dict] = None) -> Dict:
+    """
+    Rebuild the summary's SKU-level figures from a catalog table, column-wise.
+
+    `total_rows` (raw rows, duplicates included) and `uncategorized_samples`
+    (keyed by raw product type) describe the source CSV, so they are carried
+    over from `previous` (the existing summary). Without one they are
+    approximated from the catalog: its row count, and the uncategorized SKUs
+    grouped by subcategory.
+    """
+    import pyarrow.compute as pc
+
+    no_image = pc.equal(pc.fill_null(table.column("image_url"), ""), "")
+    counts: Dict = {
+        "unique_skus": table.num_rows,
+        "missing_images": table.filter(no_image).column("sku").slice(0, MISSING_IMAGE_SAMPLES).to_pylist(),
+    }
+    for key, column in (
+        ("category_counts", "canonical_category"),
+        ("department_counts", "department"),
+        ("vendor_counts", "vendor"),
+    ):
+        values = pc.value_counts(table.column(column).combine_chunks())
+        counts[key] = Counter(
+            dict(zip(values.field("values").to_pylist(), values.field("counts").to_pylist()))
+        )
+
+    previous = previous or {}
+    if "uncategorized_samples" in previous:
+        samples = previous["uncategorized_samples"]
+    else:
+        samples = defaultdict(list)
+        fallback = table.filter(pc.equal(table.column("canonical_category"), FALLBACK_CATEGORY))
+        for subcategory, name in zip(fallback.column("subcategory").to_pylist(), fallback.column("name").to_pylist()):
+            raw_cat = subcategory if subcategory and subcategory != FALLBACK_CATEGORY else "Unknown"
+            if len(samples[raw_cat]) < UNCATEGORIZED_SAMPLES:
+                samples[raw_cat].append(name)
+        samples = dict(samples)
+    return {
+        "total_rows": previous.get("total_rows", table.num_rows),
+        **counts,
+        "uncategorized_samples": samples,
+    }
+
+
 def write_json(data: Dict, path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
 
 
+def write_summary(summary: Dict, path: Path) -> None:
+    write_json(
+        {
+            **summary,
+            "category_counts": summary["category_counts"].most_common(),
+            "department_counts": summary["department_counts"].most_common(),
+            "vendor_counts": summary["vendor_counts"].most_common(50),
+        },
+        path,
+    )
+
+
+def write_image_index(rows: Iterable[CleanedRow], path: Path) -> None:
+    # The same file also carries `variants` (build_catalog_derivatives.py) and
+    # `storage_path`/`sha256` (sync_catalog_images.py); refresh only our keys,
+    # and drop those derived keys when the image URL has changed
+    existing: Dict[str, Dict] = {}
+    if path.exists():
+        try:
+            existing = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            print(f"⚠️ Could not read existing image index {path}; rebuilding it")
+
+    image_index = {}
+    for row in rows:
+        if not row.image_url:
+            continue
+        entry = dict(existing.get(row.sku) or {})
+        if entry.get("image_url") != row.image_url:
+            entry = {}
+        entry.update({
+            "image_url": row.image_url,
+            "image_filename": row.image_filename,
+            "source_url": row.source_url,
+        })
+        image_index[row.sku] = entry
+    write_json(image_index, path)
+
+
 def export_to_storage(clean_path: Path, summary_path: Path, image_index_path: Path, bucket: str) -> None:
+    from backend.database_supabase import get_supabase_client
+
     supabase = get_supabase_client()
     storage = supabase.storage
     ensure_bucket(storage, bucket)
@@ -344,33 +933,66 @@ def main() -> None:
     parser.add_argument("--out-csv", type=Path, default=DEFAULT_CLEAN_CSV, help="Path for cleaned CSV output")
     parser.add_argument("--summary-json", type=Path, default=DEFAULT_SUMMARY, help="Where to write dataset summary JSON")
     parser.add_argument("--image-index", type=Path, default=DEFAULT_IMAGE_INDEX, help="Where to write SKU→image map JSON")
+    parser.add_argument("--columnar", type=Path, help=f"Also write a .parquet or .arrow copy of the cleaned CSV (e.g. {DEFAULT_CLEAN_PARQUET.name})")
+    parser.add_argument("--summarize", type=Path, help="Only rebuild --summary-json from an existing cleaned catalog (.parquet/.arrow/.csv)")
     parser.add_argument("--limit", type=int, help="Limit number of rows (debugging)")
     parser.add_argument("--use-deepseek", action="store_true", help="Consult DeepSeek for hard-to-map categories")
+    parser.add_argument("--deepseek-cache", type=Path, default=DEFAULT_DEEPSEEK_CACHE, help="Persistent raw→canonical category cache for --use-deepseek")
+    parser.add_argument("--workers", type=int, default=1, help="Clean byte-range chunks in N processes (ignored with --limit)")
+    parser.add_argument("--incremental", action="store_true", help="Re-clean only rows changed since the last --incremental run")
+    parser.add_argument("--state", type=Path, default=DEFAULT_STATE, help="Per-SKU fingerprint state for --incremental")
+    parser.add_argument("--changeset", type=Path, default=DEFAULT_CHANGESET, help="Where --incremental writes added/changed/removed rows")
     parser.add_argument("--upload-storage", help="Supabase Storage bucket name to upload cleaned artifacts")
 
     args = parser.parse_args()
-    rows, summary = clean_catalog(args.source, limit=args.limit, use_deepseek=args.use_deepseek)
+    if args.columnar and args.columnar.suffix not in COLUMNAR_SUFFIXES:
+        raise SystemExit(f"--columnar must end in one of {', '.join(COLUMNAR_SUFFIXES)}")
 
-    write_csv(rows, args.out_csv)
-    write_json(
-        {
-            **summary,
-            "category_counts": summary["category_counts"].most_common(),
-            "department_counts": summary["department_counts"].most_common(),
-            "vendor_counts": summary["vendor_counts"].most_common(50),
-        },
-        args.summary_json,
-    )
-    image_index = {
-        row.sku: {
-            "image_url": row.image_url,
-            "image_filename": row.image_filename,
-            "source_url": row.source_url,
-        }
-        for row in rows
-        if row.image_url
-    }
-    write_json(image_index, args.image_index)
+    if args.summarize:
+        previous = None
+        if args.summary_json.exists():
+            try:
+                previous = json.loads(args.summary_json.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                print(f"⚠️ Could not read existing summary {args.summary_json}; approximating source-row fields")
+        summary = summarize_catalog(read_catalog_table(args.summarize), previous)
+        write_summary(summary, args.summary_json)
+        print(f"Summary of {summary['unique_skus']} SKUs from {args.summarize} saved to {args.summary_json}")
+        return
+
+    changeset = None
+    if args.incremental:
+        if args.limit or args.workers > 1:
+            print("⚠️ --limit and --workers are ignored with --incremental")
+        rows, summary, changeset, fingerprints = clean_catalog_incremental(
+            args.source, args.state, args.out_csv,
+            use_deepseek=args.use_deepseek, deepseek_cache=args.deepseek_cache,
+        )
+        write_json(changeset, args.changeset)
+        counts = changeset["counts"]
+        print(
+            f"Changeset: {counts['added']} added, {counts['changed']} changed, "
+            f"{counts['removed']} removed ({counts['reused_rows']} rows carried forward) → {args.changeset}"
+        )
+    else:
+        rows, summary = clean_catalog(
+            args.source, limit=args.limit, use_deepseek=args.use_deepseek, workers=args.workers,
+            deepseek_cache=args.deepseek_cache,
+        )
+
+    unchanged = changeset is not None and not changeset["upserts"] and not changeset["removed"]
+    outputs = [args.out_csv, args.image_index] + ([args.columnar] if args.columnar else [])
+    if unchanged and all(path.exists() for path in outputs):
+        print("No catalog changes; leaving the cleaned outputs as they are")
+    else:
+        write_csv(rows, args.out_csv)
+        write_image_index(rows, args.image_index)
+        if args.columnar:
+            write_columnar(rows, args.columnar)
+            print(f"Columnar catalog saved to {args.columnar}")
+    write_summary(summary, args.summary_json)
+    if changeset is not None:
+        save_clean_state(args.state, args.source, fingerprints)
 
     print(f"Cleaned rows: {len(rows)}")
     print(f"Sample row: {asdict(rows[0]) if rows else 'N/A'}")
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic warehouse workload for load tests and benchmarks.
+
+Produces materials, inventory lots and stock movements at any scale (e.g.
+100k SKUs and 50M movements) with a grocery category mix, long-tail SKU
+popularity, weekly/annual seasonality and category-specific shelf lives.
+Output is deterministic for a given --seed and --end-date.
+
+Targets:
+- sqlite:   the backend's SQLite database (`WAREHOUSE_DB_PATH`, default
+            warehouse.db), written with executemany in large transactions
+- postgres: a Supabase/Postgres database (`DATABASE_URL`) via COPY, using
+            the staging-and-merge helpers in bulk_load_postgres.py
+
+Usage:
+    uv run python scripts/generate_synthetic_data.py --db-path /tmp/bench.db --materials 100000 --records 5000000
+    uv run python scripts/generate_synthetic_data.py --target postgres --materials 100000 --records 50000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import accumulate, islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+DEFAULT_BATCH_SIZE = 50_000
+
+REASONS_IN = ["采购入库", "生产完工入库", "退货入库", "调拨入库"]  # Purchase, Production, Return, Transfer
+REASONS_OUT = ["生产领料", "销售出库", "研发领用", "调拨出库", "返修出库"]  # Production, Sales, R&D, Transfer, Repair
+OPERATORS = ["张三", "李四", "王五", "赵六", "系统"]  # Zhang San, Li Si, Wang Wu, Zhao Liu, System
+
+
+@dataclass(frozen=True)
+class CategoryProfile:
+    name: str
+    share: float  # fraction of SKUs
+    prefix: str
+    unit: str
+    temperature_zone: str
+    shelf_life_days: int
+    peak_month: int  # month of highest demand (1-12)
+    seasonality: float  # amplitude of the annual cycle (0 = flat)
+    words: Tuple[str, ...]
+
+
+CATEGORY_MIX: Tuple[CategoryProfile, ...] = (
+    CategoryProfile("Noodles & Rice", 0.16, "NO", "pack", "Ambient", 540, 1, 0.10, ("Ramen", "Udon", "Jasmine Rice", "Vermicelli", "Pho")),
+    CategoryProfile("Sauces & Condiments", 0.14, "CD", "bottle", "Ambient", 720, 2, 0.15, ("Soy Sauce", "Chilli Oil", "Oyster Sauce", "Miso", "Gochujang")),
+    CategoryProfile("Snacks & Confectionery", 0.15, "SN", "pack", "Ambient", 270, 12, 0.35, ("Rice Crackers", "Pocky", "Seaweed Snack", "Mochi", "Prawn Crackers")),
+    CategoryProfile("Beverages", 0.12, "BV", "bottle", "Ambient", 365, 7, 0.40, ("Bubble Tea", "Green Tea", "Lychee Juice", "Coconut Water", "Soy Milk")),
+    CategoryProfile("Frozen & Chilled", 0.12, "FR", "pack", "Frozen", 180, 12, 0.25, ("Gyoza", "Bao Buns", "Dim Sum", "Fish Balls", "Spring Rolls")),
+    CategoryProfile("Fresh Produce", 0.10, "FP", "kg", "Chilled", 7, 6, 0.30, ("Pak Choi", "Thai Basil", "Lemongrass", "Enoki", "Mango")),
+    CategoryProfile("Meat & Seafood", 0.08, "MS", "kg", "Chilled", 5, 2, 0.20, ("Pork Belly", "King Prawns", "Duck Breast", "Squid", "Beef Brisket")),
+    CategoryProfile("Dried Pantry", 0.08, "DP", "pack", "Ambient", 540, 10, 0.10, ("Shiitake", "Red Beans", "Wood Ear", "Goji Berries", "Kombu")),
+    CategoryProfile("Household & Personal Care", 0.05, "HH", "unit", "Ambient", 1095, 4, 0.05, ("Dish Soap", "Incense", "Rice Bowl", "Chopsticks", "Tea Towel")),
+)
+BRANDS = ("Nongshim", "Lee Kum Kee", "Mama", "Nissin", "Lotte", "Itoen", "Wai Wai", "Longdan", "Amoy", "Kikkoman")
+SIZES = ("200g", "400g", "1kg", "250ml", "500ml", "1.5l", "12 x 85g", "Pack of 6")
+
+
+@dataclass
+class SyntheticMaterial:
+    sku: str
+    name: str
+    category: CategoryProfile
+    quantity: int
+    safe_stock: int
+    location: str
+
+
+def generate_materials(count: int, rng: random.Random) -> List[SyntheticMaterial]:
+    """Materials in category-mix proportions; SKUs are `SYN-<prefix>-<n>`.
+
+    Names end in `#<n>` so they stay unique at any scale: the product routes
+    look materials up by name.
+    """
+    cum_shares = list(accumulate(profile.share for profile in CATEGORY_MIX))
+    materials = []
+    for index in range(count):
+        profile = CATEGORY_MIX[min(bisect.bisect(cum_shares, rng.random() * cum_shares[-1]), len(CATEGORY_MIX) - 1)]
+        safe_stock = rng.randint(10, 80)
+        materials.append(SyntheticMaterial(
+            sku=f"SYN-{profile.prefix}-{index:07d}",
+            name=f"{rng.choice(BRANDS)} {rng.choice(profile.words)} {rng.choice(SIZES)} #{index:07d}",
+            category=profile,
+            quantity=int(safe_stock * rng.uniform(0.3, 4.0)),
+            safe_stock=safe_stock,
+            location=f"{profile.prefix}-{rng.randint(1, 60):02d}",
+        ))
+    return materials
+
+
+def popularity_weights(count: int, rng: random.Random, skew: float = 0.8) -> List[float]:
+    """Zipf-like long tail: a few SKUs move constantly, most rarely."""
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return [1.0 / rank ** skew for rank in ranks]
+
+
+def day_weight(day: date, profiles: Sequence[CategoryProfile]) -> float:
+    """Relative movement volume for a day: quieter Sundays, busier Fridays, annual peaks."""
+    weekday = (0.95, 0.9, 0.95, 1.0, 1.25, 1.1, 0.6)[day.weekday()]
+    seasonal = sum(
+        profile.share * (1 + profile.seasonality * math.cos(2 * math.pi * (day.month - profile.peak_month) / 12))
+        for profile in profiles
+    )
+    return weekday * seasonal
+
+
+def daily_counts(total: int, days: int, end: date) -> List[Tuple[date, int]]:
+    """Split `total` movements over the `days` days before `end` by day_weight()."""
+    dates = [end - timedelta(days=offset) for offset in range(days, 0, -1)]
+    weights = [day_weight(day, CATEGORY_MIX) for day in dates]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in range(total - sum(counts)):
+        counts[index % days] += 1
+    return list(zip(dates, counts))
+
+
+def generate_records(
+    material_keys: Sequence,
+    weights: Sequence[float],
+    total: int,
+    days: int,
+    end: date,
+    rng: random.Random,
+) -> Iterator[Tuple]:
+    """Yield (material key, type, quantity, operator, reason, created_at) in time order."""
+    cum_weights = list(accumulate(weights))
+    total_weight = cum_weights[-1]
+    rand = rng.random
+    pick = bisect.bisect
+    times = [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(7 * 3600, 21 * 3600, 7)]
+    last = len(material_keys) - 1
+    for day, count in daily_counts(total, days, end):
+        prefix = day.isoformat() + " "
+        stamps = sorted(times[int(rand() * len(times))] for _ in range(count))
+        for stamp in stamps:
+            key = material_keys[min(pick(cum_weights, rand() * total_weight), last)]
+            if rand() < 0.45:
+                yield key, "in", 10 + int(rand() * 90), OPERATORS[int(rand() * 5)], REASONS_IN[int(rand() * 4)], prefix + stamp
+            else:
+                yield key, "out", 1 + int(rand() * 24), OPERATORS[int(rand() * 5)], REASONS_OUT[int(rand() * 5)], prefix + stamp
+
+
+def generate_lots(
+    materials: Sequence[SyntheticMaterial],
+    material_keys: Sequence,
+    per_material: int,
+    end: date,
+    rng: random.Random,
+) -> Iterator[Tuple]:
+    """Yield (material key, lot_number, expiration_date, quantity, status) per lot."""
+    for material, key in zip(materials, material_keys):
+        shelf_life = material.category.shelf_life_days
+        for index in range(per_material):
+            received = end - timedelta(days=rng.randint(0, max(shelf_life, 14)))
+            expires = received + timedelta(days=shelf_life)
+            yield (
+                key,
+                f"L{received:%y%m%d}-{material.sku[-7:]}-{index + 1}",
+                expires.isoformat(),
+                rng.randint(5, 200),
+                "active" if expires >= end else "expired",
+            )
+
+
+def batched(rows: Iterable[Tuple], size: int) -> Iterator[List[Tuple]]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+SQLITE_LOTS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS inventory_lots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        material_id INTEGER NOT NULL,
+        lot_number TEXT NOT NULL,
+        expiration_date DATE,
+        quantity INTEGER DEFAULT 0,
+        catch_weight REAL,
+        status TEXT DEFAULT 'active',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (material_id) REFERENCES materials (id)
+    )
+"""
+
+
+def write_sqlite(db_path: Path, materials, args, rng: random.Random) -> Dict[str, int]:
+    import database
+
+    database.DATABASE_PATH = str(db_path)
+    database.init_database()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    conn.execute(SQLITE_LOTS_SCHEMA)
+    if args.reset:
+        conn.executescript("DELETE FROM inventory_records; DELETE FROM inventory_lots; DELETE FROM materials;")
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO materials (name, sku, category, quantity, unit, safe_stock, location) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            # quantity is live stock: re-runs without --reset keep it, like bulk_load_materials
+            "ON CONFLICT (sku) DO UPDATE SET name = excluded.name, category = excluded.category, "
+            "unit = excluded.unit, safe_stock = excluded.safe_stock, location = excluded.location",
+            (
+                (m.name, m.sku, m.category.name, m.quantity, m.category.unit, m.safe_stock, m.location)
+                for m in materials
+            ),
+        )
+    ids_by_sku = dict(conn.execute("SELECT sku, id FROM materials WHERE sku LIKE 'SYN-%'"))
+    material_ids = [ids_by_sku[m.sku] for m in materials]
+
+    lots = 0
+    for batch in batched(generate_lots(materials, material_ids, args.lots_per_material, args.end_date, rng), args.batch_size):
+        with conn:
+            conn.executemany(
+                "INSERT INTO inventory_lots (material_id, lot_number, expiration_date, quantity, status) "
+                "VALUES (?, ?, ?, ?, ?)",
+                batch,
+            )
+        lots += len(batch)
+
+    records = 0
+    weights = popularity_weights(len(materials), rng)
+    rows = generate_records(material_ids, weights, args.records, args.days, args.end_date, rng)
+    for batch in batched(rows, args.batch_size):
+        with conn:
+            conn.executemany(
+                "INSERT INTO inventory_records (material_id, type, quantity, operator, reason, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+        records += len(batch)
+        if records % (args.batch_size * 20) == 0:
+            print(f"  {records:,}/{args.records:,} records", flush=True)
+    conn.close()
+    return {"materials": len(materials), "lots": lots, "records": records}
+
+
+def write_postgres(database_url: str, materials, args, rng: random.Random) -> Dict[str, int]:
+    from scripts.bulk_load_postgres import bulk_load_history, bulk_load_materials, connect, copy_rows
+
+    with connect(database_url) as conn:
+        records_in = (
+            {
+                "name": m.name,
+                "sku": m.sku,
+                "category": m.category.name,
+                "quantity": m.quantity,
+                "unit": m.category.unit,
+                "safe_stock": m.safe_stock,
+                "location": m.location,
+                "unit_of_measure": m.category.unit,
+                "temperature_zone": m.category.temperature_zone,
+            }
+            for m in materials
+        )
+        bulk_load_materials(conn, records_in)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT sku, id FROM materials WHERE sku LIKE 'SYN-%'")
+            ids_by_sku = dict(cursor.fetchall())
+            material_ids = [ids_by_sku[m.sku] for m in materials]
+            lots = copy_rows(
+                cursor,
+                "inventory_lots",
+                ("material_id", "lot_number", "expiration_date", "quantity", "status"),
+                generate_lots(materials, material_ids, args.lots_per_material, args.end_date, rng),
+            )
+        conn.commit()
+
+        weights = popularity_weights(len(materials), rng)
+        rows = generate_records([m.sku for m in materials], weights, args.records, args.days, args.end_date, rng)
+        _, records = bulk_load_history(conn, rows, replica_mode=args.replica_mode)
+    return {"materials": len(materials), "lots": lots, "records": records}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic warehouse dataset for benchmarks.")
+    parser.add_argument("--target", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--db-path", type=Path, default=Path(os.getenv("WAREHOUSE_DB_PATH", "warehouse.db")), help="SQLite file (sqlite target)")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Postgres URL (postgres target)")
+    parser.add_argument("--materials", type=int, default=10_000, help="Number of SKUs")
+    parser.add_argument("--records", type=int, default=1_000_000, help="Number of stock movements")
+    parser.add_argument("--lots-per-material", type=int, default=3, help="Inventory lots per SKU")
+    parser.add_argument("--days", type=int, default=365, help="Days of history")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date.today(), help="Last day of history (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per executemany transaction (sqlite)")
+    parser.add_argument("--reset", action="store_true", help="Delete existing materials, lots and records first (sqlite)")
+    parser.add_argument("--replica-mode", action="store_true", help="Skip FK triggers while merging records (postgres)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    materials = generate_materials(args.materials, rng)
+
+    if args.target == "sqlite":
+        print(f"Writing synthetic data to {args.db_path}...")
+        counts = write_sqlite(args.db_path, materials, args, rng)
+    else:
+        if not args.database_url:
+            raise SystemExit("Set DATABASE_URL or pass --database-url")
+        counts = write_postgres(args.database_url, materials, args, rng)
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"✅ {counts['materials']:,} materials, {counts['lots']:,} lots, {counts['records']:,} records "
+        f"in {elapsed:.1f}s ({counts['records'] / elapsed:,.0f} records/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,28 +5,45 @@ Import the Longdan grocery catalog into the Supabase `materials` table.
 The script converts each Shopify variant row into a HeySalad-friendly material
 record, deriving reasonable default quantities, safe stock levels, and bin
 locations so the WMS dashboards remain meaningful.
+
+Existing materials are fetched first and compared by a content hash, so a
+re-import only writes new and changed SKUs; updates never overwrite the live
+`quantity`. Pass --changeset (written by `clean_longdan_dataset.py
+--incremental`) to consider only rows changed since the last cleaning run.
 """
 
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import csv
 import hashlib
+import json
 import math
+import os
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 # Ensure the project root (so `backend` is importable) is on sys.path
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from backend.database_supabase import get_supabase_client  # noqa: E402
+from scripts.clean_longdan_dataset import (  # noqa: E402
+    COLUMNAR_SUFFIXES,
+    load_category_cache,
+    read_catalog_table,
+)
 
 
 DEFAULT_CSV = ROOT.parent / "heysalad-datasource" / "longdan_inventory_clean.csv"
+# Raw → canonical category mappings cached by clean_longdan_dataset.py --use-deepseek
+CATEGORY_CACHE = Path(
+    os.getenv("LONGDAN_CATEGORY_CACHE", str(DEFAULT_CSV.parent / "longdan_deepseek_categories.json"))
+)
 
 # High-level category groups to drive storage locations
 CATEGORY_ZONE_PREFIX = {
@@ -79,11 +96,18 @@ def parse_bool(value: Optional[str]) -> bool:
     return str(value).strip().lower() in {"true", "1", "yes", "y"}
 
 
+@lru_cache(maxsize=1)
+def _category_overrides() -> Dict[str, str]:
+    return load_category_cache(CATEGORY_CACHE)
+
+
 def normalize_category(value: Optional[str]) -> str:
     if not value:
         return "General Grocery"
     value = value.strip()
-    return value if value else "General Grocery"
+    if not value:
+        return "General Grocery"
+    return _category_overrides().get(value, value)
 
 
 def determine_unit(name: str) -> str:
@@ -228,32 +252,209 @@ def chunked(iterable: List[Dict[str, object]], size: int) -> Iterable[List[Dict[
         yield iterable[idx : idx + size]
 
 
+# Cleaned-catalog columns transform_row() reads
+CATALOG_COLUMNS = ("sku", "name", "canonical_category", "temperature_zone", "unit", "price", "tags")
+
+
+def _columnar_rows(path: Path) -> Iterable[Dict[str, object]]:
+    """Rows of a Parquet/Arrow catalog, loading only the columns the importer needs."""
+    table = read_catalog_table(path, columns=list(CATALOG_COLUMNS))
+    columns = [table.column(name).to_pylist() for name in CATALOG_COLUMNS]
+    for values in zip(*columns):
+        yield dict(zip(CATALOG_COLUMNS, values))
+
+
+def _csv_rows(csv_path: Path) -> Iterable[Dict[str, str]]:
+    with csv_path.open(newline="", encoding="utf-8") as handle:
+        yield from csv.DictReader(handle)
+
+
 def load_materials(csv_path: Path, limit: Optional[int] = None) -> List[Dict[str, object]]:
     materials: Dict[str, MaterialRow] = {}
     total_rows = 0
 
-    with csv_path.open(newline="", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            total_rows += 1
-            material = transform_row(row)
-            if not material:
-                continue
-            materials[material.sku] = material  # Deduplicate by SKU (last occurrence wins)
-            if limit and len(materials) >= limit:
-                break
-
-    print(f"Parsed {total_rows} CSV rows → {len(materials)} unique SKUs")
+    if csv_path.suffix in COLUMNAR_SUFFIXES:
+        reader: Iterable[Dict] = _columnar_rows(csv_path)
+    else:
+        reader = _csv_rows(csv_path)
+    for row in reader:
+        total_rows += 1
+        material = transform_row(row)
+        if not material:
+            continue
+        materials[material.sku] = material  # Deduplicate by SKU (last occurrence wins)
+        if limit and len(materials) >= limit:
+            break
+
+    print(f"Parsed {total_rows} catalog rows → {len(materials)} unique SKUs")
     return [item.to_dict() for item in materials.values()]
 
 
-def import_to_supabase(records: List[Dict[str, object]], batch_size: int) -> None:
+def load_changeset(changeset_path: Path, limit: Optional[int] = None) -> Tuple[List[Dict[str, object]], List[str]]:
+    """Transform a cleaning changeset into material records plus the removed SKUs."""
+    changeset = json.loads(changeset_path.read_text(encoding="utf-8"))
+    materials: Dict[str, MaterialRow] = {}
+    for row in changeset.get("upserts", []):
+        material = transform_row(row)
+        if not material:
+            continue
+        materials[material.sku] = material
+        if limit and len(materials) >= limit:
+            break
+
+    counts = changeset.get("counts", {})
+    print(
+        f"Changeset: {counts.get('added', 0)} added, {counts.get('changed', 0)} changed, "
+        f"{counts.get('removed', 0)} removed → {len(materials)} SKUs to upsert"
+    )
+    return [item.to_dict() for item in materials.values()], list(changeset.get("removed", []))
+
+
+# Columns compared when diffing; `quantity` is live stock and never overwritten
+HASH_FIELDS = ("name", "category", "unit", "safe_stock", "location", "unit_of_measure", "temperature_zone")
+FETCH_PAGE_SIZE = 1000
+DEFAULT_WORKERS = 4
+
+
+def material_hash(record: Dict[str, object]) -> str:
+    payload = "\x1f".join("" if record.get(name) is None else str(record.get(name)) for name in HASH_FIELDS)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def fetch_existing(supabase, with_active: bool = False) -> Dict[str, Tuple[str, bool]]:
+    """Map every existing material SKU to (content hash, is_active), page by page."""
+    columns = ["sku", *HASH_FIELDS] + (["is_active"] if with_active else [])
+    existing: Dict[str, Tuple[str, bool]] = {}
+    start = 0
+    while True:
+        rows = (
+            supabase.table("materials")
+            .select(", ".join(columns))
+            .order("sku")
+            .range(start, start + FETCH_PAGE_SIZE - 1)
+            .execute()
+            .data
+        )
+        if not rows:
+            break
+        for row in rows:
+            existing[row["sku"]] = (material_hash(row), row.get("is_active") is not False)
+        start += len(rows)
+    return existing
+
+
+@dataclass
+class MaterialDiff:
+    inserts: List[Dict[str, object]] = field(default_factory=list)
+    updates: List[Dict[str, object]] = field(default_factory=list)
+    deactivate: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def writes(self) -> int:
+        return len(self.inserts) + len(self.updates) + len(self.deactivate)
+
+
+def diff_materials(
+    records: List[Dict[str, object]],
+    existing: Dict[str, Tuple[str, bool]],
+    soft_delete: bool = False,
+    removed: Optional[Iterable[str]] = None,
+    sku_prefix: str = "",
+) -> MaterialDiff:
+    """
+    Split records into inserts, updates and unchanged SKUs.
+
+    With `soft_delete`, SKUs in `removed` (or, when it is None, every existing
+    SKU starting with `sku_prefix` that is missing from `records`) are marked
+    inactive, and inactive SKUs that are back in the catalog are reactivated.
+    A prefix is required in that case so non-Longdan materials are never touched.
+    """
+    diff = MaterialDiff()
+    seen: Set[str] = set()
+    for record in records:
+        sku = record["sku"]
+        seen.add(sku)
+        current = existing.get(sku)
+        if current is None:
+            diff.inserts.append({**record, "is_active": True} if soft_delete else record)
+            continue
+        content_hash, active = current
+        reactivate = soft_delete and not active
+        if content_hash == material_hash(record) and not reactivate:
+            diff.unchanged += 1
+            continue
+        update = {key: value for key, value in record.items() if key != "quantity"}
+        if soft_delete:
+            update["is_active"] = True
+        diff.updates.append(update)
+
+    if soft_delete:
+        if removed is None:
+            if not sku_prefix:
+                raise ValueError("soft_delete without a changeset needs a sku_prefix")
+            removed = (sku for sku in existing if sku.startswith(sku_prefix))
+        diff.deactivate = sorted(
+            sku for sku in removed if sku not in seen and sku in existing and existing[sku][1]
+        )
+    return diff
+
+
+def _submit(supabase, kind: str, batch: List) -> int:
+    materials = supabase.table("materials")
+    if kind == "deactivate":
+        materials.update({"is_active": False}).in_("sku", batch).execute()
+    else:
+        materials.upsert(batch, on_conflict="sku").execute()
+    return len(batch)
+
+
+def write_diff(supabase, diff: MaterialDiff, batch_size: int, workers: int) -> None:
+    """Submit the diff's batches concurrently; inserts and updates never share a batch."""
+    tasks = [
+        (kind, batch)
+        for kind, items in (("insert", diff.inserts), ("update", diff.updates), ("deactivate", diff.deactivate))
+        for batch in chunked(items, batch_size)
+    ]
+    done = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(_submit, supabase, kind, batch) for kind, batch in tasks]
+        for future in concurrent.futures.as_completed(futures):
+            done += future.result()
+            print(f"Wrote {done}/{diff.writes} rows", flush=True)
+
+
+def import_to_supabase(
+    records: List[Dict[str, object]],
+    batch_size: int,
+    workers: int = DEFAULT_WORKERS,
+    full: bool = False,
+    soft_delete: bool = False,
+    removed: Optional[Iterable[str]] = None,
+    sku_prefix: str = "",
+    dry_run: bool = False,
+) -> MaterialDiff:
+    from backend.database_supabase import get_supabase_client
+
     supabase = get_supabase_client()
-    total = len(records)
-    for idx, batch in enumerate(chunked(records, batch_size), start=1):
-        supabase.table("materials").upsert(batch, on_conflict="sku").execute()
-        processed = min(idx * batch_size, total)
-        print(f"Upserted {processed}/{total} rows", flush=True)
+    if full:
+        # Upsert every record as-is, quantity included
+        diff = MaterialDiff(inserts=list(records))
+    else:
+        existing = fetch_existing(supabase, with_active=soft_delete)
+        diff = diff_materials(records, existing, soft_delete=soft_delete, removed=removed, sku_prefix=sku_prefix)
+        print(
+            f"Diff against {len(existing)} existing SKUs: {len(diff.inserts)} new, "
+            f"{len(diff.updates)} changed, {diff.unchanged} unchanged, {len(diff.deactivate)} to deactivate"
+        )
+
+    if dry_run:
+        print("Dry run enabled; no rows written.")
+    elif diff.writes:
+        write_diff(supabase, diff, batch_size, workers)
+    else:
+        print("Nothing to write; Supabase is already up to date.")
+    return diff
 
 
 def main() -> None:
@@ -264,7 +465,7 @@ def main() -> None:
         "--csv-path",
         type=Path,
         default=DEFAULT_CSV,
-        help="Path to longdan_inventory.csv (defaults to ../../heysalad-datasource/longdan_inventory.csv)",
+        help="Path to the cleaned catalog (.csv, .parquet or .arrow; defaults to ../../heysalad-datasource/longdan_inventory.csv)",
     )
     parser.add_argument(
         "--batch-size",
@@ -277,30 +478,83 @@ def main() -> None:
         type=int,
         help="Optional limit for debugging smaller imports.",
     )
+    parser.add_argument(
+        "--changeset",
+        type=Path,
+        help="Import only the rows in a changeset JSON from clean_longdan_dataset.py --incremental.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of write batches submitted concurrently.",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Skip the diff and upsert every record (also resets quantity to the derived default).",
+    )
+    parser.add_argument(
+        "--soft-delete",
+        action="store_true",
+        help="Set is_active = false on materials that left the catalog (the column must exist).",
+    )
+    parser.add_argument(
+        "--sku-prefix",
+        default="",
+        help="Soft-delete only existing SKUs with this prefix (required with --soft-delete unless --changeset lists the removed SKUs).",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
-        help="Transform the CSV and print a preview without touching Supabase.",
+        help="Transform the CSV and print the diff summary without writing to Supabase.",
     )
 
     args = parser.parse_args()
-    csv_path = args.csv_path.expanduser()
-    if not csv_path.exists():
-        raise SystemExit(f"CSV file not found: {csv_path}")
-
-    records = load_materials(csv_path, limit=args.limit)
-    if not records:
+    if args.soft_delete and args.limit:
+        raise SystemExit("--soft-delete needs the whole catalog; drop --limit")
+    if args.soft_delete and not args.changeset and not args.sku_prefix:
+        raise SystemExit("--soft-delete needs --sku-prefix (or --changeset) so non-Longdan materials are left alone")
+
+    removed: Optional[List[str]] = None
+    if args.changeset:
+        changeset_path = args.changeset.expanduser()
+        if not changeset_path.exists():
+            raise SystemExit(f"Changeset file not found: {changeset_path}")
+        records, removed = load_changeset(changeset_path, limit=args.limit)
+        if removed and not args.soft_delete:
+            print(f"⚠️ {len(removed)} SKUs left the feed; pass --soft-delete to deactivate them")
+    else:
+        csv_path = args.csv_path.expanduser()
+        if not csv_path.exists():
+            raise SystemExit(f"CSV file not found: {csv_path}")
+        records = load_materials(csv_path, limit=args.limit)
+    if not records and not (args.soft_delete and removed):
         print("No valid rows found; exiting.")
         return
 
-    print("Sample payload:", records[0])
+    if records:
+        print("Sample payload:", records[0])
 
-    if args.dry_run:
-        print("Dry run enabled; skipping Supabase import.")
+    try:
+        import_to_supabase(
+            records,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            full=args.full,
+            soft_delete=args.soft_delete,
+            removed=removed,
+            sku_prefix=args.sku_prefix,
+            dry_run=args.dry_run,
+        )
+    except Exception as exc:  # noqa: BLE001
+        if not args.dry_run:
+            raise
+        print(f"⚠️ Could not diff against Supabase ({exc}); dry run shows the transform only.")
         return
 
-    import_to_supabase(records, batch_size=args.batch_size)
-    print("✅ Import complete!")
+    if not args.dry_run:
+        print("✅ Import complete!")
 
 
 if __name__ == "__main__":
@@ -3,6 +3,16 @@
 Mirror Longdan CDN images into Supabase Storage so the frontend can serve
 thumbnails from our own bucket instead of hot-linking the source site.
 
+With --dedupe, objects are stored under their content hash
+(`<prefix>/sha256/ab/<hash>.jpg`), so SKUs sharing a photo point at one object;
+--update-index writes each SKU's `storage_path` back into the image index.
+
+A JSON manifest records, per SKU, the source URL, its ETag/Last-Modified,
+the SHA-256 of the bytes and where they were stored. Re-runs send conditional
+GETs, so an unchanged image costs a single 304 instead of a download and an
+upload, and the manifest is checkpointed as work completes so an interrupted
+run resumes where it stopped.
+
 Usage:
     uv run python scripts/sync_catalog_images.py \
         --image-index ../heysalad-datasource/longdan_image_index.json \
@@ -13,15 +23,24 @@ from __future__ import annotations
 
 import argparse
 import concurrent.futures
+import hashlib
+import io
+import json
 import mimetypes
 import os
 import re
 import sys
+import tempfile
+import threading
+import time
 import unicodedata
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
@@ -32,6 +51,11 @@ from backend.database_supabase import get_supabase_client  # noqa: E402
 DEFAULT_INDEX = Path("/home/admin/heysalad-datasource/longdan_image_index.json")
 DEFAULT_BUCKET = os.getenv("CATALOG_IMAGE_BUCKET", "catalog-images")
 DEFAULT_PREFIX = os.getenv("CATALOG_IMAGE_PREFIX", "products")
+DEFAULT_MANIFEST_NAME = "longdan_image_sync_manifest.json"
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+UPLOAD_ATTEMPTS = 5
+CHECKPOINT_EVERY = 100
 
 
 def ensure_bucket(storage, bucket: str) -> None:
@@ -90,8 +114,6 @@ def build_storage_path(prefix: str, filename: str) -> Optional[str]:
 
 
 def iter_images(index_path: Path, limit: int | None) -> Iterable[Tuple[str, Dict[str, str]]]:
-    import json
-
     data = json.loads(index_path.read_text(encoding="utf-8"))
     count = 0
     for sku, meta in data.items():
@@ -103,19 +125,240 @@ def iter_images(index_path: Path, limit: int | None) -> Iterable[Tuple[str, Dict
             break
 
 
-def fetch_image(url: str, timeout: int = 30) -> Tuple[bytes, str]:
-    resp = requests.get(url, timeout=timeout)
+class SyncManifest:
+    """Per-SKU sync state, checkpointed to disk with atomic replaces."""
+
+    def __init__(self, path: Path, checkpoint_every: int = CHECKPOINT_EVERY):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self.records: Dict[str, Dict] = {}
+        # Content/perceptual hash -> storage path of deduplicated objects
+        self._objects: Dict[str, str] = {}
+        # Claimed paths whose upload is still running -> duplicate records waiting on it
+        self._pending: Dict[str, List[Tuple[str, Dict]]] = {}
+        if path.exists():
+            self.records = json.loads(path.read_text(encoding="utf-8"))
+        for record in self.records.values():
+            self._register(record)
+
+    def _register(self, record: Dict) -> None:
+        if not record.get("dedupe") or not record.get("storage_path") or not record.get("sha256"):
+            return
+        for key in ("sha256", "dhash"):
+            if record.get(key):
+                self._objects.setdefault(f"{key}:{record[key]}", record["storage_path"])
+
+    def claim_object(self, sha256: str, perceptual: Optional[str], path: str) -> Tuple[str, bool]:
+        """Return the storage path holding these bytes (or a look-alike), claiming `path` if none.
+
+        The boolean is True when the caller now owns `path` and must upload it,
+        then report back with `complete_object` or `release_object`. Claims are
+        visible immediately, so concurrent duplicates are not uploaded twice.
+        """
+        keys = [f"sha256:{sha256}"] + ([f"dhash:{perceptual}"] if perceptual else [])
+        with self._lock:
+            for key in keys:
+                if key in self._objects:
+                    return self._objects[key], False
+            for key in keys:
+                self._objects[key] = path
+            self._pending[path] = []
+            return path, True
+
+    def complete_object(self, sku: str, record: Dict) -> None:
+        """Record the owner of a claimed object after its upload, plus the duplicates that waited on it."""
+        with self._lock:
+            waiting = self._pending.pop(record["storage_path"], [])
+            for waiting_sku, waiting_record in [(sku, record)] + waiting:
+                self._update_locked(waiting_sku, waiting_record)
+
+    def update_when_stored(self, sku: str, record: Dict) -> None:
+        """Record a duplicate now, or once the upload of the object it points at has finished."""
+        with self._lock:
+            waiting = self._pending.get(record["storage_path"])
+            if waiting is not None:
+                waiting.append((sku, record))
+            else:
+                self._update_locked(sku, record)
+
+    def release_object(self, path: str) -> None:
+        """Forget a claimed object whose upload failed, so SKUs pointing at it re-sync."""
+        with self._lock:
+            # Duplicates still waiting on the failed upload are dropped and retried next run
+            self._pending.pop(path, None)
+            for key in [key for key, value in self._objects.items() if value == path]:
+                del self._objects[key]
+            for sku, record in self.records.items():
+                if record.get("storage_path") == path:
+                    self.records[sku] = {**record, "sha256": None, "dhash": None,
+                                         "etag": None, "last_modified": None, "checked_at": 0}
+            self._dirty += 1
+
+    def get(self, sku: str) -> Dict:
+        with self._lock:
+            return dict(self.records.get(sku) or {})
+
+    def update(self, sku: str, record: Dict) -> None:
+        with self._lock:
+            self._update_locked(sku, record)
+
+    def _update_locked(self, sku: str, record: Dict) -> None:
+        self.records[sku] = record
+        self._register(record)
+        self._dirty += 1
+        if self._dirty >= self.checkpoint_every:
+            self._save_locked()
+
+    def save(self) -> None:
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(self.records, handle, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._dirty = 0
+
+
+def content_storage_path(prefix: str, digest: str, content_type: str, filename: str) -> str:
+    """Content-addressed object path, shared by every SKU with identical bytes."""
+    ext = mimetypes.guess_extension((content_type or "").split(";")[0].strip())
+    if not ext or ext in (".jpe", ".jfif"):
+        ext = os.path.splitext(filename)[1].lower() or ".jpg"
+    prefix = prefix.strip("/")
+    path = f"sha256/{digest[:2]}/{digest}{ext}"
+    return f"{prefix}/{path}" if prefix else path
+
+
+def dhash(data: bytes, hash_size: int = 8) -> Optional[str]:
+    """64-bit difference hash plus a coarse mean colour.
+
+    Re-encoded or resized copies of a photo collide. The grayscale hash alone
+    also matches colour variants of one pack shot (e.g. flavours), so the
+    average RGB (4 bits per channel) is part of the key; variants of nearly
+    the same colour can still merge.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            rgb = image.convert("RGB")
+            gray = rgb.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+            mean = rgb.resize((1, 1), Image.BOX).getpixel((0, 0))
+    except Exception:  # noqa: BLE001
+        return None
+    pixels = list(gray.getdata())
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    colour = "".join(f"{channel >> 4:x}" for channel in mean)
+    return f"{bits:0{hash_size * hash_size // 4}x}-{colour}"
+
+
+def is_known(record: Dict, url: str, storage_path: str, dedupe: bool) -> bool:
+    """Whether a manifest record describes the current source and layout."""
+    if record.get("source_url") != url:
+        return False
+    if dedupe:
+        return bool(record.get("dedupe"))
+    return record.get("storage_path") == storage_path and not record.get("dedupe")
+
+
+def resolve_object(
+    manifest: SyncManifest,
+    prefix: str,
+    filename: str,
+    digest: str,
+    content_type: str,
+    perceptual: Optional[str],
+) -> Tuple[str, bool]:
+    """Pick the dedupe storage path for downloaded bytes; True if it must be uploaded."""
+    path = content_storage_path(prefix, digest, content_type, filename)
+    return manifest.claim_object(digest, perceptual, path)
+
+
+def write_index_storage_paths(index_path: Path, manifest: SyncManifest) -> int:
+    """Record each synced SKU's storage object (and hash) in the image index."""
+    index = json.loads(index_path.read_text(encoding="utf-8"))
+    updated = 0
+    for sku, meta in index.items():
+        record = manifest.records.get(sku)
+        if not record or not record.get("storage_path"):
+            continue
+        meta["storage_path"] = record["storage_path"]
+        if record.get("sha256"):
+            meta["sha256"] = record["sha256"]
+        updated += 1
+
+    fd, tmp_path = tempfile.mkstemp(dir=index_path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        json.dump(index, handle, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+    return updated
+
+
+def build_session(pool_size: int) -> requests.Session:
+    """Keep-alive session with exponential backoff on transient failures."""
+    retry = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_image(
+    session: requests.Session,
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    timeout: int = 30,
+) -> Optional[Tuple[bytes, str, Optional[str], Optional[str]]]:
+    """Conditionally download an image; returns None when the source answers 304."""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    resp = session.get(url, headers=headers, timeout=timeout)
+    if resp.status_code == 304:
+        return None
     resp.raise_for_status()
     content_type = resp.headers.get("Content-Type") or mimetypes.guess_type(url)[0] or "image/jpeg"
-    return resp.content, content_type
+    return resp.content, content_type, resp.headers.get("ETag"), resp.headers.get("Last-Modified")
 
 
 def upload_image(storage, bucket: str, path: str, data: bytes, content_type: str) -> None:
-    storage.from_(bucket).upload(
-        path,
-        data,
-        {"content-type": content_type, "upsert": "true"},
-    )
+    for attempt in range(UPLOAD_ATTEMPTS):
+        try:
+            storage.from_(bucket).upload(
+                path,
+                data,
+                {"content-type": content_type, "upsert": "true"},
+            )
+            return
+        except Exception:  # noqa: BLE001
+            if attempt == UPLOAD_ATTEMPTS - 1:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
 
 
 def sync_images(
@@ -125,18 +368,26 @@ def sync_images(
     limit: int | None,
     workers: int,
     skip_existing: bool,
-) -> None:
+    manifest_path: Optional[Path] = None,
+    recheck_after: float = 0,
+    dedupe: bool = False,
+    perceptual: bool = False,
+) -> SyncManifest:
     supabase = get_supabase_client()
     storage = supabase.storage
     ensure_bucket(storage, bucket)
 
     prefix = prefix.strip("/")
     uploaded = 0
+    unchanged = 0
+    deduplicated = 0
     skipped = 0
     errors = 0
 
     items = list(iter_images(index_path, limit))
     total = len(items)
+    manifest = SyncManifest(manifest_path or index_path.with_name(DEFAULT_MANIFEST_NAME))
+    session = build_session(workers)
 
     existing_paths = set()
     if skip_existing:
@@ -144,7 +395,7 @@ def sync_images(
         existing_paths = list_existing_paths(storage, bucket, prefix)
         print(f"   Found {len(existing_paths)} existing objects; will skip duplicates.")
 
-    def process(entry: Tuple[str, Dict[str, str]]) -> Tuple[str, bool]:
+    def process(entry: Tuple[str, Dict[str, str]]) -> Tuple[str, Optional[str]]:
         sku, meta = entry
         filename = meta.get("image_filename") or f"{sku}.jpg"
         storage_path = build_storage_path(prefix, filename)
@@ -152,30 +403,103 @@ def sync_images(
             print(f"⚠️ {sku} skipped: invalid storage path for filename '{filename}'")
             return sku, None
 
-        if skip_existing and storage_path in existing_paths:
+        url = meta["image_url"]
+        record = manifest.get(sku)
+        known = is_known(record, url, storage_path, dedupe)
+
+        # Checked recently (e.g. earlier in an interrupted run): no request at all
+        if known and recheck_after and time.time() - record.get("checked_at", 0) < recheck_after:
+            return sku, None
+        if not known and skip_existing and storage_path in existing_paths:
             return sku, None
 
         try:
-            data, content_type = fetch_image(meta["image_url"])
-            upload_image(storage, bucket, storage_path, data, content_type)
-            return sku, True
+            fetched = fetch_image(
+                session,
+                url,
+                etag=record.get("etag") if known else None,
+                last_modified=record.get("last_modified") if known else None,
+            )
+            if fetched is None:
+                manifest.update(sku, {**record, "checked_at": time.time()})
+                return sku, "unchanged"
+
+            data, content_type, etag, last_modified = fetched
+            digest = hashlib.sha256(data).hexdigest()
+            perceptual_hash = dhash(data) if dedupe and perceptual else None
+            status = "unchanged"
+            if known and record.get("sha256") == digest:
+                storage_path = record["storage_path"]
+            elif dedupe:
+                storage_path, needs_upload = resolve_object(
+                    manifest, prefix, filename, digest, content_type, perceptual_hash
+                )
+                if needs_upload:
+                    try:
+                        upload_image(storage, bucket, storage_path, data, content_type)
+                    except Exception:
+                        manifest.release_object(storage_path)
+                        raise
+                    status = "uploaded"
+                else:
+                    status = "deduplicated"
+            else:
+                upload_image(storage, bucket, storage_path, data, content_type)
+                status = "uploaded"
+
+            if dedupe and status == "uploaded":
+                record_update = manifest.complete_object
+            elif status == "deduplicated":
+                record_update = manifest.update_when_stored
+            else:
+                record_update = manifest.update
+            record_update(sku, {
+                "source_url": url,
+                "storage_path": storage_path,
+                "etag": etag,
+                "last_modified": last_modified,
+                "sha256": digest,
+                "dhash": perceptual_hash,
+                "dedupe": dedupe,
+                "bytes": len(data),
+                "content_type": content_type,
+                "synced_at": record.get("synced_at") if status == "unchanged" else datetime.now().isoformat(),
+                "checked_at": time.time(),
+            })
+            return sku, status
         except Exception as exc:  # noqa: BLE001
             print(f"❌ {sku} failed: {exc}")
-            return sku, False
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
-        for sku, ok in executor.map(process, items):
-            if ok is True:
-                uploaded += 1
-            elif ok is False:
-                errors += 1
-            else:
-                skipped += 1
-            processed = uploaded + errors + skipped
-            if processed % 100 == 0:
-                print(f"Processed {processed}/{total} (✅ {uploaded} / ⚠️ {skipped} / ❌ {errors})")
+            return sku, "error"
 
-    print(f"\nDone! Total: {total}, Uploaded: {uploaded}, Skipped: {skipped}, Errors: {errors}")
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for sku, status in executor.map(process, items):
+                if status == "uploaded":
+                    uploaded += 1
+                elif status == "unchanged":
+                    unchanged += 1
+                elif status == "deduplicated":
+                    deduplicated += 1
+                elif status == "error":
+                    errors += 1
+                else:
+                    skipped += 1
+                processed = uploaded + unchanged + deduplicated + errors + skipped
+                if processed % 100 == 0:
+                    print(
+                        f"Processed {processed}/{total} (✅ {uploaded} / ♻️ {unchanged} / 🔗 {deduplicated} "
+                        f"/ ⚠️ {skipped} / ❌ {errors})"
+                    )
+    finally:
+        manifest.save()
+        session.close()
+
+    print(
+        f"\nDone! Total: {total}, Uploaded: {uploaded}, Unchanged: {unchanged}, "
+        f"Deduplicated: {deduplicated}, Skipped: {skipped}, Errors: {errors}"
+    )
+    print(f"Manifest saved to {manifest.path}")
+    return manifest
 
 
 def main() -> None:
@@ -184,21 +508,62 @@ def main() -> None:
     parser.add_argument("--bucket", default=DEFAULT_BUCKET, help="Supabase Storage bucket name")
     parser.add_argument("--prefix", default=DEFAULT_PREFIX, help="Path prefix inside the bucket")
     parser.add_argument("--limit", type=int, help="Only sync the first N records (debugging)")
-    parser.add_argument("--workers", type=int, default=8, help="Download concurrency")
+    parser.add_argument("--workers", type=int, default=8, help="Download concurrency (threads engine)")
+    parser.add_argument("--engine", choices=("threads", "asyncio"), default="threads", help="Transfer engine")
+    parser.add_argument("--download-concurrency", type=int, default=100, help="Concurrent downloads (asyncio engine)")
+    parser.add_argument("--upload-concurrency", type=int, default=32, help="Concurrent uploads (asyncio engine)")
+    parser.add_argument("--per-host", type=int, default=16, help="Max concurrent transfers per host (asyncio engine)")
     parser.add_argument("--skip-existing", action="store_true", help="Skip files that already exist in the target bucket")
+    parser.add_argument("--manifest", type=Path, help=f"Sync manifest path (default: {DEFAULT_MANIFEST_NAME} next to the index)")
+    parser.add_argument("--dedupe", action="store_true", help="Store images by content hash so identical photos are uploaded once")
+    parser.add_argument("--perceptual", action="store_true", help="With --dedupe, also merge look-alike images by dHash and mean colour")
+    parser.add_argument("--update-index", action="store_true", help="Write each SKU's storage_path back into the image index")
+    parser.add_argument(
+        "--recheck-after",
+        type=float,
+        default=6 * 3600,
+        help="Seconds before a synced image is revalidated; 0 always sends a conditional GET",
+    )
 
     args = parser.parse_args()
     if not args.image_index.exists():
         raise SystemExit(f"Image index not found: {args.image_index}")
 
-    sync_images(
-        args.image_index,
-        args.bucket,
-        args.prefix,
-        args.limit,
-        args.workers,
-        args.skip_existing,
-    )
+    if args.engine == "asyncio":
+        from sync_catalog_images_async import sync_images_async
+
+        if args.skip_existing:
+            print("ℹ️ --skip-existing is ignored by the asyncio engine; the manifest tracks synced images.")
+        manifest = sync_images_async(
+            args.image_index,
+            args.bucket,
+            args.prefix,
+            args.limit,
+            args.manifest,
+            args.recheck_after,
+            args.download_concurrency,
+            args.upload_concurrency,
+            args.per_host,
+            dedupe=args.dedupe,
+            perceptual=args.perceptual,
+        )
+    else:
+        manifest = sync_images(
+            args.image_index,
+            args.bucket,
+            args.prefix,
+            args.limit,
+            args.workers,
+            args.skip_existing,
+            args.manifest,
+            args.recheck_after,
+            args.dedupe,
+            args.perceptual,
+        )
+
+    if args.update_index:
+        updated = write_index_storage_paths(args.image_index, manifest)
+        print(f"Recorded storage paths for {updated} SKUs in {args.image_index}")
 
 
 if __name__ == "__main__":
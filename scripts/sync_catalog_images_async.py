@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Asyncio engine for mirroring Longdan CDN images into Supabase Storage.
+
+Downloads and uploads run as two bounded stages connected by a queue, so a
+slow upload never holds a download slot (and vice versa). Every host gets its
+own concurrency cap, bodies are streamed through a spooled temp file while
+being hashed, and uploads go straight to the Storage REST API. Perceptual hashing and
+manifest updates (which may checkpoint to disk) run in worker threads, so
+they never stall the event loop. A single core can keep hundreds of
+transfers in flight.
+
+Shares the manifest format with `sync_catalog_images.py`, so the two engines
+can be used interchangeably on the same catalog.
+
+Usage:
+    uv run python scripts/sync_catalog_images.py --engine asyncio \
+        --download-concurrency 200 --upload-concurrency 64 --per-host 32
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+from sync_catalog_images import (
+    DEFAULT_MANIFEST_NAME,
+    RETRY_STATUSES,
+    SyncManifest,
+    build_storage_path,
+    dhash,
+    is_known,
+    iter_images,
+    resolve_object,
+)
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_MEMORY = 1024 * 1024
+MAX_ATTEMPTS = 5
+
+_DONE = object()
+
+
+class RetryableStatus(Exception):
+    pass
+
+
+class HostLimiter:
+    """Lazily created per-host semaphores."""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def __call__(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        return semaphore
+
+
+async def with_retries(operation, label: str):
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return await operation()
+        except (httpx.TransportError, RetryableStatus) as exc:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            delay = 0.5 * 2 ** attempt
+            print(f"↻ {label}: {exc}; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+def _spool_dhash(spool) -> Optional[str]:
+    spool.seek(0)
+    return dhash(spool.read())
+
+
+async def _iter_file(handle, chunk_size: int = CHUNK_SIZE):
+    handle.seek(0)
+    while True:
+        chunk = handle.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+class AsyncImageSync:
+    def __init__(
+        self,
+        storage_url: str,
+        storage_key: str,
+        bucket: str,
+        prefix: str,
+        manifest: SyncManifest,
+        download_concurrency: int = 100,
+        upload_concurrency: int = 32,
+        per_host: int = 16,
+        recheck_after: float = 0,
+        dedupe: bool = False,
+        perceptual: bool = False,
+    ):
+        self.storage_url = storage_url.rstrip("/")
+        self.storage_headers = {"Authorization": f"Bearer {storage_key}", "apikey": storage_key}
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.manifest = manifest
+        self.download_concurrency = download_concurrency
+        self.upload_concurrency = upload_concurrency
+        self.recheck_after = recheck_after
+        self.dedupe = dedupe
+        self.perceptual = perceptual
+        self.host_limit = HostLimiter(per_host)
+        self.counts = {"uploaded": 0, "unchanged": 0, "deduplicated": 0, "skipped": 0, "errors": 0}
+
+    # ---- download stage -------------------------------------------------
+
+    async def _download(self, client: httpx.AsyncClient, sku: str, url: str, record: Dict, known: bool):
+        headers = {}
+        if known and record.get("etag"):
+            headers["If-None-Match"] = record["etag"]
+        if known and record.get("last_modified"):
+            headers["If-Modified-Since"] = record["last_modified"]
+
+        async def attempt():
+            async with self.host_limit(url):
+                async with client.stream("GET", url, headers=headers) as resp:
+                    if resp.status_code == 304:
+                        return None
+                    if resp.status_code in RETRY_STATUSES:
+                        raise RetryableStatus(f"HTTP {resp.status_code}")
+                    resp.raise_for_status()
+
+                    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+                    digest = hashlib.sha256()
+                    size = 0
+                    try:
+                        async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                            spool.write(chunk)
+                            digest.update(chunk)
+                            size += len(chunk)
+                    except BaseException:
+                        spool.close()
+                        raise
+                    content_type = resp.headers.get("Content-Type") or mimetypes.guess_type(url)[0] or "image/jpeg"
+                    return spool, digest.hexdigest(), size, content_type, resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+        return await with_retries(attempt, sku)
+
+    async def download_worker(self, client: httpx.AsyncClient, items: asyncio.Queue, uploads: asyncio.Queue):
+        while True:
+            entry = await items.get()
+            if entry is _DONE:
+                return
+            sku, meta = entry
+            filename = meta.get("image_filename") or f"{sku}.jpg"
+            storage_path = build_storage_path(self.prefix, filename)
+            if not storage_path:
+                print(f"⚠️ {sku} skipped: invalid storage path for filename '{filename}'")
+                self.counts["skipped"] += 1
+                continue
+
+            url = meta["image_url"]
+            record = self.manifest.get(sku)
+            known = is_known(record, url, storage_path, self.dedupe)
+            if known and self.recheck_after and time.time() - record.get("checked_at", 0) < self.recheck_after:
+                self.counts["skipped"] += 1
+                continue
+
+            try:
+                fetched = await self._download(client, sku, url, record, known)
+            except Exception as exc:  # noqa: BLE001
+                print(f"❌ {sku} failed: {exc}")
+                self.counts["errors"] += 1
+                continue
+
+            if fetched is None:
+                await asyncio.to_thread(self.manifest.update, sku, {**record, "checked_at": time.time()})
+                self.counts["unchanged"] += 1
+                continue
+
+            spool, digest, size, content_type, etag, last_modified = fetched
+            perceptual_hash = None
+            if self.dedupe and self.perceptual:
+                perceptual_hash = await asyncio.to_thread(_spool_dhash, spool)
+
+            needs_upload, status = True, "uploaded"
+            if known and record.get("sha256") == digest:
+                storage_path, needs_upload, status = record["storage_path"], False, "unchanged"
+            elif self.dedupe:
+                storage_path, needs_upload = resolve_object(
+                    self.manifest, self.prefix, filename, digest, content_type, perceptual_hash
+                )
+                status = "deduplicated"
+
+            new_record = {
+                "source_url": url,
+                "storage_path": storage_path,
+                "etag": etag,
+                "last_modified": last_modified,
+                "sha256": digest,
+                "dhash": perceptual_hash,
+                "dedupe": self.dedupe,
+                "bytes": size,
+                "content_type": content_type,
+                "synced_at": record.get("synced_at") if status == "unchanged" else datetime.now().isoformat(),
+                "checked_at": time.time(),
+            }
+            if not needs_upload:
+                spool.close()
+                if status == "deduplicated":
+                    await asyncio.to_thread(self.manifest.update_when_stored, sku, new_record)
+                else:
+                    await asyncio.to_thread(self.manifest.update, sku, new_record)
+                self.counts[status] += 1
+                continue
+
+            await uploads.put((sku, spool, new_record))
+
+    # ---- upload stage ---------------------------------------------------
+
+    async def _upload(self, client: httpx.AsyncClient, sku: str, spool, record: Dict) -> None:
+        url = f"{self.storage_url}/storage/v1/object/{self.bucket}/{quote(record['storage_path'])}"
+        headers = {
+            **self.storage_headers,
+            "Content-Type": record["content_type"],
+            "Content-Length": str(record["bytes"]),
+            "x-upsert": "true",
+        }
+
+        async def attempt():
+            async with self.host_limit(url):
+                resp = await client.post(url, headers=headers, content=_iter_file(spool))
+            if resp.status_code in RETRY_STATUSES:
+                raise RetryableStatus(f"HTTP {resp.status_code}")
+            resp.raise_for_status()
+
+        await with_retries(attempt, sku)
+
+    async def upload_worker(self, client: httpx.AsyncClient, uploads: asyncio.Queue):
+        while True:
+            entry = await uploads.get()
+            if entry is _DONE:
+                return
+            sku, spool, record = entry
+            try:
+                await self._upload(client, sku, spool, record)
+                record["synced_at"] = datetime.now().isoformat()
+                if record.get("dedupe"):
+                    await asyncio.to_thread(self.manifest.complete_object, sku, record)
+                else:
+                    await asyncio.to_thread(self.manifest.update, sku, record)
+                self.counts["uploaded"] += 1
+            except Exception as exc:  # noqa: BLE001
+                print(f"❌ {sku} upload failed: {exc}")
+                if record.get("dedupe"):
+                    self.manifest.release_object(record["storage_path"])
+                self.counts["errors"] += 1
+            finally:
+                spool.close()
+
+    async def ensure_bucket(self, client: httpx.AsyncClient) -> None:
+        resp = await client.post(
+            f"{self.storage_url}/storage/v1/bucket",
+            headers=self.storage_headers,
+            json={"id": self.bucket, "name": self.bucket, "public": True},
+        )
+        if resp.status_code >= 400 and "already exists" not in resp.text.lower():
+            resp.raise_for_status()
+
+    async def _report(self, total: int, interval: float = 5.0) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            c = self.counts
+            processed = sum(c.values())
+            print(
+                f"Processed {processed}/{total} (✅ {c['uploaded']} / ♻️ {c['unchanged']} / "
+                f"🔗 {c['deduplicated']} / ⚠️ {c['skipped']} / ❌ {c['errors']})"
+            )
+
+    async def run(self, items) -> Dict[str, int]:
+        items = list(items)
+        item_queue: asyncio.Queue = asyncio.Queue()
+        for entry in items:
+            item_queue.put_nowait(entry)
+        for _ in range(self.download_concurrency):
+            item_queue.put_nowait(_DONE)
+        # Bounded so downloads pause instead of spooling the whole catalog
+        upload_queue: asyncio.Queue = asyncio.Queue(maxsize=self.upload_concurrency * 2)
+
+        timeout = httpx.Timeout(30.0, connect=10.0)
+        source_limits = httpx.Limits(max_connections=self.download_concurrency,
+                                     max_keepalive_connections=self.download_concurrency)
+        storage_limits = httpx.Limits(max_connections=self.upload_concurrency,
+                                      max_keepalive_connections=self.upload_concurrency)
+
+        async with httpx.AsyncClient(timeout=timeout, limits=source_limits, follow_redirects=True) as source, \
+                httpx.AsyncClient(timeout=timeout, limits=storage_limits) as storage:
+            await self.ensure_bucket(storage)
+            reporter = asyncio.create_task(self._report(len(items)))
+            uploaders = [asyncio.create_task(self.upload_worker(storage, upload_queue))
+                         for _ in range(self.upload_concurrency)]
+            try:
+                await asyncio.gather(*(self.download_worker(source, item_queue, upload_queue)
+                                       for _ in range(self.download_concurrency)))
+                for _ in uploaders:
+                    await upload_queue.put(_DONE)
+                await asyncio.gather(*uploaders)
+            finally:
+                reporter.cancel()
+                await asyncio.to_thread(self.manifest.save)
+        return self.counts
+
+
+def sync_images_async(
+    index_path: Path,
+    bucket: str,
+    prefix: str,
+    limit: int | None,
+    manifest_path: Optional[Path] = None,
+    recheck_after: float = 0,
+    download_concurrency: int = 100,
+    upload_concurrency: int = 32,
+    per_host: int = 16,
+    storage_url: Optional[str] = None,
+    dedupe: bool = False,
+    perceptual: bool = False,
+) -> SyncManifest:
+    storage_url = storage_url or os.getenv("SUPABASE_URL")
+    storage_key = os.getenv("SUPABASE_SERVICE_KEY")
+    if not storage_url or not storage_key:
+        raise SystemExit("SUPABASE_URL and SUPABASE_SERVICE_KEY are required")
+
+    manifest = SyncManifest(manifest_path or index_path.with_name(DEFAULT_MANIFEST_NAME))
+    engine = AsyncImageSync(
+        storage_url,
+        storage_key,
+        bucket,
+        prefix,
+        manifest,
+        download_concurrency=download_concurrency,
+        upload_concurrency=upload_concurrency,
+        per_host=per_host,
+        recheck_after=recheck_after,
+        dedupe=dedupe,
+        perceptual=perceptual,
+    )
+    started = time.perf_counter()
+    items = iter_images(index_path, limit)
+    counts = asyncio.run(engine.run(items))
+    elapsed = time.perf_counter() - started
+
+    total = sum(counts.values())
+    print(
+        f"\nDone! Total: {total}, Uploaded: {counts['uploaded']}, Unchanged: {counts['unchanged']}, "
+        f"Deduplicated: {counts['deduplicated']}, Skipped: {counts['skipped']}, Errors: {counts['errors']} "
+        f"in {elapsed:.1f}s"
+    )
+    print(f"Manifest saved to {manifest.path}")
+    return manifest
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+测试离线 Supabase 替身 | Tests for backend/fake_supabase.py
+
+Covers the FakeQuery filters, embedded relations, upserts and the PGRST204
+error on unknown columns. Uses a throwaway SQLite file, no Supabase project.
+"""
+
+import os
+import sys
+import tempfile
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'backend'))
+
+from postgrest.exceptions import APIError
+
+from fake_supabase import FakeSupabaseClient
+
+
+def make_client():
+    """New client on an empty database with three materials and two lots"""
+    directory = tempfile.mkdtemp(prefix='fake-supabase-test-')
+    client = FakeSupabaseClient(os.path.join(directory, 'fake.db'))
+    client.table('materials').insert([
+        {'name': 'Jasmine Rice 1kg', 'sku': 'NO-001', 'category': 'Noodles & Rice', 'quantity': 40, 'safe_stock': 20},
+        {'name': 'Soy Sauce 500ml', 'sku': 'CD-001', 'category': 'Sauces & Condiments', 'quantity': 5, 'safe_stock': 20},
+        {'name': 'Gyoza 400g', 'sku': 'FR-001', 'category': 'Frozen & Chilled', 'quantity': 0, 'safe_stock': 10},
+    ]).execute()
+    client.table('inventory_lots').insert([
+        {'material_id': 1, 'lot_number': 'L1', 'quantity': 25},
+        {'material_id': 1, 'lot_number': 'L2', 'quantity': 15},
+    ]).execute()
+    return client
+
+
+def test_filters():
+    """eq/gt/lte/in_/ilike/or_ filters, order and limit"""
+    client = make_client()
+    materials = client.table('materials')
+
+    rows = materials.select('sku').eq('category', 'Sauces & Condiments').execute().data
+    assert rows == [{'sku': 'CD-001'}]
+
+    rows = client.table('materials').select('sku').gt('quantity', 0).order('quantity', desc=True).execute().data
+    assert [row['sku'] for row in rows] == ['NO-001', 'CD-001']
+
+    rows = client.table('materials').select('sku').lte('quantity', 5).order('sku').execute().data
+    assert [row['sku'] for row in rows] == ['CD-001', 'FR-001']
+
+    rows = client.table('materials').select('sku').in_('sku', ['NO-001', 'FR-001']).order('sku').execute().data
+    assert [row['sku'] for row in rows] == ['FR-001', 'NO-001']
+
+    rows = client.table('materials').select('sku').ilike('name', '%sauce%').execute().data
+    assert [row['sku'] for row in rows] == ['CD-001']
+
+    rows = client.table('materials').select('sku').or_('sku.eq.NO-001,quantity.eq.0').order('sku').execute().data
+    assert [row['sku'] for row in rows] == ['FR-001', 'NO-001']
+
+    response = client.table('materials').select('sku', count='exact').order('sku').limit(1).execute()
+    assert response.count == 3
+    assert response.data == [{'sku': 'CD-001'}]
+
+    try:
+        client.table('materials').select('sku').eq('sku', 'missing').single().execute()
+    except APIError as exc:
+        assert exc.code == 'PGRST116'
+    else:
+        raise AssertionError('single() on no rows should raise PGRST116')
+
+
+def test_embeds():
+    """to-one and to-many embedded relations"""
+    client = make_client()
+
+    lots = client.table('inventory_lots').select('lot_number, materials(sku)').order('lot_number').execute().data
+    assert lots == [
+        {'lot_number': 'L1', 'materials': {'sku': 'NO-001'}},
+        {'lot_number': 'L2', 'materials': {'sku': 'NO-001'}},
+    ]
+
+    materials = client.table('materials').select('sku, inventory_lots(lot_number)').order('sku').execute().data
+    by_sku = {row['sku']: sorted(lot['lot_number'] for lot in row['inventory_lots']) for row in materials}
+    assert by_sku == {'CD-001': [], 'FR-001': [], 'NO-001': ['L1', 'L2']}
+
+
+def test_upsert():
+    """upsert updates on conflict and inserts new rows; ignore_duplicates keeps the old row"""
+    client = make_client()
+
+    client.table('materials').upsert([
+        {'name': 'Soy Sauce 500ml', 'sku': 'CD-001', 'category': 'Sauces & Condiments', 'quantity': 12},
+        {'name': 'Pocky', 'sku': 'SN-001', 'category': 'Snacks & Confectionery', 'quantity': 30},
+    ], on_conflict='sku').execute()
+    client.table('materials').upsert(
+        {'name': 'Gyoza', 'sku': 'FR-001', 'category': 'Frozen & Chilled', 'quantity': 99},
+        on_conflict='sku', ignore_duplicates=True,
+    ).execute()
+
+    rows = client.table('materials').select('sku, quantity').order('sku').execute().data
+    assert {row['sku']: row['quantity'] for row in rows} == {'CD-001': 12, 'FR-001': 0, 'NO-001': 40, 'SN-001': 30}
+
+
+def test_supabase_columns():
+    """catalog columns exist, is_active comes back as a bool, unknown columns raise PGRST204"""
+    client = make_client()
+
+    client.table('materials').update({'is_active': False, 'temperature_zone': 'Ambient'}).eq('sku', 'NO-001').execute()
+    row = client.table('materials').select('is_active, temperature_zone').eq('sku', 'NO-001').single().execute().data
+    assert row == {'is_active': False, 'temperature_zone': 'Ambient'}
+
+    for query in (
+        client.table('materials').update({'colour': 'red'}).eq('sku', 'NO-001'),
+        client.table('materials').insert({'name': 'X', 'sku': 'X-1', 'category': 'X', 'colour': 'red'}),
+    ):
+        try:
+            query.execute()
+        except APIError as exc:
+            assert exc.code == 'PGRST204'
+        else:
+            raise AssertionError('writing an unknown column should raise PGRST204')
+
+
+if __name__ == '__main__':
+    for test in (test_filters, test_embeds, test_upsert, test_supabase_columns):
+        test()
+        print(f"✅ {test.__name__}")
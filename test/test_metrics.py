@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+测试请求与数据库指标 | Tests for backend/metrics.py
+
+Runs statements through InstrumentedConnection on an in-memory SQLite
+database, inside and outside a Flask request, and checks the counters and the
+/metrics output. Each test uses its own table name, so the process-wide
+registry can be shared between tests.
+"""
+
+import os
+import sys
+import sqlite3
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'backend'))
+
+from flask import Flask
+
+import metrics
+
+
+def make_connection(table):
+    """In-memory connection with `table` holding ten rows"""
+    conn = sqlite3.connect(':memory:', factory=metrics.InstrumentedConnection)
+    conn.execute(f'CREATE TABLE {table} (id INTEGER PRIMARY KEY, name TEXT)')
+    conn.executemany(f'INSERT INTO {table} (name) VALUES (?)', [(f'item-{i}',) for i in range(10)])
+    return conn
+
+
+def query_count(table):
+    series = metrics.QUERY_LATENCY.series.get(('sqlite', table))
+    return series[-2] if series else 0
+
+
+def test_connection_counters():
+    """statements and fetched rows are counted per table outside a request"""
+    assert metrics.ENABLED
+    conn = make_connection('probe_direct')
+    assert query_count('probe_direct') == 2  # CREATE and the executemany INSERT
+
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM probe_direct WHERE id <= ?', (4,))
+    assert cursor.fetchone() is not None
+    assert len(cursor.fetchall()) == 3
+    # Rows are recorded once per statement, on the next execute or close
+    cursor.execute('SELECT * FROM probe_direct')
+    assert metrics.QUERY_ROWS.series[('sqlite', 'probe_direct')] == 4
+    assert sum(1 for _ in cursor) == 10
+    cursor.close()
+
+    assert query_count('probe_direct') == 4
+    assert metrics.QUERY_ROWS.series[('sqlite', 'probe_direct')] == 14
+    conn.close()
+
+
+def test_request_metrics():
+    """per-route queries and rows are merged at teardown and served at /metrics"""
+    conn = make_connection('probe_route')
+    app = Flask(__name__)
+    metrics.init_app(app)
+
+    @app.route('/probe/<int:limit>')
+    def probe(limit):
+        rows = conn.execute('SELECT name FROM probe_route LIMIT ?', (limit,)).fetchall()
+        conn.execute('SELECT COUNT(*) FROM probe_route').fetchone()
+        return {'count': len(rows)}
+
+    client = app.test_client()
+    assert client.get('/probe/3').json == {'count': 3}
+    assert client.get('/probe/5').json == {'count': 5}
+
+    route = '/probe/<int:limit>'
+    assert metrics.REQUESTS.series[('GET', route, '200')] == 2
+    assert metrics.ROUTE_QUERIES.series[(route,)] == 4
+    assert metrics.ROUTE_ROWS.series[(route,)] == 3 + 1 + 5 + 1
+    assert metrics.REQUEST_QUERIES.series[(route,)][-2] == 2  # two requests observed
+    assert query_count('probe_route') == 2 + 4
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{method="GET",route="/probe/<int:limit>",status="200"} 2' in body
+    assert 'request_db_queries_total{route="/probe/<int:limit>"} 4' in body
+    assert 'request_db_rows_total{route="/probe/<int:limit>"} 10' in body
+    assert 'db_queries_per_request_bucket{route="/probe/<int:limit>",le="2"} 2' in body
+    assert 'db_rows_total{backend="sqlite",table="probe_route"} 10' in body
+    conn.close()
+
+
+if __name__ == '__main__':
+    for test in (test_connection_counters, test_request_metrics):
+        test()
+        print(f"✅ {test.__name__}")
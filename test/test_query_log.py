@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+测试 SQLite 慢查询日志 | Tests for backend/query_log.py
+
+Checks statement normalization (literals and IN lists) and that observe()
+aggregates statements, captures the plan of slow ones and flags full scans.
+Durations are passed in directly, so nothing depends on real timing.
+"""
+
+import logging
+import os
+import sys
+import sqlite3
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'backend'))
+
+import query_log
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_normalize():
+    """literals become ?, IN lists of any length collapse, whitespace is squeezed"""
+    assert query_log.normalize("SELECT * FROM materials WHERE sku = 'NO-001' AND quantity > 5") == \
+        "SELECT * FROM materials WHERE sku = ? AND quantity > ?"
+    assert query_log.normalize("SELECT name FROM materials WHERE name = 'O''Brien'") == \
+        "SELECT name FROM materials WHERE name = ?"
+    assert query_log.normalize("SELECT * FROM t WHERE price < 2.50") == "SELECT * FROM t WHERE price < ?"
+
+    short = query_log.normalize("SELECT * FROM materials WHERE id IN (1, 2)")
+    long = query_log.normalize("SELECT * FROM materials WHERE id in (?,?,?,?,?)")
+    assert short == long == "SELECT * FROM materials WHERE id IN (...)"
+
+    assert query_log.normalize("SELECT *\n    FROM   materials\n  WHERE id = ?") == \
+        "SELECT * FROM materials WHERE id = ?"
+    # Digits inside identifiers are kept
+    assert query_log.normalize("SELECT col2 FROM t1") == "SELECT col2 FROM t1"
+
+
+def test_observe_flags_full_scans():
+    """slow statements are logged with their plan; SCAN plans are flagged, SEARCH plans are not"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE probe (id INTEGER PRIMARY KEY, name TEXT)')
+    threshold = query_log.SLOW_QUERY_SECONDS
+    query_log.SLOW_QUERY_SECONDS = 0.1
+    slow = 0.5
+
+    capture = _Capture()
+    query_log.logger.addHandler(capture)
+    query_log.reset()
+    try:
+        query_log.observe(conn, "SELECT * FROM probe WHERE name = 'a'", (), slow)
+        query_log.observe(conn, "SELECT * FROM probe WHERE name = 'b'", (), slow)
+        query_log.observe(conn, 'SELECT * FROM probe WHERE id = ?', (1,), slow)
+        query_log.observe(conn, 'SELECT * FROM probe WHERE id = ?', (2,), 0.0)
+    finally:
+        query_log.logger.removeHandler(capture)
+        query_log.SLOW_QUERY_SECONDS = threshold
+
+    summary = {entry['statement']: entry for entry in query_log.summary()}
+    scan = summary['SELECT * FROM probe WHERE name = ?']
+    assert scan['count'] == 2 and scan['slow_count'] == 2
+    assert scan['full_scan'] is True
+    assert any(step.startswith('SCAN') for step in scan['plan'])
+
+    search = summary['SELECT * FROM probe WHERE id = ?']
+    assert search['count'] == 2 and search['slow_count'] == 1
+    assert search['full_scan'] is False
+
+    assert len(capture.messages) == 3
+    assert sum('full scan' in message for message in capture.messages) == 2
+    query_log.reset()
+    conn.close()
+
+
+if __name__ == '__main__':
+    for test in (test_normalize, test_observe_flags_full_scans):
+        test()
+        print(f"✅ {test.__name__}")